@@ -0,0 +1,673 @@
+"""
+LexAI Practice Partner - Analytics Queries
+Daily rollup tables for the analytics dashboard endpoints
+
+Invoices, time entries, cases and clients are aggregated into per-user,
+per-client and per-practice-area daily rollups. The rollups are refreshed
+incrementally, one (key, day) bucket at a time, in the same transaction
+as the write that changed them, and can be rebuilt from scratch with
+``python manage.py backfill-analytics``. Dashboard endpoints read only
+the rollups, so their cost scales with the number of days rather than
+the number of invoices.
+
+Dashboard results are also cached per user and period on top of the
+rollups (``cached_dashboard``). Writes to the same four models bump the
+user's ``analytics:<user_id>`` cache tag on commit; the next dashboard
+load is served the previous result at once while a background thread
+recomputes it (stale-while-revalidate).
+"""
+
+import os
+import logging
+import threading
+import time as clock
+from datetime import datetime, date, time, timedelta
+from flask import current_app
+from sqlalchemy import event, func, or_, cast, delete, insert, inspect, select, Integer, case as sql_case
+from sqlalchemy.orm import Session, object_session
+from models import (
+    db, Client, Case, TimeEntry, Invoice, InvoiceStatus, TimeEntryStatus,
+    UserDailyRollup, ClientDailyRollup, PracticeAreaDailyRollup
+)
+from cache import cache, invalidate_on_commit
+
+logger = logging.getLogger(__name__)
+
+# Invoices that count towards revenue on the dashboard
+REVENUE_STATUSES = [InvoiceStatus.PAID, InvoiceStatus.SENT]
+
+# Time utilization categories, matched on the entry description in order
+TIME_CATEGORIES = [
+    ('meeting_hours', 'Client Meetings', ['meeting', 'call']),
+    ('admin_hours', 'Admin Tasks', ['admin', 'invoice']),
+    ('business_development_hours', 'Business Development', ['business', 'marketing']),
+]
+DEFAULT_TIME_CATEGORY = ('billable_work_hours', 'Billable Work')
+
+
+def day_bucket(column, session=None):
+    """Truncate a date/datetime column to a 'YYYY-MM-DD' string in SQL"""
+    session = session if session is not None else db.session
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return func.to_char(func.date_trunc('day', column), 'YYYY-MM-DD')
+    return func.strftime('%Y-%m-%d', column)
+
+
+def _day_range(day):
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _as_day(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _time_category_expression():
+    """SQL CASE mapping a time entry description to its rollup column name"""
+    description = func.lower(TimeEntry.description)
+    whens = [
+        (or_(*[description.like(f'%{keyword}%') for keyword in keywords]), column)
+        for column, _, keywords in TIME_CATEGORIES
+    ]
+    return sql_case(*whens, else_=DEFAULT_TIME_CATEGORY[0])
+
+
+def _hours_columns():
+    """Conditional SUM()s of time entry hours for each rollup hours column"""
+    category = _time_category_expression()
+    columns = [
+        func.coalesce(func.sum(sql_case(
+            (TimeEntry.status == TimeEntryStatus.APPROVED, TimeEntry.hours), else_=0
+        )), 0).label('approved_hours')
+    ]
+    for column in [c for c, _, _ in TIME_CATEGORIES] + [DEFAULT_TIME_CATEGORY[0]]:
+        columns.append(func.coalesce(func.sum(sql_case(
+            (category == column, TimeEntry.hours), else_=0
+        )), 0).label(column))
+    return columns
+
+
+def _replace_rollup(session, model, key, values):
+    """Replace one rollup row; all-zero buckets are deleted to keep tables sparse"""
+    conditions = [getattr(model, name) == value for name, value in key.items()]
+    session.execute(delete(model).where(*conditions))
+    if any(value for name, value in values.items() if name not in ('user_id', 'last_invoice_at')):
+        session.execute(insert(model).values(**key, **values))
+
+
+# ===== BUCKET REFRESH =====
+
+def refresh_user_day(user_id, day, session=None):
+    """Recompute a single user's rollup for one day"""
+    session = session if session is not None else db.session
+    start, end = _day_range(day)
+
+    revenue, invoice_count = session.query(
+        func.coalesce(func.sum(Invoice.total_amount), 0), func.count(Invoice.id)
+    ).filter(
+        Invoice.created_by == user_id,
+        Invoice.created_at >= start,
+        Invoice.created_at < end,
+        Invoice.status.in_(REVENUE_STATUSES)
+    ).one()
+
+    hours = session.query(*_hours_columns()).filter(
+        TimeEntry.user_id == user_id,
+        TimeEntry.date == day
+    ).one()
+
+    new_clients = session.query(func.count(Client.id)).filter(
+        Client.created_by == user_id,
+        Client.created_at >= start,
+        Client.created_at < end
+    ).scalar()
+
+    values = {'revenue': revenue, 'invoice_count': invoice_count, 'new_clients': new_clients}
+    values.update(hours._asdict())
+    _replace_rollup(session, UserDailyRollup, {'user_id': user_id, 'day': day}, values)
+
+
+def refresh_client_day(client_id, day, session=None):
+    """Recompute a single client's rollup for one day"""
+    session = session if session is not None else db.session
+    client = session.get(Client, client_id)
+    if client is None:
+        session.execute(delete(ClientDailyRollup).where(ClientDailyRollup.client_id == client_id))
+        return
+
+    start, end = _day_range(day)
+    revenue, invoice_count, last_invoice_at = session.query(
+        func.coalesce(func.sum(Invoice.total_amount), 0), func.count(Invoice.id), func.max(Invoice.created_at)
+    ).filter(
+        Invoice.client_id == client_id,
+        Invoice.created_at >= start,
+        Invoice.created_at < end,
+        Invoice.status.in_(REVENUE_STATUSES)
+    ).one()
+
+    new_cases = session.query(func.count(Case.id)).filter(
+        Case.client_id == client_id,
+        Case.created_at >= start,
+        Case.created_at < end
+    ).scalar()
+
+    _replace_rollup(session, ClientDailyRollup, {'client_id': client_id, 'day': day}, {
+        'user_id': client.created_by,
+        'revenue': revenue,
+        'invoice_count': invoice_count,
+        'new_cases': new_cases,
+        'last_invoice_at': last_invoice_at
+    })
+
+
+def refresh_practice_area_day(user_id, practice_area, day, session=None):
+    """Recompute one attorney's practice-area rollup for one day"""
+    session = session if session is not None else db.session
+    start, end = _day_range(day)
+
+    revenue = session.query(func.coalesce(func.sum(TimeEntry.amount), 0)).join(
+        Case, TimeEntry.case_id == Case.id
+    ).filter(
+        Case.primary_attorney_id == user_id,
+        func.coalesce(Case.practice_area, 'General') == practice_area,
+        TimeEntry.billable == True,
+        TimeEntry.date == day
+    ).scalar()
+
+    new_cases = session.query(func.count(Case.id)).filter(
+        Case.primary_attorney_id == user_id,
+        func.coalesce(Case.practice_area, 'General') == practice_area,
+        Case.created_at >= start,
+        Case.created_at < end
+    ).scalar()
+
+    _replace_rollup(session, PracticeAreaDailyRollup, {
+        'user_id': user_id, 'practice_area': practice_area, 'day': day
+    }, {'revenue': revenue, 'new_cases': new_cases})
+
+
+# ===== INCREMENTAL MAINTENANCE =====
+
+# Attributes that decide which rollup buckets a row lands in
+BUCKET_ATTRIBUTES = {
+    Invoice: ('created_by', 'client_id', 'created_at'),
+    TimeEntry: ('user_id', 'case_id', 'date'),
+    Case: ('client_id', 'primary_attorney_id', 'practice_area', 'created_at'),
+    Client: ('created_by', 'created_at'),
+}
+
+
+def _attribute_states(obj, *attrs):
+    """Current and previously committed values of ``attrs`` as tuples"""
+    state = inspect(obj)
+    current = tuple(getattr(obj, attr) for attr in attrs)
+    previous = []
+    for attr, value in zip(attrs, current):
+        history = state.attrs[attr].history
+        previous.append(history.deleted[0] if history.deleted else value)
+    return {current, tuple(previous)}
+
+
+def _case_practice_buckets(session, case_id, day):
+    """Practice-area buckets affected by a time entry on ``case_id``"""
+    if not case_id or day is None:
+        return set()
+    row = session.query(Case.primary_attorney_id, Case.practice_area).filter(Case.id == case_id).first()
+    return {(row[0], row[1] or 'General', day)} if row else set()
+
+
+def _session_buckets(session):
+    return session.info.setdefault('analytics_buckets', {'user': set(), 'client': set(), 'practice': set(), 'entry_cases': set()})
+
+
+def mark_rollup_buckets(session, user=(), client=(), practice=(), entry_cases=()):
+    """Queue rollup buckets for refresh on the next commit.
+
+    For Core bulk inserts, which bypass the ORM flush events. Each argument
+    is an iterable of the tuples stored in that bucket set.
+    """
+    buckets = _session_buckets(session)
+    buckets['user'].update(user)
+    buckets['client'].update(client)
+    buckets['practice'].update(practice)
+    buckets['entry_cases'].update(entry_cases)
+
+    users = {bucket[0] for bucket in buckets['user'] | buckets['practice']}
+    client_ids = {client_id for client_id, _ in buckets['client']}
+    if client_ids:
+        users.update(session.execute(select(Client.created_by).where(Client.id.in_(client_ids))).scalars())
+    invalidate_on_commit(session, *(dashboard_tag(user_id) for user_id in users if user_id))
+
+
+def _collect_rollup_buckets(session, obj):
+    """Map a changed object to the rollup buckets it affects"""
+    buckets = _session_buckets(session)
+
+    if isinstance(obj, Invoice):
+        for user_id, client_id, created_at in _attribute_states(obj, *BUCKET_ATTRIBUTES[Invoice]):
+            buckets['user'].add((user_id, _as_day(created_at)))
+            buckets['client'].add((client_id, _as_day(created_at)))
+    elif isinstance(obj, TimeEntry):
+        for user_id, case_id, entry_date in _attribute_states(obj, *BUCKET_ATTRIBUTES[TimeEntry]):
+            buckets['user'].add((user_id, _as_day(entry_date)))
+            buckets['entry_cases'].add((case_id, _as_day(entry_date)))
+    elif isinstance(obj, Case):
+        states = _attribute_states(obj, *BUCKET_ATTRIBUTES[Case])
+        for client_id, user_id, practice_area, created_at in states:
+            buckets['client'].add((client_id, _as_day(created_at)))
+            buckets['practice'].add((user_id, practice_area or 'General', _as_day(created_at)))
+        if len({(user_id, area) for _, user_id, area, _ in states}) > 1:
+            # Re-attributed case: every day it has time entries moves between buckets
+            entry_days = session.query(TimeEntry.date).filter(TimeEntry.case_id == obj.id).distinct().all()
+            for _, user_id, practice_area, _ in states:
+                for (entry_date,) in entry_days:
+                    buckets['practice'].add((user_id, practice_area or 'General', entry_date))
+    elif isinstance(obj, Client):
+        for user_id, created_at in _attribute_states(obj, *BUCKET_ATTRIBUTES[Client]):
+            buckets['user'].add((user_id, _as_day(created_at)))
+
+
+def _after_flush(session, flush_context):
+    if session.info.get('skip_analytics_rollups'):
+        return
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, tuple(BUCKET_ATTRIBUTES)):
+            _collect_rollup_buckets(session, obj)
+
+
+def _before_commit(session):
+    # Flush first so after_flush has seen every pending change
+    session.flush()
+    buckets = session.info.pop('analytics_buckets', None)
+    if not buckets:
+        return
+
+    # A failed refresh fails the commit, so rollups never drift from the
+    # rows they summarize
+    try:
+        for case_id, day in buckets['entry_cases']:
+            buckets['practice'] |= _case_practice_buckets(session, case_id, day)
+        for user_id, day in buckets['user']:
+            if user_id and day:
+                refresh_user_day(user_id, day, session)
+        for client_id, day in buckets['client']:
+            if client_id and day:
+                refresh_client_day(client_id, day, session)
+        for user_id, practice_area, day in buckets['practice']:
+            if user_id and day:
+                refresh_practice_area_day(user_id, practice_area, day, session)
+    except Exception as e:
+        logger.error(f"Analytics rollup refresh failed, rolling back the commit: {e}")
+        raise
+
+
+def _after_rollback(session):
+    session.info.pop('analytics_buckets', None)
+
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+def register_rollup_listeners():
+    """Keep the rollup tables in sync with every committed session"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        # active_history loads the old value on change, so a re-keyed row
+        # also refreshes the bucket it moved out of
+        for model, attrs in BUCKET_ATTRIBUTES.items():
+            for attr in attrs:
+                event.listen(getattr(model, attr), 'set', _keep_previous_value, active_history=True, retval=True)
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'before_commit', _before_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
+
+
+# ===== BACKFILL =====
+
+def _merge_rows(rows, key_columns, target):
+    for row in rows:
+        data = row._asdict()
+        key = tuple(_as_day(data.pop(k)) if k == 'day' else data.pop(k) for k in key_columns)
+        target.setdefault(key, {}).update(data)
+
+
+def backfill_rollups(since=None):
+    """Rebuild the rollup tables from raw rows with grouped queries.
+
+    ``since`` limits the rebuild to days on or after that date. Returns the
+    number of rows written per rollup table.
+    """
+    since_start = datetime.combine(since, time.min) if since else None
+    db.session.info['skip_analytics_rollups'] = True
+
+    try:
+        for model in (UserDailyRollup, ClientDailyRollup, PracticeAreaDailyRollup):
+            statement = delete(model)
+            if since:
+                statement = statement.where(model.day >= since)
+            db.session.execute(statement)
+
+        # Per-user rollups
+        user_rows = {}
+        invoice_day = day_bucket(Invoice.created_at).label('day')
+        query = db.session.query(
+            Invoice.created_by.label('user_id'), invoice_day,
+            func.sum(Invoice.total_amount).label('revenue'), func.count(Invoice.id).label('invoice_count')
+        ).filter(Invoice.status.in_(REVENUE_STATUSES))
+        if since_start:
+            query = query.filter(Invoice.created_at >= since_start)
+        _merge_rows(query.group_by(Invoice.created_by, invoice_day).all(), ('user_id', 'day'), user_rows)
+
+        query = db.session.query(TimeEntry.user_id.label('user_id'), TimeEntry.date.label('day'), *_hours_columns())
+        if since:
+            query = query.filter(TimeEntry.date >= since)
+        _merge_rows(query.group_by(TimeEntry.user_id, TimeEntry.date).all(), ('user_id', 'day'), user_rows)
+
+        client_day = day_bucket(Client.created_at).label('day')
+        query = db.session.query(Client.created_by.label('user_id'), client_day, func.count(Client.id).label('new_clients'))
+        if since_start:
+            query = query.filter(Client.created_at >= since_start)
+        _merge_rows(query.group_by(Client.created_by, client_day).all(), ('user_id', 'day'), user_rows)
+
+        # Per-client rollups
+        client_rows = {}
+        query = db.session.query(
+            Invoice.client_id.label('client_id'), invoice_day, Client.created_by.label('user_id'),
+            func.sum(Invoice.total_amount).label('revenue'), func.count(Invoice.id).label('invoice_count'),
+            func.max(Invoice.created_at).label('last_invoice_at')
+        ).join(Client, Invoice.client_id == Client.id).filter(Invoice.status.in_(REVENUE_STATUSES))
+        if since_start:
+            query = query.filter(Invoice.created_at >= since_start)
+        _merge_rows(query.group_by(Invoice.client_id, invoice_day, Client.created_by).all(), ('client_id', 'day'), client_rows)
+
+        case_day = day_bucket(Case.created_at).label('day')
+        query = db.session.query(
+            Case.client_id.label('client_id'), case_day, Client.created_by.label('user_id'),
+            func.count(Case.id).label('new_cases')
+        ).join(Client, Case.client_id == Client.id)
+        if since_start:
+            query = query.filter(Case.created_at >= since_start)
+        _merge_rows(query.group_by(Case.client_id, case_day, Client.created_by).all(), ('client_id', 'day'), client_rows)
+
+        # Per-practice-area rollups
+        practice_rows = {}
+        practice_area = func.coalesce(Case.practice_area, 'General').label('practice_area')
+        query = db.session.query(
+            Case.primary_attorney_id.label('user_id'), practice_area, TimeEntry.date.label('day'),
+            func.sum(TimeEntry.amount).label('revenue')
+        ).join(Case, TimeEntry.case_id == Case.id).filter(
+            TimeEntry.billable == True, Case.primary_attorney_id.isnot(None)
+        )
+        if since:
+            query = query.filter(TimeEntry.date >= since)
+        _merge_rows(query.group_by(Case.primary_attorney_id, practice_area, TimeEntry.date).all(),
+                    ('user_id', 'practice_area', 'day'), practice_rows)
+
+        query = db.session.query(
+            Case.primary_attorney_id.label('user_id'), practice_area, case_day,
+            func.count(Case.id).label('new_cases')
+        ).filter(Case.primary_attorney_id.isnot(None))
+        if since_start:
+            query = query.filter(Case.created_at >= since_start)
+        _merge_rows(query.group_by(Case.primary_attorney_id, practice_area, case_day).all(),
+                    ('user_id', 'practice_area', 'day'), practice_rows)
+
+        counts = {}
+        for model, rows, key_columns in [
+            (UserDailyRollup, user_rows, ('user_id', 'day')),
+            (ClientDailyRollup, client_rows, ('client_id', 'day')),
+            (PracticeAreaDailyRollup, practice_rows, ('user_id', 'practice_area', 'day')),
+        ]:
+            records = [dict(zip(key_columns, key), **values) for key, values in rows.items()]
+            for start in range(0, len(records), 1000):
+                db.session.execute(insert(model), records[start:start + 1000])
+            counts[model.__tablename__] = len(records)
+
+        db.session.commit()
+        return counts
+
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop('skip_analytics_rollups', None)
+
+
+# ===== DASHBOARD READS =====
+
+def get_period_totals(user_id, start_date, prev_start):
+    """Revenue, approved hours and new clients for the current and previous periods"""
+    start_day, prev_day = start_date.date(), prev_start.date()
+
+    def split(column):
+        current = func.coalesce(func.sum(sql_case((UserDailyRollup.day >= start_day, column), else_=0)), 0)
+        previous = func.coalesce(func.sum(sql_case((UserDailyRollup.day < start_day, column), else_=0)), 0)
+        return current, previous
+
+    row = db.session.query(
+        *split(UserDailyRollup.revenue),
+        *split(UserDailyRollup.approved_hours),
+        *split(UserDailyRollup.new_clients)
+    ).filter(
+        UserDailyRollup.user_id == user_id,
+        UserDailyRollup.day >= prev_day
+    ).one()
+
+    return {
+        'revenue': float(row[0] or 0),
+        'prev_revenue': float(row[1] or 0),
+        'hours': float(row[2] or 0),
+        'prev_hours': float(row[3] or 0),
+        'clients': int(row[4] or 0),
+        'prev_clients': int(row[5] or 0)
+    }
+
+
+def get_daily_revenue(user_id, start_date):
+    """Revenue per day since start_date as {'YYYY-MM-DD': amount}"""
+    rows = db.session.query(UserDailyRollup.day, UserDailyRollup.revenue).filter(
+        UserDailyRollup.user_id == user_id,
+        UserDailyRollup.day >= start_date.date(),
+        UserDailyRollup.revenue > 0
+    ).all()
+
+    return {day.strftime('%Y-%m-%d'): float(revenue) for day, revenue in rows}
+
+
+def get_category_hours(user_id, start_date):
+    """Hours per time utilization category since start_date"""
+    categories = [DEFAULT_TIME_CATEGORY] + [(column, label) for column, label, _ in TIME_CATEGORIES]
+
+    row = db.session.query(
+        *[func.coalesce(func.sum(getattr(UserDailyRollup, column)), 0) for column, _ in categories]
+    ).filter(
+        UserDailyRollup.user_id == user_id,
+        UserDailyRollup.day >= start_date.date()
+    ).one()
+
+    return {label: float(value or 0) for (_, label), value in zip(categories, row)}
+
+
+def _days_since(column, now):
+    """Whole days between a datetime column and ``now``, computed in SQL"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return func.floor(func.extract('epoch', now - column) / 86400)
+    return cast(func.julianday(now) - func.julianday(column), Integer)
+
+
+def _least(a, b):
+    return sql_case((a < b, a), else_=b)
+
+
+def _clamp(value, low, high):
+    return sql_case((value < low, low), (value > high, high), else_=value)
+
+
+def get_top_engaged_clients(user_id, now, days=30, limit=10):
+    """Top clients by engagement score, scored and ranked in the database.
+
+    The score starts at 100, loses 2 points per day since the last invoice
+    (or since the client was added, at most 50) and gains 10 points per new
+    case (at most 30), clamped to 20-100.
+    """
+    activity = db.session.query(
+        ClientDailyRollup.client_id,
+        func.sum(ClientDailyRollup.revenue).label('revenue'),
+        func.sum(ClientDailyRollup.new_cases).label('recent_cases'),
+        func.max(ClientDailyRollup.last_invoice_at).label('last_invoice_at')
+    ).filter(
+        ClientDailyRollup.user_id == user_id,
+        ClientDailyRollup.day >= (now - timedelta(days=days)).date()
+    ).group_by(ClientDailyRollup.client_id).subquery()
+
+    last_contact = func.coalesce(activity.c.last_invoice_at, Client.created_at)
+    recent_cases = func.coalesce(activity.c.recent_cases, 0)
+    score = _clamp(
+        100 - _least(_days_since(last_contact, now) * 2, 50) + _least(recent_cases * 10, 30),
+        20, 100
+    ).label('engagement_score')
+
+    rows = db.session.query(
+        Client.first_name,
+        Client.last_name,
+        func.coalesce(activity.c.revenue, 0),
+        last_contact.label('last_contact'),
+        score
+    ).outerjoin(
+        activity, activity.c.client_id == Client.id
+    ).filter(
+        Client.created_by == user_id
+    ).order_by(score.desc(), Client.id).limit(limit).all()
+
+    return [
+        {
+            'client_name': f"{first_name} {last_name}",
+            'engagement_score': int(engagement_score),
+            'last_contact': last_contact,
+            'revenue': float(revenue or 0)
+        }
+        for first_name, last_name, revenue, last_contact, engagement_score in rows
+    ]
+
+
+def get_practice_area_totals(user_id):
+    """All-time revenue and case counts per practice area, highest revenue first"""
+    revenue = func.sum(PracticeAreaDailyRollup.revenue)
+    rows = db.session.query(
+        PracticeAreaDailyRollup.practice_area,
+        revenue,
+        func.sum(PracticeAreaDailyRollup.new_cases)
+    ).filter(
+        PracticeAreaDailyRollup.user_id == user_id
+    ).group_by(PracticeAreaDailyRollup.practice_area).order_by(revenue.desc()).all()
+
+    return [(area, float(revenue or 0), int(cases or 0)) for area, revenue, cases in rows]
+
+
+# ===== DASHBOARD CACHE =====
+
+DASHBOARD_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', '300'))
+DASHBOARD_CACHE_MAX_STALE = int(os.getenv('ANALYTICS_CACHE_MAX_STALE', '3600'))
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def dashboard_tag(user_id):
+    return f"analytics:{user_id}"
+
+
+def _owners(connection, model, column, ids):
+    ids = {value for value in ids if value}
+    if not ids:
+        return set()
+    return set(connection.execute(select(getattr(model, column)).where(model.id.in_(ids))).scalars())
+
+
+def _dashboard_users(connection, obj):
+    """Users whose dashboards include ``obj``, before and after the change"""
+    def values(attr):
+        return {value for (value,) in _attribute_states(obj, attr)}
+
+    if isinstance(obj, Invoice):
+        return values('created_by') | _owners(connection, Client, 'created_by', values('client_id'))
+    if isinstance(obj, TimeEntry):
+        return values('user_id') | _owners(connection, Case, 'primary_attorney_id', values('case_id'))
+    if isinstance(obj, Case):
+        return values('primary_attorney_id') | _owners(connection, Client, 'created_by', values('client_id'))
+    return values('created_by')
+
+
+def _mark_dashboards_stale(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    users = _dashboard_users(connection, target)
+    invalidate_on_commit(session, *(dashboard_tag(user_id) for user_id in users if user_id))
+
+
+def register_dashboard_cache_invalidation():
+    """Invalidate cached dashboards on every committed write to their models"""
+    for model in BUCKET_ATTRIBUTES:
+        if not event.contains(model, 'after_insert', _mark_dashboards_stale):
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, name, _mark_dashboards_stale)
+
+
+def _store(key, version, compute):
+    data = compute()
+    cache.set(key, {'version': version, 'computed_at': clock.time(), 'data': data}, DASHBOARD_CACHE_MAX_STALE)
+    return data
+
+
+def _refresh_in_background(key, version, compute):
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    app = current_app._get_current_object()
+
+    def run():
+        try:
+            with app.app_context():
+                _store(key, version, compute)
+        except Exception as e:
+            logger.warning(f"Dashboard refresh failed for {key}: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def cached_dashboard(name, user_id, period, compute):
+    """Cached result of ``compute()`` for one user's dashboard panel.
+
+    Fresh results are returned as is. Results invalidated by a write, or
+    older than ANALYTICS_CACHE_TTL, are still returned for up to
+    ANALYTICS_CACHE_MAX_STALE seconds while one background thread per key
+    recomputes them; past that the caller computes synchronously.
+    ``compute`` must return JSON-serializable data.
+    """
+    key = f"dashboard:{name}:{user_id}:{period}:{date.today().isoformat()}"
+    tag = dashboard_tag(user_id)
+    version = cache.tag_versions([tag])[tag]
+
+    entry = cache.get(key)
+    if entry is not None:
+        age = clock.time() - entry['computed_at']
+        if entry['version'] == version and age < DASHBOARD_CACHE_TTL:
+            return entry['data']
+        if age < DASHBOARD_CACHE_MAX_STALE:
+            _refresh_in_background(key, version, compute)
+            return entry['data']
+
+    return _store(key, version, compute)
@@ -0,0 +1,163 @@
+"""
+LexAI Practice Partner - Static Asset Manifest
+Content-hashed static URLs and precompressed CSS/JS
+
+``python manage.py build-assets`` (run before deploying) hashes every file
+in static/ into static/manifest.json and writes ``.gz`` copies of each
+.css/.js file next to the original, plus ``.br`` copies when the brotli
+package is installed. ``versioned_static(filename)`` in templates is then
+a dict lookup returning ``/static/<file>?v=<hash>``: the URL changes only
+when the content does, which is what makes the one-year immutable
+Cache-Control on static files safe.
+
+The static route serves a precompressed variant when the request's
+Accept-Encoding allows it. Without a manifest (a fresh checkout) files are
+hashed once at startup and served uncompressed. Files edited after the
+last build are re-hashed at startup and lose their stale variants.
+"""
+
+import os
+import json
+import gzip
+import hashlib
+import logging
+import mimetypes
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATIC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE = ('.css', '.js')
+# Preferred encoding first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _asset_files(static_folder):
+    """Static files relative to ``static_folder``, excluding build output"""
+    for root, _, files in os.walk(static_folder):
+        for name in sorted(files):
+            path = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+            if path != MANIFEST_NAME and not path.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                yield path
+
+
+def _compress(encoding, data):
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+def build_assets(static_folder=DEFAULT_STATIC_FOLDER):
+    """Write the manifest and compressed variants; returns the manifest"""
+    manifest = {'files': {}, 'compressed': {}}
+    for filename in _asset_files(static_folder):
+        path = os.path.join(static_folder, filename)
+        with open(path, 'rb') as f:
+            data = f.read()
+        manifest['files'][filename] = _content_hash(data)
+
+        if not filename.endswith(COMPRESSIBLE):
+            continue
+        encodings = []
+        for encoding, suffix in ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            compressed = _compress(encoding, data)
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+                encodings.append(encoding)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        if encodings:
+            manifest['compressed'][filename] = encodings
+
+    with open(os.path.join(static_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    """Static file versions and precompressed variants, loaded once"""
+
+    def __init__(self, app=None):
+        self.static_folder = DEFAULT_STATIC_FOLDER
+        self.static_url_path = '/static'
+        self.versions = {}
+        self.compressed = {}
+        self._send_static = None
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.static_url_path = app.static_url_path
+        self.load()
+        app.jinja_env.globals['versioned_static'] = self.url
+        self._send_static = app.view_functions['static']
+        app.view_functions['static'] = self.send_static
+
+    def load(self):
+        manifest_path = os.path.join(self.static_folder, MANIFEST_NAME)
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            built_at = os.path.getmtime(manifest_path)
+        except (OSError, ValueError):
+            manifest, built_at = {'files': {}, 'compressed': {}}, None
+
+        built = manifest.get('files', {})
+        versions, compressed = {}, {}
+        for filename in _asset_files(self.static_folder):
+            path = os.path.join(self.static_folder, filename)
+            if filename in built and os.path.getmtime(path) <= built_at:
+                versions[filename] = built[filename]
+                compressed[filename] = tuple(manifest.get('compressed', {}).get(filename, ()))
+            else:
+                with open(path, 'rb') as f:
+                    versions[filename] = _content_hash(f.read())
+
+        self.versions = versions
+        self.compressed = {name: encodings for name, encodings in compressed.items() if encodings}
+        if built_at is None:
+            logger.info("No static asset manifest; run 'python manage.py build-assets' for precompressed assets")
+
+    def url(self, filename):
+        """Content-hashed URL for a static file"""
+        version = self.versions.get(filename)
+        if version:
+            return f"{self.static_url_path}/{filename}?v={version}"
+        return f"{self.static_url_path}/{filename}"
+
+    def send_static(self, filename):
+        """Static view that prefers a precompressed variant"""
+        encodings = self.compressed.get(filename)
+        if not encodings:
+            return self._send_static(filename=filename)
+
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            if encoding in encodings and accepted[encoding]:
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                response = send_from_directory(self.static_folder, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = self._send_static(filename=filename)
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+# Bound to the app in index.py
+asset_manifest = AssetManifest()
+
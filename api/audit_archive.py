@@ -0,0 +1,323 @@
+"""
+LexAI Practice Partner - Audit Log Partitions and Archival
+Monthly audit log partitions, retention and compressed JSONL archives
+
+On PostgreSQL ``audit_logs`` is range-partitioned by month (see migration
+b7e4f1a9c2d5) and old partitions are detached and dropped. SQLite has no
+partitioning, so older months are rotated out of ``audit_logs`` into
+``audit_logs_YYYYMM`` tables, indexed like the live table. Either way,
+partitions past the retention window are streamed to file storage as
+gzipped JSONL before they are dropped. Old rows in the live SQLite table
+or the PostgreSQL default partition are archived and deleted by month.
+``query_audit_logs`` reads only the partitions overlapping the requested
+dates, in one statement.
+"""
+
+import os
+import gzip
+import json
+import logging
+import tempfile
+from datetime import datetime, date
+from sqlalchemy import MetaData, Table, Column, select, insert, delete, func, text, inspect, union_all
+from sqlalchemy.orm.attributes import set_committed_value
+from models import db, AuditLog, User
+
+logger = logging.getLogger(__name__)
+
+AUDIT_TABLE = AuditLog.__tablename__
+ARCHIVE_PREFIX = 'audit-archive'
+DEFAULT_RETENTION_MONTHS = int(os.getenv('AUDIT_RETENTION_MONTHS', '24'))
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month):
+    if db.engine.dialect.name == 'postgresql':
+        return f'{AUDIT_TABLE}_y{month.year}m{month.month:02d}'
+    return f'{AUDIT_TABLE}_{month.year}{month.month:02d}'
+
+
+def _partition_month(name):
+    digits = ''.join(ch for ch in name[len(AUDIT_TABLE):] if ch.isdigit())
+    if len(digits) != 6:
+        return None
+    return date(int(digits[:4]), int(digits[4:]), 1)
+
+
+def _table(name):
+    """Lightweight Table for a partition with the audit log columns"""
+    return Table(name, MetaData(), *[Column(c.name, c.type) for c in AuditLog.__table__.columns])
+
+
+def _create_partition_indexes(name):
+    """Give a rotated SQLite table the live table's indexes"""
+    for index in AuditLog.__table__.indexes:
+        columns = [column.name for column in index.columns]
+        index_name = f"ix_{name}_{'_'.join(columns)}"
+        db.session.execute(text(
+            f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{name}" ({", ".join(columns)})'
+        ))
+
+
+def _is_partitioned():
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return bool(db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :name"
+    ), {'name': AUDIT_TABLE}).scalar())
+
+
+def list_partitions():
+    """(month, table name) for every monthly partition, newest first.
+
+    ``month`` is None for the live SQLite table and the PostgreSQL default
+    partition, which always sort first.
+    """
+    if _is_partitioned():
+        names = db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name"
+        ), {'name': AUDIT_TABLE}).scalars().all()
+        live = [(None, name) for name in names if _partition_month(name) is None]
+    else:
+        names = [name for name in inspect(db.engine).get_table_names() if name.startswith(f'{AUDIT_TABLE}_')]
+        live = [(None, AUDIT_TABLE)]
+
+    months = sorted(
+        ((_partition_month(name), name) for name in names if _partition_month(name)),
+        reverse=True
+    )
+    return live + months
+
+
+def ensure_partitions(months_ahead=3):
+    """Create upcoming monthly partitions on PostgreSQL; returns names created"""
+    if not _is_partitioned():
+        return []
+
+    existing = {name for _, name in list_partitions()}
+    created = []
+    month = _month_start(datetime.now())
+    for _ in range(months_ahead + 1):
+        name = _partition_name(month)
+        if name not in existing:
+            db.session.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{AUDIT_TABLE}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        month = _add_months(month, 1)
+    db.session.commit()
+    return created
+
+
+def rotate_partitions():
+    """Move rows from past months out of the live SQLite table; returns rows moved"""
+    if db.engine.dialect.name == 'postgresql':
+        return 0
+
+    partitions = list_partitions()
+    # Tables rotated before they were indexed
+    for month, name in partitions:
+        if month is not None:
+            _create_partition_indexes(name)
+
+    current_month = datetime.combine(_month_start(datetime.now()), datetime.min.time())
+    oldest = db.session.query(func.min(AuditLog.created_at)).filter(AuditLog.created_at < current_month).scalar()
+    if oldest is None:
+        db.session.commit()
+        return 0
+
+    existing = {name for _, name in partitions}
+    moved = 0
+    month = _month_start(oldest)
+    while month < current_month.date():
+        start, end = datetime.combine(month, datetime.min.time()), datetime.combine(_add_months(month, 1), datetime.min.time())
+        name = _partition_name(month)
+        if name not in existing:
+            db.session.execute(text(f'CREATE TABLE "{name}" AS SELECT * FROM "{AUDIT_TABLE}" WHERE 0'))
+            _create_partition_indexes(name)
+            existing.add(name)
+        live = AuditLog.__table__
+        result = db.session.execute(insert(_table(name)).from_select(
+            [c.name for c in live.columns],
+            select(live).where(live.c.created_at >= start, live.c.created_at < end)
+        ))
+        db.session.execute(delete(AuditLog).where(AuditLog.created_at >= start, AuditLog.created_at < end))
+        moved += result.rowcount or 0
+        month = _add_months(month, 1)
+
+    db.session.commit()
+    return moved
+
+
+def _serialize_row(row):
+    data = {}
+    for key, value in row._mapping.items():
+        data[key] = value.isoformat() if isinstance(value, (datetime, date)) else value
+    return json.dumps(data, separators=(',', ':'))
+
+
+def archive_table(name, archive_name=None, where=None, storage=None):
+    """Write rows of one partition to file storage as gzipped JSONL.
+
+    Returns the storage key, or None when there was nothing to archive.
+    """
+    if storage is None:
+        from file_storage import get_storage_manager
+        storage = get_storage_manager()
+
+    table = _table(name)
+    query = select(table).order_by(table.c.created_at)
+    if where is not None:
+        query = query.where(*where(table))
+
+    key = f'{ARCHIVE_PREFIX}/{archive_name or name}.jsonl.gz'
+    # Spooled to a temporary file so a large month never sits in memory
+    with tempfile.TemporaryFile() as spool:
+        count = 0
+        with gzip.GzipFile(fileobj=spool, mode='wb') as archive:
+            for row in db.session.execute(query.execution_options(yield_per=1000)):
+                archive.write(_serialize_row(row).encode('utf-8') + b'\n')
+                count += 1
+
+        if not count:
+            return None
+
+        spool.seek(0)
+        storage.provider.upload_fileobj(
+            spool,
+            key=key,
+            content_type='application/gzip',
+            metadata={'table': name, 'rows': str(count)}
+        )
+    logger.info(f"Archived {count} audit log rows from {name} to {key}")
+    return key
+
+
+def apply_retention(retain_months=DEFAULT_RETENTION_MONTHS, storage=None):
+    """Archive and drop audit partitions older than the retention window.
+
+    Returns the list of archive keys written. A partition is only dropped
+    after its archive upload succeeds.
+    """
+    cutoff = _add_months(_month_start(datetime.now()), -retain_months)
+    archived = []
+
+    for month, name in list_partitions():
+        if month is None or month >= cutoff:
+            continue
+        key = archive_table(name, storage=storage)
+        if key:
+            archived.append(key)
+        if _is_partitioned():
+            db.session.execute(text(f'ALTER TABLE "{AUDIT_TABLE}" DETACH PARTITION "{name}"'))
+        db.session.execute(text(f'DROP TABLE "{name}"'))
+        db.session.commit()
+
+    # Old rows in tables that span months: the unpartitioned live table
+    # before rotation has run, or the PostgreSQL default partition
+    if _is_partitioned():
+        spanning = [name for month, name in list_partitions() if month is None]
+    else:
+        spanning = [AUDIT_TABLE]
+    cutoff_at = datetime.combine(cutoff, datetime.min.time())
+    for name in spanning:
+        table = _table(name)
+        oldest = db.session.execute(
+            select(func.min(table.c.created_at)).where(table.c.created_at < cutoff_at)
+        ).scalar()
+        month = _month_start(oldest) if oldest else cutoff
+        while month < cutoff:
+            start = datetime.combine(month, datetime.min.time())
+            end = datetime.combine(_add_months(month, 1), datetime.min.time())
+            archive_name = _partition_name(month) if name == AUDIT_TABLE else f'{name}_{month.year}{month.month:02d}'
+            key = archive_table(
+                name, archive_name=archive_name, storage=storage,
+                where=lambda table: [table.c.created_at >= start, table.c.created_at < end]
+            )
+            if key:
+                archived.append(key)
+            db.session.execute(delete(table).where(table.c.created_at >= start, table.c.created_at < end))
+            db.session.commit()
+            month = _add_months(month, 1)
+
+    return archived
+
+
+def run_maintenance(retain_months=DEFAULT_RETENTION_MONTHS, storage=None):
+    """Create upcoming partitions, rotate SQLite months and apply retention"""
+    return {
+        'partitions_created': ensure_partitions(),
+        'rows_rotated': rotate_partitions(),
+        'archived': apply_retention(retain_months, storage=storage)
+    }
+
+
+def _overlapping_tables(date_from, date_to):
+    """Tables holding rows between the dates: the partitioned parent on
+    PostgreSQL (the planner prunes partitions), else the live table and the
+    overlapping rotated months"""
+    if _is_partitioned():
+        return [AuditLog.__table__]
+    tables = []
+    for month, name in list_partitions():
+        if month is not None:
+            if date_from and _add_months(month, 1) <= _month_start(date_from):
+                continue
+            if date_to and month > date_to.date():
+                continue
+        tables.append(AuditLog.__table__ if name == AUDIT_TABLE else _table(name))
+    return tables
+
+
+def query_audit_logs(resource_types=None, resource_id=None, user_id=None,
+                     date_from=None, date_to=None, limit=100):
+    """Newest-first audit logs across partitions in a single query.
+
+    Each partition contributes at most ``limit`` rows, newest first, and
+    the user's name is joined in. Rows from rotated tables are returned as
+    transient AuditLog instances with ``user`` already set.
+    """
+    branches = []
+    for table in _overlapping_tables(date_from, date_to):
+        query = select(table)
+        if resource_types:
+            query = query.where(table.c.resource_type.in_(resource_types))
+        if resource_id is not None:
+            query = query.where(table.c.resource_id == resource_id)
+        if user_id is not None:
+            query = query.where(table.c.user_id == user_id)
+        if date_from:
+            query = query.where(table.c.created_at >= date_from)
+        if date_to:
+            query = query.where(table.c.created_at <= date_to)
+        # Wrapped so SQLite accepts ORDER BY/LIMIT inside UNION ALL
+        branches.append(select(query.order_by(table.c.created_at.desc()).limit(limit).subquery()))
+
+    combined = (branches[0] if len(branches) == 1 else union_all(*branches)).subquery()
+    users = User.__table__
+    query = select(combined, users.c.first_name, users.c.last_name).outerjoin(
+        users, users.c.id == combined.c.user_id
+    ).order_by(combined.c.created_at.desc()).limit(limit)
+
+    columns = [c.name for c in AuditLog.__table__.columns]
+    results = []
+    for row in db.session.execute(query):
+        log = AuditLog(**{name: row._mapping[name] for name in columns})
+        user = None
+        if row.first_name is not None:
+            user = User(id=row.user_id, first_name=row.first_name, last_name=row.last_name)
+        set_committed_value(log, 'user', user)
+        results.append(log)
+    return results
@@ -0,0 +1,459 @@
+"""
+LexAI Practice Partner - Bulk Import and Export
+CSV/NDJSON import and streaming export for clients, cases and time entries
+
+Imports read the input one record at a time and work in chunks of
+BULK_IMPORT_CHUNK_SIZE rows: each chunk is validated with a handful of
+batch queries (existing clients, cases and case numbers), inserted with a
+single executemany INSERT and committed on its own, with one audit log
+entry per chunk. Invalid rows are reported by line number and skipped; if
+the chunk INSERT still fails it is retried row by row in savepoints so
+one bad row never loses the rest of the chunk.
+
+Exports stream rows from the database with ``yield_per`` and write them
+out as they arrive, so memory use stays flat however large the export.
+"""
+
+import io
+import os
+import csv
+import json
+import uuid
+import logging
+from datetime import datetime, date, timezone
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, select, or_
+from sqlalchemy.exc import IntegrityError
+from models import db, Client, Case, CaseStatus, TimeEntry, TimeEntryStatus, case_attorneys
+from database import audit_log
+from analytics import mark_rollup_buckets
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = int(os.getenv('BULK_IMPORT_CHUNK_SIZE', '500'))
+MAX_REPORTED_ERRORS = 100
+EXPORT_BATCH_SIZE = 1000
+
+
+class RowError(ValueError):
+    """A record that fails validation; reported against its line number"""
+
+
+def detect_format(fmt=None, content_type=None, filename=None):
+    """Pick csv or ndjson from an explicit format, content type or filename"""
+    if fmt:
+        fmt = fmt.lower()
+    elif filename and filename.lower().endswith('.csv'):
+        fmt = 'csv'
+    elif filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        fmt = 'ndjson'
+    elif content_type and 'csv' in content_type:
+        fmt = 'csv'
+    else:
+        fmt = 'ndjson'
+    if fmt not in FORMATS:
+        raise ValueError(f'Unsupported format: {fmt}')
+    return fmt
+
+
+def iter_records(stream, fmt):
+    """Yield (line number, record, error) for each record in a text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty cells mean "not provided", as a missing JSON key would
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ('', None)}, None
+        return
+
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, 'Each line must be a JSON object'
+            continue
+        yield line_no, record, None
+
+
+# ===== VALIDATION =====
+
+def _parse_date(value, field):
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date()
+    except ValueError:
+        raise RowError(f'Invalid {field}: expected YYYY-MM-DD')
+
+
+def _parse_decimal(value, field):
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise RowError(f'Invalid {field}: not a number')
+
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() not in ('false', '0', 'no', 'n')
+    return bool(value)
+
+
+def _require(record, fields):
+    for field in fields:
+        if field not in record or record[field] in ('', None):
+            raise RowError(f'Missing required field: {field}')
+
+
+def _timestamps():
+    now = datetime.now(timezone.utc)
+    return {'id': str(uuid.uuid4()), 'created_at': now, 'updated_at': now}
+
+
+class ClientImporter:
+    """Rows for the clients table, validated like api_create_client"""
+
+    model = Client
+    resource_type = 'client'
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    def prepare(self, records):
+        rows, errors = [], []
+        for line_no, record in records:
+            try:
+                rows.append((line_no, self._row(record)))
+            except RowError as e:
+                errors.append({'line': line_no, 'error': str(e)})
+        return rows, errors
+
+    def _row(self, data):
+        client_type = data.get('client_type', 'individual')
+        if client_type == 'individual':
+            if not data.get('first_name') or not data.get('last_name'):
+                raise RowError('First name and last name are required for individual clients')
+        elif client_type == 'business':
+            if not data.get('company_name'):
+                raise RowError('Company name is required for business clients')
+        else:
+            raise RowError(f'Invalid client_type: {client_type}')
+
+        row = {field: data.get(field) for field in (
+            'first_name', 'last_name', 'company_name', 'email', 'phone', 'address_line1',
+            'address_line2', 'city', 'state', 'zip_code', 'tax_id', 'website', 'industry',
+            'source', 'notes'
+        )}
+        row.update(
+            client_type=client_type,
+            country=data.get('country', 'United States'),
+            status=data.get('status', 'active'),
+            billing_rate=_parse_decimal(data['billing_rate'], 'billing_rate') if data.get('billing_rate') else None,
+            payment_terms=data.get('payment_terms', 'Net 30'),
+            created_by=self.user_id,
+            **_timestamps()
+        )
+        return row
+
+    def mark_rollups(self, rows):
+        mark_rollup_buckets(db.session, user={(row['created_by'], row['created_at'].date()) for row in rows})
+
+
+class CaseImporter(ClientImporter):
+    """Rows for the cases table, validated like api_create_case"""
+
+    model = Case
+    resource_type = 'case'
+
+    def __init__(self, user_id):
+        super().__init__(user_id)
+        self.case_numbers = set()
+        self.next_numbers = {}
+
+    def prepare(self, records):
+        client_ids = {r['client_id'] for _, r in records if r.get('client_id')}
+        clients = {
+            row.id: row for row in db.session.query(
+                Client.id, Client.client_type, Client.first_name, Client.last_name, Client.company_name
+            ).filter(Client.id.in_(client_ids))
+        } if client_ids else {}
+
+        requested = {str(r['case_number']) for _, r in records if r.get('case_number')}
+        taken = set(db.session.execute(
+            select(Case.case_number).where(Case.case_number.in_(requested))
+        ).scalars()) if requested else set()
+
+        rows, errors = [], []
+        for line_no, record in records:
+            try:
+                rows.append((line_no, self._row(record, clients, taken)))
+            except RowError as e:
+                errors.append({'line': line_no, 'error': str(e)})
+        return rows, errors
+
+    def _case_number(self, client):
+        """Next YYYY-INITIALS-NNNN number, counting each prefix once per import"""
+        name = client.company_name if client.client_type == 'business' else f'{client.first_name} {client.last_name}'
+        initials = ''.join(word[0] for word in (name or '').split()[:2]).upper()
+        prefix = f'{datetime.now().year}-{initials}-'
+        if prefix not in self.next_numbers:
+            self.next_numbers[prefix] = Case.query.filter(Case.case_number.like(f'{prefix}%')).count() + 1
+        while True:
+            case_number = f'{prefix}{self.next_numbers[prefix]:04d}'
+            self.next_numbers[prefix] += 1
+            if case_number not in self.case_numbers:
+                return case_number
+
+    def _row(self, data, clients, taken):
+        _require(data, ['title', 'practice_area', 'client_id', 'date_opened'])
+        client = clients.get(data['client_id'])
+        if client is None:
+            raise RowError('Client not found')
+
+        case_number = str(data['case_number']) if data.get('case_number') else self._case_number(client)
+        if case_number in taken or case_number in self.case_numbers:
+            raise RowError('Case number already exists')
+
+        row = {field: data.get(field, '') for field in (
+            'description', 'case_type', 'court_name', 'judge_name', 'court_case_number'
+        )}
+        row.update(
+            case_number=case_number,
+            title=data['title'],
+            practice_area=data['practice_area'],
+            status=CaseStatus.ACTIVE,
+            priority=data.get('priority', 'medium'),
+            date_opened=_parse_date(data['date_opened'], 'date_opened'),
+            date_closed=_parse_date(data['date_closed'], 'date_closed') if data.get('date_closed') else None,
+            statute_of_limitations=_parse_date(data['statute_of_limitations'], 'statute_of_limitations')
+            if data.get('statute_of_limitations') else None,
+            client_id=data['client_id'],
+            primary_attorney_id=data.get('primary_attorney_id') or self.user_id,
+            **_timestamps()
+        )
+        for field in ('estimated_hours', 'hourly_rate', 'flat_fee', 'retainer_amount'):
+            row[field] = _parse_decimal(data[field], field) if data.get(field) else None
+
+        self.case_numbers.add(case_number)
+        return row
+
+    def mark_rollups(self, rows):
+        mark_rollup_buckets(
+            db.session,
+            client={(row['client_id'], row['created_at'].date()) for row in rows},
+            practice={(row['primary_attorney_id'], row['practice_area'], row['created_at'].date()) for row in rows}
+        )
+
+
+class TimeEntryImporter(ClientImporter):
+    """Rows for the time_entries table, validated like api_create_time_entry"""
+
+    model = TimeEntry
+    resource_type = 'time_entry'
+
+    def prepare(self, records):
+        case_ids = {r['case_id'] for _, r in records if r.get('case_id')}
+        known_cases = set(db.session.execute(
+            select(Case.id).where(Case.id.in_(case_ids))
+        ).scalars()) if case_ids else set()
+
+        rows, errors = [], []
+        for line_no, record in records:
+            try:
+                rows.append((line_no, self._row(record, known_cases)))
+            except RowError as e:
+                errors.append({'line': line_no, 'error': str(e)})
+        return rows, errors
+
+    def _row(self, data, known_cases):
+        _require(data, ['description', 'hours', 'hourly_rate'])
+        if data.get('case_id') and data['case_id'] not in known_cases:
+            raise RowError('Case not found')
+
+        hours = _parse_decimal(data['hours'], 'hours')
+        rate = _parse_decimal(data['hourly_rate'], 'hourly_rate')
+        row = _timestamps()
+        row.update(
+            description=data['description'],
+            hours=hours,
+            hourly_rate=rate,
+            amount=hours * rate,
+            billable=_parse_bool(data.get('billable', True)),
+            status=TimeEntryStatus.DRAFT,
+            date=_parse_date(data['date'], 'date') if data.get('date') else datetime.now().date(),
+            user_id=self.user_id,
+            case_id=data.get('case_id') or None,
+            start_time=row['created_at'],
+            end_time=row['created_at']
+        )
+        return row
+
+    def mark_rollups(self, rows):
+        mark_rollup_buckets(
+            db.session,
+            user={(row['user_id'], row['date']) for row in rows},
+            entry_cases={(row['case_id'], row['date']) for row in rows}
+        )
+
+
+IMPORTERS = {
+    'clients': ClientImporter,
+    'cases': CaseImporter,
+    'time_entries': TimeEntryImporter,
+}
+
+
+# ===== IMPORT =====
+
+def _insert_chunk(importer, rows):
+    """Insert prepared rows in one executemany; falls back to row by row.
+
+    Returns (inserted count, per-row errors).
+    """
+    if not rows:
+        return 0, []
+
+    values = [row for _, row in rows]
+    try:
+        db.session.execute(insert(importer.model), values)
+        importer.mark_rollups(values)
+        db.session.commit()
+        return len(values), []
+    except IntegrityError:
+        db.session.rollback()
+
+    inserted, errors = [], []
+    for line_no, row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(importer.model), [row])
+            inserted.append(row)
+        except IntegrityError as e:
+            errors.append({'line': line_no, 'error': f'Database constraint failed: {e.orig}'})
+    importer.mark_rollups(inserted)
+    db.session.commit()
+    return len(inserted), errors
+
+
+def bulk_import(entity, stream, fmt, user_id, chunk_size=None):
+    """Import records from a text stream in committed chunks.
+
+    Returns a summary with the number of rows read and inserted and up to
+    MAX_REPORTED_ERRORS per-row errors. Chunks committed before a failure
+    stay committed.
+    """
+    importer = IMPORTERS[entity](user_id)
+    chunk_size = chunk_size or CHUNK_SIZE
+    summary = {'entity': entity, 'total': 0, 'inserted': 0, 'failed': 0, 'chunks': 0, 'errors': []}
+
+    def flush(records, errors):
+        rows, invalid = importer.prepare(records)
+        count, failed = _insert_chunk(importer, rows)
+        errors = errors + invalid + failed
+
+        summary['chunks'] += 1
+        summary['inserted'] += count
+        summary['failed'] += len(errors)
+        room = MAX_REPORTED_ERRORS - len(summary['errors'])
+        summary['errors'].extend(sorted(errors, key=lambda e: e['line'])[:max(room, 0)])
+
+        if count:
+            audit_log('bulk_import', importer.resource_type, user_id=user_id, new_values={
+                'rows': count,
+                'first_line': records[0][0] if records else None,
+                'last_line': records[-1][0] if records else None
+            })
+
+    records, errors = [], []
+    for line_no, record, error in iter_records(stream, fmt):
+        summary['total'] += 1
+        if error:
+            errors.append({'line': line_no, 'error': error})
+        else:
+            records.append((line_no, record))
+        if len(records) + len(errors) >= chunk_size:
+            flush(records, errors)
+            records, errors = [], []
+    if records or errors:
+        flush(records, errors)
+
+    logger.info(f"Bulk import of {entity}: {summary['inserted']}/{summary['total']} rows in {summary['chunks']} chunk(s)")
+    return summary
+
+
+# ===== EXPORT =====
+
+EXPORT_COLUMNS = {
+    'clients': [
+        'id', 'client_type', 'first_name', 'last_name', 'company_name', 'email', 'phone',
+        'address_line1', 'address_line2', 'city', 'state', 'zip_code', 'country', 'tax_id',
+        'website', 'industry', 'status', 'source', 'notes', 'billing_rate', 'payment_terms', 'created_at'
+    ],
+    'cases': [
+        'id', 'case_number', 'title', 'description', 'practice_area', 'case_type', 'status',
+        'priority', 'court_name', 'judge_name', 'court_case_number', 'date_opened', 'date_closed',
+        'statute_of_limitations', 'estimated_hours', 'hourly_rate', 'flat_fee', 'retainer_amount',
+        'client_id', 'primary_attorney_id', 'created_at'
+    ],
+    'time_entries': [
+        'id', 'description', 'hours', 'hourly_rate', 'amount', 'billable', 'status', 'date',
+        'case_id', 'task_id', 'invoice_id', 'user_id', 'created_at'
+    ],
+}
+
+
+def _export_query(entity, user_id, user_role=None):
+    """Rows the user can see, with the same scoping as the list endpoints"""
+    model = IMPORTERS[entity].model
+    query = select(*[getattr(model, column) for column in EXPORT_COLUMNS[entity]])
+    if entity == 'clients':
+        query = query.where(Client.created_by == user_id)
+    elif entity == 'cases':
+        if user_role not in ('admin', 'partner'):
+            query = query.where(or_(
+                Case.primary_attorney_id == user_id,
+                Case.id.in_(select(case_attorneys.c.case_id).where(case_attorneys.c.user_id == user_id))
+            ))
+    else:
+        query = query.where(TimeEntry.user_id == user_id)
+    return query.order_by(model.created_at, model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def _export_value(value):
+    if hasattr(value, 'value'):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def iter_export(entity, fmt, user_id, user_role=None):
+    """Yield an export as CSV or NDJSON text chunks, one batch of rows at a time"""
+    columns = EXPORT_COLUMNS[entity]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+
+    result = db.session.execute(_export_query(entity, user_id, user_role))
+    for partition in result.partitions():
+        for row in partition:
+            values = [_export_value(value) for value in row]
+            if writer:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(columns, values)), separators=(',', ':')) + '\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
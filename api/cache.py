@@ -0,0 +1,446 @@
+"""
+LexAI Practice Partner - Two-Tier Cache
+In-process LRU (L1) in front of Redis (L2), with tag-based invalidation
+
+Reads check the worker's own LRU first, then Redis; values found in Redis
+are copied into the LRU. Without Redis the cache runs on L1 alone.
+
+Entries can carry tags such as ``client:<id>``. Every tag has a version
+number in Redis and the versions of an entry's tags are part of its key,
+so ``invalidate('client:<id>')`` is a single INCR: every entry computed
+under the old version simply stops being found and ages out on its TTL.
+Nothing is scanned on writes. Workers re-read tag versions at most every
+CACHE_TAG_TTL seconds, which bounds how long another worker can serve a
+stale L1 entry; invalidations in the same worker are seen immediately.
+
+``register_cache_invalidation`` bumps ``<model>:<id>`` (plus the owning
+client and user) for every row committed through the ORM.
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def estimate_size(value: Any, limit: Optional[int] = None, _depth: int = 0) -> int:
+    """Approximate memory footprint of a value in bytes.
+
+    Follows containers a few levels deep, which covers the JSON-like
+    results we cache, and stops counting once ``limit`` is passed.
+    """
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        children = (item for pair in value.items() for item in pair)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        children = iter(value)
+    else:
+        return size
+    for child in children:
+        size += estimate_size(child, None, _depth + 1)
+        if limit is not None and size > limit:
+            break
+    return size
+
+
+class LRUCache:
+    """Size-bounded in-memory LRU cache with per-entry TTL.
+
+    Entries live in an OrderedDict kept in recency order, so get, set and
+    eviction are O(1). Each entry's size is estimated once when it is
+    stored; the least recently used entries are evicted whenever the entry
+    count or byte budget is exceeded, and values larger than the whole
+    budget are not cached at all. Expired entries are dropped when they are
+    next read or reach the eviction end, so no cleanup thread is needed.
+    """
+
+    def __init__(self, default_ttl=300, max_entries=None, max_bytes=None):  # 5 minutes default
+        self.cache = OrderedDict()  # key -> (value, expires_at, size)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries or int(os.environ.get('CACHE_MAX_ENTRIES', 1000))
+        self.max_bytes = max_bytes or int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        self.current_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get value from cache."""
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at is not None and time.time() > expires_at:
+                self._remove(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return default
+
+            self.cache.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set value in cache with TTL."""
+        if ttl is None:
+            ttl = self.default_ttl
+
+        size = estimate_size(key) + estimate_size(value, limit=self.max_bytes)
+        expires_at = time.time() + ttl if ttl > 0 else None
+
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                self.stats['rejected'] += 1
+                logger.warning(f"Not caching {key}: {size} bytes exceeds the {self.max_bytes} byte budget")
+                return
+
+            self.cache[key] = (value, expires_at, size)
+            self.current_bytes += size
+
+            while len(self.cache) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest_key, (_, oldest_expiry, _) = next(iter(self.cache.items()))
+                self._remove(oldest_key)
+                if oldest_expiry is not None and time.time() > oldest_expiry:
+                    self.stats['expirations'] += 1
+                else:
+                    self.stats['evictions'] += 1
+
+    def delete(self, key: str) -> bool:
+        """Delete key from cache."""
+        with self._lock:
+            return self._remove(key)
+
+    def delete_matching(self, pattern: str) -> int:
+        """Delete keys matching a glob pattern."""
+        with self._lock:
+            keys = [key for key in self.cache if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Clear all cache."""
+        with self._lock:
+            self.cache.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str) -> bool:
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return False
+        self.current_bytes -= entry[2]
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                'total_keys': len(self.cache),
+                'max_entries': self.max_entries,
+                'memory_usage_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0,
+                **self.stats
+            }
+
+
+class TieredCache:
+    """L1 LRU in front of Redis, with versioned tags"""
+
+    def __init__(self, redis_client=None, prefix='lexai_cache:', default_ttl=3600):
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.l1 = LRUCache(default_ttl=default_ttl)
+        self.l1_ttl = int(os.environ.get('CACHE_L1_TTL', 30))
+        self.tag_ttl = float(os.environ.get('CACHE_TAG_TTL', 2))
+        self._tag_versions = {}  # tag -> (version, fetched_at)
+        self.max_tracked_tags = 10000
+        self._lock = threading.Lock()
+        self.stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'invalidations': 0, 'redis_errors': 0}
+        self.record_metric = None
+
+    def init_redis(self, redis_client):
+        """Attach the shared Redis client (done by DatabaseManager)"""
+        self.redis_client = redis_client
+
+    def init_metrics(self, record_metric):
+        """Report cache_hit/cache_miss to ``record_metric(name, value)`` (done by production_monitoring)"""
+        self.record_metric = record_metric
+
+    # ----- tag versions -----
+
+    def _tag_key(self, tag):
+        return f"{self.prefix}tag:{tag}"
+
+    def tag_versions(self, tags):
+        """Current version of each tag, refreshed from Redis every tag_ttl seconds"""
+        now = time.monotonic()
+        versions, stale = {}, []
+        with self._lock:
+            for tag in tags:
+                version, fetched_at = self._tag_versions.get(tag, (0, None))
+                versions[tag] = version
+                if self.redis_client and (fetched_at is None or now - fetched_at > self.tag_ttl):
+                    stale.append(tag)
+
+        if stale:
+            try:
+                fetched = self.redis_client.mget([self._tag_key(tag) for tag in stale])
+                with self._lock:
+                    for tag, version in zip(stale, fetched):
+                        versions[tag] = int(version or 0)
+                        self._remember_tag(tag, versions[tag], now)
+            except Exception as e:
+                self._redis_error('reading tag versions', e)
+        return versions
+
+    def invalidate(self, *tags):
+        """Bump tag versions so every entry tagged with them is skipped"""
+        tags = [tag for tag in dict.fromkeys(tags) if tag]
+        if not tags:
+            return
+
+        bumped = {}
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for tag in tags:
+                    pipe.incr(self._tag_key(tag))
+                    pipe.expire(self._tag_key(tag), max(self.default_ttl * 2, 86400))
+                results = pipe.execute()
+                bumped = {tag: int(results[i * 2]) for i, tag in enumerate(tags)}
+            except Exception as e:
+                self._redis_error('invalidating tags', e)
+
+        now = time.monotonic()
+        with self._lock:
+            for tag in tags:
+                version = bumped.get(tag, self._tag_versions.get(tag, (0, None))[0] + 1)
+                self._remember_tag(tag, version, now)
+            self.stats['invalidations'] += len(tags)
+
+    def _remember_tag(self, tag, version, now):
+        # Called with the lock held. Versions are re-read from Redis after a
+        # reset; without Redis they restart at 0, so L1 has to go too
+        if len(self._tag_versions) >= self.max_tracked_tags and tag not in self._tag_versions:
+            self._tag_versions.clear()
+            if not self.redis_client:
+                self.l1.clear()
+        self._tag_versions[tag] = (version, now)
+
+    def _full_key(self, key, tags):
+        if not tags:
+            return key
+        versions = self.tag_versions(sorted(tags))
+        return f"{key}|" + ','.join(f"{tag}={version}" for tag, version in versions.items())
+
+    # ----- get / set -----
+
+    def get(self, key, default=None, tags=()):
+        """Cached value for ``key`` under the current versions of ``tags``"""
+        full_key = self._full_key(key, tags)
+
+        entry = self.l1.get(full_key, _MISSING)
+        if entry is not _MISSING:
+            self._count('l1_hits', 'cache_hit')
+            return entry
+
+        if self.redis_client:
+            try:
+                raw = self.redis_client.get(f"{self.prefix}{full_key}")
+            except Exception as e:
+                self._redis_error('reading', e)
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.l1.set(full_key, value, self.l1_ttl)
+                self._count('l2_hits', 'cache_hit')
+                return value
+
+        self._count('misses', 'cache_miss')
+        return default
+
+    def set(self, key, value, ttl=None, tags=()):
+        """Cache a JSON-serializable value in both tiers"""
+        ttl = ttl or self.default_ttl
+        full_key = self._full_key(key, tags)
+
+        self.l1.set(full_key, value, min(ttl, self.l1_ttl) if self.redis_client else ttl)
+        if self.redis_client:
+            try:
+                self.redis_client.setex(f"{self.prefix}{full_key}", ttl, json.dumps(value, default=str))
+                return True
+            except Exception as e:
+                self._redis_error('writing', e)
+                return False
+        return True
+
+    def delete(self, key, tags=()):
+        """Delete one entry from both tiers"""
+        full_key = self._full_key(key, tags)
+        self.l1.delete(full_key)
+        if self.redis_client:
+            try:
+                self.redis_client.delete(f"{self.prefix}{full_key}")
+            except Exception as e:
+                self._redis_error('deleting', e)
+                return False
+        return True
+
+    def clear_pattern(self, pattern, batch_size=500):
+        """Delete entries matching a glob pattern, scanning Redis incrementally.
+
+        Uses SCAN rather than KEYS so Redis is never blocked; prefer tags
+        for anything on a request path.
+        """
+        deleted = self.l1.delete_matching(pattern)
+        if not self.redis_client:
+            return deleted
+
+        deleted = 0
+        try:
+            batch = []
+            for redis_key in self.redis_client.scan_iter(match=f"{self.prefix}{pattern}", count=batch_size):
+                batch.append(redis_key)
+                if len(batch) >= batch_size:
+                    deleted += self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.unlink(*batch)
+        except Exception as e:
+            self._redis_error('clearing pattern', e)
+        return deleted
+
+    def clear(self):
+        """Clear this worker's L1; Redis entries are left to their TTLs"""
+        self.l1.clear()
+        with self._lock:
+            self._tag_versions.clear()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['redis'] = bool(self.redis_client)
+        stats['l1'] = self.l1.get_stats()
+        return stats
+
+    def _count(self, key, metric=None):
+        with self._lock:
+            self.stats[key] += 1
+        if metric and self.record_metric:
+            self.record_metric(metric, 1)
+
+    def _redis_error(self, action, error):
+        self._count('redis_errors')
+        logger.warning(f"Cache Redis error {action}: {error}")
+
+
+# Shared cache; DatabaseManager attaches Redis when REDIS_URL is set
+cache = TieredCache()
+
+
+def _default_cache_key(func, args, kwargs):
+    # Stable across processes, unlike hash(), so workers share entries
+    payload = json.dumps([args, sorted(kwargs.items())], default=str, sort_keys=True)
+    return f"{func.__module__}.{func.__qualname__}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+
+def cache_result(ttl=300, key_generator=None, tags=None):
+    """Decorator to cache function results in the shared two-tier cache.
+
+    ``tags`` is a list of tags or a callable taking the function's
+    arguments and returning one; results must be JSON-serializable.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if key_generator:
+                cache_key = key_generator(*args, **kwargs)
+            else:
+                cache_key = _default_cache_key(func, args, kwargs)
+            entry_tags = tags(*args, **kwargs) if callable(tags) else (tags or ())
+
+            cached_result = cache.get(cache_key, _MISSING, tags=entry_tags)
+            if cached_result is not _MISSING:
+                return cached_result
+
+            result = func(*args, **kwargs)
+            cache.set(cache_key, result, ttl, tags=entry_tags)
+            return result
+
+        return wrapper
+    return decorator
+
+
+# ===== ORM INVALIDATION =====
+
+# Columns whose values name the owner of a row
+OWNER_TAGS = {
+    'client_id': 'client',
+    'case_id': 'case',
+    'user_id': 'user',
+    'created_by': 'user',
+    'primary_attorney_id': 'user',
+}
+
+
+def tags_for(obj):
+    """Tags a changed ORM object invalidates: itself plus its owners"""
+    tags = set()
+    name = type(obj).__name__.lower()
+    if getattr(obj, 'id', None) is not None:
+        tags.add(f"{name}:{obj.id}")
+    for column, tag in OWNER_TAGS.items():
+        value = getattr(obj, column, None)
+        if isinstance(value, (str, int)):
+            tags.add(f"{tag}:{value}")
+    return tags
+
+
+def invalidate_on_commit(session, *tags):
+    """Queue tags to invalidate once ``session`` commits; dropped on rollback"""
+    session.info.setdefault('cache_tags', set()).update(tags)
+
+
+def _collect_tags(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        invalidate_on_commit(session, *tags_for(obj))
+
+
+def _invalidate_committed(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        cache.invalidate(*tags)
+
+
+def _discard_tags(session):
+    session.info.pop('cache_tags', None)
+
+
+def register_cache_invalidation():
+    """Invalidate cache tags for every row committed through the ORM"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    if not event.contains(Session, 'after_flush', _collect_tags):
+        event.listen(Session, 'after_flush', _collect_tags)
+        event.listen(Session, 'after_commit', _invalidate_committed)
+        event.listen(Session, 'after_rollback', _discard_tags)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+LexAI Practice Partner - API Maintenance Commands
+Run from the api/ directory (manage.py does this for you) so the api
+models are imported rather than the legacy root-level ones. Database
+modules are imported inside the commands that use them, so the deploy
+build can run build-assets and precompile-templates without them.
+"""
+
+import sys
+import click
+from datetime import date, timedelta
+from flask import Flask
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def create_app():
+    """Create a Flask app bound to the API database"""
+    from database import DatabaseManager
+
+    app = Flask(__name__)
+    DatabaseManager(app)
+    return app
+
+
+@click.group()
+def cli():
+    """🏛️ LexAI API Maintenance CLI"""
+    pass
+
+
+@cli.command('setup-db')
+@click.option('--seed/--no-seed', default=True, help='Create the admin user and default tags')
+def setup_db(seed):
+    """Create the API schema and initial data"""
+    click.echo("📋 Creating API database schema...")
+    from models import db
+    from database import DatabaseManager
+
+    try:
+        app = Flask(__name__)
+        manager = DatabaseManager(app)
+        with app.app_context():
+            db.create_all()
+            click.echo("✅ Tables created")
+            if seed:
+                manager.create_initial_data()
+                click.echo("✅ Initial data created")
+    except Exception as e:
+        click.echo(f"❌ Database setup failed: {e}")
+        sys.exit(1)
+
+
+@cli.command('backfill-analytics')
+@click.option('--days', type=int, default=None, help='Only rebuild the last N days (default: everything)')
+def backfill_analytics(days):
+    """Rebuild the analytics rollup tables from raw data"""
+    from analytics import backfill_rollups
+
+    since = date.today() - timedelta(days=days) if days else None
+    click.echo(f"📊 Rebuilding analytics rollups{f' since {since}' if since else ''}...")
+
+    try:
+        with create_app().app_context():
+            counts = backfill_rollups(since=since)
+        for table, count in counts.items():
+            click.echo(f"   - {table}: {count} rows")
+        click.echo("✅ Analytics rollups rebuilt")
+    except Exception as e:
+        click.echo(f"❌ Analytics backfill failed: {e}")
+        sys.exit(1)
+
+
+@cli.command('audit-maintenance')
+@click.option('--retain-months', type=int, default=None, help='Months of audit logs to keep in the database')
+def audit_maintenance(retain_months):
+    """Create audit partitions, rotate old months and archive expired ones"""
+    from audit_archive import run_maintenance, DEFAULT_RETENTION_MONTHS
+
+    retain_months = retain_months or DEFAULT_RETENTION_MONTHS
+    click.echo(f"🗄️ Running audit log maintenance (keeping {retain_months} months)...")
+
+    try:
+        with create_app().app_context():
+            result = run_maintenance(retain_months)
+        click.echo(f"   - Partitions created: {len(result['partitions_created'])}")
+        click.echo(f"   - Rows rotated: {result['rows_rotated']}")
+        for key in result['archived']:
+            click.echo(f"   - Archived: {key}")
+        click.echo("✅ Audit log maintenance complete")
+    except Exception as e:
+        click.echo(f"❌ Audit log maintenance failed: {e}")
+        sys.exit(1)
+
+
+
+@cli.command('bulk-import')
+@click.argument('entity', type=click.Choice(['clients', 'cases', 'time_entries']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-email', required=True, help='User the records are created for')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None, help='Input format (default: from the file extension)')
+@click.option('--chunk-size', type=int, default=None, help='Rows per committed chunk')
+def bulk_import(entity, path, user_email, fmt, chunk_size):
+    """Import clients, cases or time entries from a CSV or NDJSON file"""
+    from models import User
+    from analytics import register_rollup_listeners
+    from cache import register_cache_invalidation
+    import bulk_io
+
+    try:
+        fmt = bulk_io.detect_format(fmt, filename=path)
+        with create_app().app_context():
+            register_rollup_listeners()
+            register_cache_invalidation()
+            user = User.query.filter_by(email=user_email).first()
+            if not user:
+                click.echo(f"❌ No user with email {user_email}")
+                sys.exit(1)
+
+            click.echo(f"📥 Importing {entity} from {path} ({fmt})...")
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                summary = bulk_io.bulk_import(entity, stream, fmt, user.id, chunk_size=chunk_size)
+
+        click.echo(f"   - Rows read: {summary['total']}")
+        click.echo(f"   - Inserted: {summary['inserted']} in {summary['chunks']} chunk(s)")
+        click.echo(f"   - Failed: {summary['failed']}")
+        for error in summary['errors']:
+            click.echo(f"     line {error['line']}: {error['error']}")
+        click.echo("✅ Bulk import complete")
+    except Exception as e:
+        click.echo(f"❌ Bulk import failed: {e}")
+        sys.exit(1)
+
+
+@cli.command('bulk-export')
+@click.argument('entity', type=click.Choice(['clients', 'cases', 'time_entries']))
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--user-email', required=True, help='User whose records are exported')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None, help='Output format (default: from the file extension)')
+def bulk_export(entity, path, user_email, fmt):
+    """Export clients, cases or time entries to a CSV or NDJSON file"""
+    from models import User
+    import bulk_io
+
+    try:
+        fmt = bulk_io.detect_format(fmt, filename=path)
+        with create_app().app_context():
+            user = User.query.filter_by(email=user_email).first()
+            if not user:
+                click.echo(f"❌ No user with email {user_email}")
+                sys.exit(1)
+
+            click.echo(f"📤 Exporting {entity} to {path} ({fmt})...")
+            with open(path, 'w', encoding='utf-8', newline='') as output:
+                for chunk in bulk_io.iter_export(entity, fmt, user.id, user.role.value):
+                    output.write(chunk)
+        click.echo("✅ Bulk export complete")
+    except Exception as e:
+        click.echo(f"❌ Bulk export failed: {e}")
+        sys.exit(1)
+
+
+@cli.command('build-assets')
+def build_assets():
+    """Write the static asset manifest and precompressed CSS/JS"""
+    from assets import build_assets as build, brotli
+
+    try:
+        manifest = build()
+        click.echo(f"   - Files hashed: {len(manifest['files'])}")
+        click.echo(f"   - Files precompressed: {len(manifest['compressed'])}")
+        if brotli is None:
+            click.echo("   - brotli not installed, wrote .gz variants only")
+        click.echo("✅ Static assets built")
+    except Exception as e:
+        click.echo(f"❌ Asset build failed: {e}")
+        sys.exit(1)
+
+@cli.command('precompile-templates')
+@click.option('--output', default=None, help='Bytecode directory (default: .template_cache/ at the repository root)')
+def precompile_templates(output):
+    """Compile every Jinja template to bytecode ahead of deploy"""
+    from templating import precompile_templates as precompile, BUNDLED_CACHE_DIR
+
+    output = output or BUNDLED_CACHE_DIR
+    click.echo(f"🧩 Precompiling templates into {output}...")
+    try:
+        app = Flask(__name__, template_folder='../templates')
+        compiled, failed = precompile(app.jinja_env, output)
+        click.echo(f"   - Compiled: {len(compiled)}")
+        for name, error in failed:
+            click.echo(f"   - Failed: {name}: {error}")
+        click.echo("✅ Templates precompiled")
+    except Exception as e:
+        click.echo(f"❌ Template precompile failed: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,114 @@
+"""
+LexAI Practice Partner - Conditional GET Responses
+Strong ETags and per-route Cache-Control for JSON endpoints
+
+Routes opt in with ``@conditional_response(version, max_age)``. ``version``
+is a cheap callable, usually ``table_version`` over the rows the route
+reads, so an unchanged list costs one aggregate query instead of the full
+query and serialization. The ETag hashes that version together with the
+full request path and the session's user and role; a matching
+``If-None-Match`` gets an empty 304. Views that audit reads pass
+``on_not_modified`` so a 304 still records the access.
+
+Many-to-many link rows have no ``updated_at`` of their own; register the
+relationship with ``touch_on_change`` so editing it bumps the owning row.
+
+Responses are ``private`` (they depend on the session cookie) and carry
+``Vary: Cookie``. With ``max_age=0`` the browser revalidates on every use.
+"""
+
+import hashlib
+import logging
+from functools import wraps
+from datetime import datetime, timezone
+from flask import request, session, make_response
+from sqlalchemy import func, event
+
+logger = logging.getLogger(__name__)
+
+
+def table_version(*queries):
+    """Row count and newest ``updated_at`` for each query's model"""
+    version = []
+    for query in queries:
+        model = query.column_descriptions[0]['entity']
+        count, newest = query.with_entities(
+            func.count(model.id), func.max(model.updated_at)
+        ).order_by(None).one()
+        version.append((count, newest.isoformat() if newest else None))
+    return version
+
+
+def _touch(target, value, initiator):
+    target.updated_at = datetime.now(timezone.utc)
+
+
+def touch_on_change(*relationships):
+    """Bump the parent's ``updated_at`` when a collection gains or loses members"""
+    for relationship in relationships:
+        if not event.contains(relationship, 'append', _touch):
+            event.listen(relationship, 'append', _touch)
+            event.listen(relationship, 'remove', _touch)
+
+
+def compute_etag(version):
+    key = repr((request.full_path, session.get('user_id'), session.get('user_role'), version))
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+
+def etag_matches(etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Proxies and compression middleware may weaken the tag on the way back
+    candidates = [tag.strip() for tag in header.split(',')]
+    return any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+def _cache_control(max_age):
+    if max_age:
+        return f'private, max-age={max_age}'
+    return 'private, max-age=0, must-revalidate'
+
+
+def conditional_response(version, max_age=0, on_not_modified=None):
+    """Serve GET requests with an ETag and answer If-None-Match with 304.
+
+    ``version`` is called with the view's arguments and returns any
+    repr-able value that changes whenever the response would. Returning
+    None, or raising, skips the ETag and runs the view as usual.
+    ``on_not_modified`` is called with the same arguments before a 304 is
+    sent, for side effects the skipped view would have had.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            try:
+                current = version(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"ETag version failed for {request.path}: {e}")
+                current = None
+            if current is None:
+                return view(*args, **kwargs)
+
+            etag = compute_etag(current)
+            if etag_matches(etag):
+                if on_not_modified:
+                    on_not_modified(*args, **kwargs)
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = _cache_control(max_age)
+            response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
@@ -4,11 +4,18 @@ Production-ready database setup with Neon PostgreSQL and Redis
 """
 
 import os
+import time
+import uuid
+import queue
+import atexit
+import threading
 import redis
-from flask import current_app
-from sqlalchemy import create_engine, text
+from flask import current_app, has_app_context
+from sqlalchemy import create_engine, text, insert
 from sqlalchemy.pool import NullPool
 from models import db, User, Client, Case, Task, Document, TimeEntry, Invoice, Expense, CalendarEvent, Tag, AuditLog, Session
+from db_routing import replica_router
+from cache import cache
 from werkzeug.security import generate_password_hash
 import logging
 from datetime import datetime, timedelta, timezone
@@ -18,36 +25,70 @@ import json
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def is_serverless():
+    """True on Vercel/Lambda, or when DB_SERVERLESS=1 forces serverless mode"""
+    if os.getenv('DB_SERVERLESS') is not None:
+        return os.getenv('DB_SERVERLESS') == '1'
+    return bool(os.getenv('VERCEL') or os.getenv('AWS_LAMBDA_FUNCTION_NAME'))
+
+def uses_external_pooler(database_url):
+    """Neon pooled endpoints and PgBouncer already pool server connections"""
+    return (
+        '-pooler.' in database_url
+        or os.getenv('DB_POOLER', '').lower() in ('pgbouncer', 'neon')
+        or ':6432/' in database_url
+    )
+
 class DatabaseManager:
     """Database management utilities"""
     
     def __init__(self, app=None):
         self.app = app
         self.redis_client = None
+        self.serverless = False
+        self.pool_mode = 'queue'
         if app:
             self.init_app(app)
     
     def init_app(self, app):
-        """Initialize database with Flask app"""
+        """Initialize database with Flask app.
+
+        In serverless mode nothing touches the database here: the engine
+        opens its first connection on first use, and schema creation and
+        seeding are left to ``python manage.py setup-api-db``. Long-running
+        servers still verify the connection at startup, and DB_AUTO_CREATE=1
+        restores create-on-boot for local development.
+        """
+        start = time.perf_counter()
         self.app = app
+        self.serverless = is_serverless()
         self.setup_database_config()
         self.setup_redis()
         
         # Initialize SQLAlchemy with error handling
         try:
             db.init_app(app)
+            audit_writer.init_app(app)
+            replica_router.init_app(app)
             
-            # Test database connection
-            with app.app_context():
-                # Try to create a simple engine to test connectivity
-                with db.engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                self.create_tables()
-                logger.info("Database connection verified successfully")
+            if not self.serverless:
+                # Test database connection
+                with app.app_context():
+                    with db.engine.connect() as conn:
+                        conn.execute(text("SELECT 1"))
+                    if os.getenv('DB_AUTO_CREATE') == '1':
+                        self.create_tables()
+                    logger.info("Database connection verified successfully")
                 
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise Exception(f"Failed to connect to database: {e}")
+        
+        self.init_time_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Database initialized in {self.init_time_ms:.1f}ms "
+            f"(serverless={self.serverless}, pool={self.pool_mode})"
+        )
     
     def setup_database_config(self):
         """Configure database connection"""
@@ -61,22 +102,60 @@ class DatabaseManager:
         else:
             # Ensure proper SSL configuration for Neon
             if 'sslmode' not in database_url:
-                database_url += '?sslmode=require'
+                database_url += ('&' if '?' in database_url else '?') + 'sslmode=require'
             logger.info("Using PostgreSQL database")
         
         # Configure SQLAlchemy
         self.app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-        self.app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-            'pool_pre_ping': True,
-            'pool_recycle': 300,
+        self.app.config['SQLALCHEMY_ENGINE_OPTIONS'] = self.engine_options(database_url)
+        
+        # Disable modification tracking for performance
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    
+    def engine_options(self, database_url):
+        """Engine/pool settings for the deployment mode.
+
+        DB_POOL_MODE overrides the choice:
+        - ``queue``: regular QueuePool for long-running servers
+        - ``null``: no client-side pool; every checkout is a new connection
+          to the external pooler (Neon pooled endpoint / PgBouncer)
+        - ``small``: one warm connection per serverless instance, for
+          direct (unpooled) endpoints
+        """
+        if database_url.startswith('sqlite'):
+            self.pool_mode = 'sqlite'
+            return {}
+        
+        default_mode = 'queue'
+        if self.serverless:
+            default_mode = 'null' if uses_external_pooler(database_url) else 'small'
+        self.pool_mode = os.getenv('DB_POOL_MODE', default_mode)
+        
+        options = {
             'connect_args': {
                 'connect_timeout': 10,
                 'application_name': 'lexai_practice_partner'
             }
         }
         
-        # Disable modification tracking for performance
-        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        if self.pool_mode == 'null':
+            # Pre-ping would cost an extra round trip on every fresh connection
+            options['poolclass'] = NullPool
+        elif self.pool_mode == 'small':
+            options.update({
+                'pool_size': 1,
+                'max_overflow': 2,
+                'pool_timeout': 10,
+                'pool_recycle': 60,  # Neon/Vercel idle connections are culled quickly
+                'pool_pre_ping': True
+            })
+        else:
+            options.update({
+                'pool_pre_ping': True,
+                'pool_recycle': 300
+            })
+        
+        return options
     
     def setup_redis(self):
         """Configure Redis connection"""
@@ -87,6 +166,7 @@ class DatabaseManager:
                 self.redis_client = redis.from_url(redis_url, decode_responses=True)
                 # Test connection
                 self.redis_client.ping()
+                cache.init_redis(self.redis_client)
                 logger.info("Redis connected successfully")
             else:
                 logger.warning("No Redis URL found, session persistence disabled")
@@ -182,20 +262,45 @@ class DatabaseManager:
         }
 
 class RedisSessionManager:
-    """Redis-based session management"""
+    """Redis-based session management
+
+    Each user has an index of their session ids, a sorted set scored by
+    expiry time, so listing or ending a user's sessions touches only that
+    user's keys. Session keys expire on their own TTL; maintenance only
+    prunes index entries that outlived them, walking the indexes with SCAN
+    and pipelined ZREMRANGEBYSCORE rather than KEYS and a TTL per key.
+    """
     
     def __init__(self, redis_client, prefix='lexai_session:'):
         self.redis_client = redis_client
         self.prefix = prefix
         self.default_ttl = 86400  # 24 hours
     
+    def _session_key(self, session_id):
+        return f"{self.prefix}{session_id}"
+    
+    def _index_key(self, user_id):
+        return f"{self.prefix}user:{user_id}"
+    
+    def _write(self, session_id, session_data, ttl):
+        """Store the session and refresh its entry in the user's index"""
+        ttl = ttl or self.default_ttl
+        now = time.time()
+        index_key = self._index_key(session_data['user_id'])
+        pipe = self.redis_client.pipeline()
+        pipe.setex(self._session_key(session_id), ttl, json.dumps(session_data))
+        # Indexes carry no TTL of their own: expired entries are pruned here
+        # and by cleanup_expired_sessions, and Redis drops a set once empty
+        pipe.zremrangebyscore(index_key, '-inf', now)
+        pipe.zadd(index_key, {session_id: now + ttl})
+        pipe.execute()
+    
     def create_session(self, user_id, session_data, ttl=None):
         """Create a new session"""
         if not self.redis_client:
             return None
         
-        session_id = f"sess_{user_id}_{datetime.now().timestamp()}"
-        session_key = f"{self.prefix}{session_id}"
+        session_id = f"sess_{uuid.uuid4().hex}"
         
         session_data.update({
             'user_id': user_id,
@@ -204,11 +309,7 @@ class RedisSessionManager:
         })
         
         try:
-            self.redis_client.setex(
-                session_key,
-                ttl or self.default_ttl,
-                json.dumps(session_data)
-            )
+            self._write(session_id, session_data, ttl)
             return session_id
         except Exception as e:
             logger.error(f"Error creating session: {e}")
@@ -219,10 +320,8 @@ class RedisSessionManager:
         if not self.redis_client or not session_id:
             return None
         
-        session_key = f"{self.prefix}{session_id}"
-        
         try:
-            session_data = self.redis_client.get(session_key)
+            session_data = self.redis_client.get(self._session_key(session_id))
             if session_data:
                 return json.loads(session_data)
         except Exception as e:
@@ -232,18 +331,13 @@ class RedisSessionManager:
     
     def update_session(self, session_id, session_data, ttl=None):
         """Update session data"""
-        if not self.redis_client or not session_id:
+        if not self.redis_client or not session_id or 'user_id' not in session_data:
             return False
         
-        session_key = f"{self.prefix}{session_id}"
         session_data['last_activity'] = datetime.now(timezone.utc).isoformat()
         
         try:
-            self.redis_client.setex(
-                session_key,
-                ttl or self.default_ttl,
-                json.dumps(session_data)
-            )
+            self._write(session_id, session_data, ttl)
             return True
         except Exception as e:
             logger.error(f"Error updating session: {e}")
@@ -254,131 +348,303 @@ class RedisSessionManager:
         if not self.redis_client or not session_id:
             return False
         
-        session_key = f"{self.prefix}{session_id}"
-        
         try:
-            self.redis_client.delete(session_key)
+            session_data = self.get_session(session_id)
+            pipe = self.redis_client.pipeline()
+            pipe.delete(self._session_key(session_id))
+            if session_data and 'user_id' in session_data:
+                pipe.zrem(self._index_key(session_data['user_id']), session_id)
+            pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Error deleting session: {e}")
             return False
     
-    def cleanup_expired_sessions(self):
-        """Clean up expired sessions (called by background task)"""
+    def get_user_sessions(self, user_id):
+        """Live sessions of one user, keyed by session id"""
         if not self.redis_client:
-            return 0
+            return {}
         
         try:
-            pattern = f"{self.prefix}*"
-            keys = self.redis_client.keys(pattern)
-            
-            expired_count = 0
-            for key in keys:
-                ttl = self.redis_client.ttl(key)
-                if ttl == -2:  # Key doesn't exist
-                    expired_count += 1
-            
-            return expired_count
+            session_ids = self.redis_client.zrangebyscore(self._index_key(user_id), time.time(), '+inf')
+            if not session_ids:
+                return {}
+            values = self.redis_client.mget([self._session_key(sid) for sid in session_ids])
+            return {sid: json.loads(value) for sid, value in zip(session_ids, values) if value}
         except Exception as e:
-            logger.error(f"Error cleaning up sessions: {e}")
-            return 0
-
-class CacheManager:
-    """Redis-based caching utilities"""
-    
-    def __init__(self, redis_client, prefix='lexai_cache:'):
-        self.redis_client = redis_client
-        self.prefix = prefix
-        self.default_ttl = 3600  # 1 hour
+            logger.error(f"Error listing sessions for user {user_id}: {e}")
+            return {}
     
-    def get(self, key):
-        """Get cached value"""
+    def delete_user_sessions(self, user_id, except_session_id=None):
+        """End every session of a user (log out all devices); returns how many were ended"""
         if not self.redis_client:
-            return None
-        
-        cache_key = f"{self.prefix}{key}"
+            return 0
         
+        index_key = self._index_key(user_id)
         try:
-            cached_data = self.redis_client.get(cache_key)
-            if cached_data:
-                return json.loads(cached_data)
+            session_ids = [sid for sid in self.redis_client.zrange(index_key, 0, -1) if sid != except_session_id]
+            if not session_ids:
+                return 0
+            pipe = self.redis_client.pipeline()
+            pipe.delete(*[self._session_key(sid) for sid in session_ids])
+            pipe.zrem(index_key, *session_ids)
+            return pipe.execute()[0]
         except Exception as e:
-            logger.error(f"Error getting cached value: {e}")
-        
-        return None
+            logger.error(f"Error deleting sessions for user {user_id}: {e}")
+            return 0
     
-    def set(self, key, value, ttl=None):
-        """Set cached value"""
+    def cleanup_expired_sessions(self, batch_size=500):
+        """Prune expired entries from the user indexes (called by background task)"""
         if not self.redis_client:
-            return False
-        
-        cache_key = f"{self.prefix}{key}"
+            return 0
         
         try:
-            self.redis_client.setex(
-                cache_key,
-                ttl or self.default_ttl,
-                json.dumps(value)
-            )
-            return True
+            now = time.time()
+            expired_count = 0
+            batch = []
+            for index_key in self.redis_client.scan_iter(match=f"{self.prefix}user:*", count=batch_size):
+                batch.append(index_key)
+                if len(batch) >= batch_size:
+                    expired_count += self._prune_indexes(batch, now)
+                    batch = []
+            if batch:
+                expired_count += self._prune_indexes(batch, now)
+            
+            return expired_count
         except Exception as e:
-            logger.error(f"Error setting cached value: {e}")
-            return False
+            logger.error(f"Error cleaning up sessions: {e}")
+            return 0
     
-    def delete(self, key):
-        """Delete cached value"""
-        if not self.redis_client:
-            return False
-        
-        cache_key = f"{self.prefix}{key}"
-        
+    def _prune_indexes(self, index_keys, now):
+        pipe = self.redis_client.pipeline(transaction=False)
+        for index_key in index_keys:
+            pipe.zremrangebyscore(index_key, '-inf', now)
+        return sum(pipe.execute())
+
+class AuditLogWriter:
+    """Buffered audit log pipeline.
+
+    Entries are queued and written with bulk inserts on their own
+    connection, so queued writes never commit (or roll back) the caller's
+    session. Modes, from AUDIT_LOG_MODE:
+
+    - ``async``: a background thread flushes every ``flush_interval``
+      seconds or as soon as ``batch_size`` entries are waiting
+    - ``request``: the queue is flushed at app context teardown, for
+      serverless hosts that freeze threads between invocations
+    - ``sync``: every entry is written immediately (tests, debugging)
+
+    Security-critical entries are always written synchronously, through
+    the caller's session, which they commit. When the
+    queue is full the caller flushes a batch itself (back-pressure) before
+    enqueueing; entries are only dropped if that flush fails.
+    """
+
+    # Entries that must be on disk before the request returns
+    DURABLE_ACTIONS = {'login', 'logout', 'delete'}
+    DURABLE_RESOURCES = {'user', 'session', 'password_reset', '2fa_setup', '2fa_enabled', '2fa_disabled'}
+
+    def __init__(self, max_queue_size=10000, batch_size=200, flush_interval=1.0, enqueue_timeout=0.05):
+        self.app = None
+        self.mode = 'sync'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self._flush_lock = threading.Lock()
+        self._flushing = threading.local()
+        self._stats_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'durable_writes': 0,
+            'dropped': 0,
+            'failed_flushes': 0,
+            'backpressure_flushes': 0,
+            'flushes': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+            'max_queue_depth': 0
+        }
+
+    def init_app(self, app):
+        """Bind to the Flask app and start flushing in the configured mode"""
+        self.app = app
+        default_mode = 'sync' if app.config.get('TESTING') else ('request' if os.getenv('VERCEL') else 'async')
+        self.mode = os.getenv('AUDIT_LOG_MODE', default_mode)
+
+        if self.mode == 'request':
+            app.teardown_appcontext(self._flush_on_teardown)
+        elif self.mode == 'async' and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def is_durable(self, entry):
+        return (not entry.get('success', True)
+                or entry['action'] in self.DURABLE_ACTIONS
+                or entry['resource_type'] in self.DURABLE_RESOURCES)
+
+    def write(self, entry, durable=None):
+        """Record an audit entry (a dict of AuditLog column values)"""
+        entry.setdefault('id', str(uuid.uuid4()))
+        entry.setdefault('created_at', datetime.now(timezone.utc))
+
+        if durable is None:
+            durable = self.is_durable(entry)
+        if durable or self.mode == 'sync' or self.app is None:
+            self._insert_in_session([entry])
+            self._count('durable_writes' if durable else 'written')
+            return
+
         try:
-            self.redis_client.delete(cache_key)
-            return True
-        except Exception as e:
-            logger.error(f"Error deleting cached value: {e}")
-            return False
-    
-    def clear_pattern(self, pattern):
-        """Clear all keys matching pattern"""
-        if not self.redis_client:
-            return 0
-        
-        cache_pattern = f"{self.prefix}{pattern}"
-        
+            self.queue.put(entry, timeout=self.enqueue_timeout)
+        except queue.Full:
+            # Back-pressure: the producer pays for draining a batch
+            self._count('backpressure_flushes')
+            self.flush(max_items=self.batch_size)
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                self._count('dropped')
+                logger.error(f"Audit log queue full, dropped {entry['action']} {entry['resource_type']}")
+                return
+
+        self._count('enqueued')
+        depth = self.queue.qsize()
+        with self._stats_lock:
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], depth)
+        if depth >= self.batch_size:
+            self._wakeup.set()
+
+    def _flush_on_teardown(self, exc):
+        # A flush that pushes its own app context triggers this hook again
+        # when that context pops; the lock is not reentrant
+        if not getattr(self._flushing, 'active', False):
+            self.flush()
+
+    def flush(self, max_items=None):
+        """Write queued entries in bulk; returns the number written"""
+        written = 0
+        with self._flush_lock:
+            self._flushing.active = True
+            try:
+                written = self._flush_batches(max_items)
+            finally:
+                self._flushing.active = False
+        return written
+
+    def _flush_batches(self, max_items):
+        # Called with the flush lock held
+        written = 0
+        while max_items is None or written < max_items:
+            limit = self.batch_size if max_items is None else min(self.batch_size, max_items - written)
+            batch = self._drain(limit)
+            if not batch:
+                break
+
+            start = time.perf_counter()
+            try:
+                if self.app is not None and not has_app_context():
+                    with self.app.app_context():
+                        self._insert(batch)
+                else:
+                    self._insert(batch)
+            except Exception as e:
+                logger.error(f"Audit log flush failed, dropped {len(batch)} entries: {e}")
+                self._count('failed_flushes')
+                self._count('dropped', len(batch))
+                continue
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            written += len(batch)
+            with self._stats_lock:
+                self.stats['written'] += len(batch)
+                self.stats['flushes'] += 1
+                self.stats['last_flush_ms'] = elapsed_ms
+                self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], elapsed_ms)
+                self.stats['total_flush_ms'] += elapsed_ms
+        return written
+
+    def get_stats(self):
+        """Queue depth and flush latency metrics"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['mode'] = self.mode
+        stats['queue_depth'] = self.queue.qsize()
+        stats['queue_capacity'] = self.queue.maxsize
+        stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Audit log writer error: {e}")
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, entries):
+        # Queued batches use their own connection, outside any request's transaction
+        with db.engine.begin() as conn:
+            conn.execute(insert(AuditLog), entries)
+
+    def _insert_in_session(self, entries):
+        # Immediate entries share the caller's connection (a second writer
+        # would hit SQLite's lock) and, as audit_log always has, commit it
         try:
-            keys = self.redis_client.keys(cache_pattern)
-            if keys:
-                self.redis_client.delete(*keys)
-            return len(keys)
-        except Exception as e:
-            logger.error(f"Error clearing cache pattern: {e}")
-            return 0
+            db.session.execute(insert(AuditLog), entries)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+# Shared audit pipeline, bound to the app by DatabaseManager.init_app
+audit_writer = AuditLogWriter()
 
 def audit_log(action, resource_type, resource_id=None, user_id=None, 
               old_values=None, new_values=None, ip_address=None, 
-              user_agent=None, success=True, error_message=None):
-    """Create audit log entry"""
+              user_agent=None, success=True, error_message=None, durable=None):
+    """Create audit log entry.
+
+    Durable entries (and every entry in sync mode) are written through the
+    caller's session and commit it, including any pending changes, as this
+    function always has. Other entries are queued and written later on a
+    separate connection without touching the caller's transaction.
+    """
     try:
-        log_entry = AuditLog(
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            user_id=user_id,
-            old_values=json.dumps(old_values) if old_values else None,
-            new_values=json.dumps(new_values) if new_values else None,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            success=success,
-            error_message=error_message
-        )
-        
-        db.session.add(log_entry)
-        db.session.commit()
+        audit_writer.write({
+            'action': action,
+            'resource_type': resource_type,
+            'resource_id': resource_id,
+            'user_id': user_id,
+            'old_values': json.dumps(old_values) if old_values else None,
+            'new_values': json.dumps(new_values) if new_values else None,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'success': success,
+            'error_message': error_message
+        }, durable=durable)
         
     except Exception as e:
         logger.error(f"Error creating audit log: {e}")
-        db.session.rollback()
 
 # Initialize database manager
 db_manager = DatabaseManager()
@@ -0,0 +1,212 @@
+"""
+LexAI Practice Partner - Read Replica Routing
+Sends read-only request traffic to PostgreSQL replicas
+
+GET/HEAD requests read from a healthy replica listed in
+DATABASE_REPLICA_URLS (comma-separated). Everything else uses the primary:
+writes, SELECT ... FOR UPDATE, raw text() statements, anything after the
+session has flushed, and every request from a user who wrote within the
+last DB_READ_YOUR_WRITES_SECONDS (read-your-writes stickiness, tracked in
+the Flask session so it survives hopping between serverless instances).
+Replica lag is measured by a background thread every
+DB_REPLICA_CHECK_SECONDS, never inside a request. Replicas lagging more
+than DB_REPLICA_MAX_LAG_SECONDS, unreachable, or not checked recently are
+skipped; with no healthy replica all reads fall back to the primary.
+"""
+
+import os
+import time
+import logging
+import threading
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+WRITE_TIMESTAMP_KEY = '_db_last_write'
+
+
+class ReplicaRouter:
+    """Replica engines, lag checks and per-request routing decisions"""
+
+    def __init__(self, app=None):
+        self.replica_urls = []
+        self.engines = {}
+        self.health = {}
+        self.max_lag = 5.0
+        self.sticky_seconds = 10.0
+        self.check_interval = 15.0
+        self.connect_timeout = 3
+        self.app = None
+        self._refresher = None
+        self._next = 0
+        self._lock = threading.Lock()
+        self.stats = {'replica_reads': 0, 'sticky_requests': 0, 'fallbacks': 0}
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.replica_urls = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+        self.max_lag = float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', '5'))
+        self.sticky_seconds = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '10'))
+        self.check_interval = float(os.getenv('DB_REPLICA_CHECK_SECONDS', '15'))
+        self.connect_timeout = int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', '3'))
+        self.app = app
+        app.extensions['db_router'] = self
+
+        if self.replica_urls:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            logger.info(f"Read replica routing enabled for {len(self.replica_urls)} replica(s)")
+
+    def _before_request(self):
+        g.db_read_only = False
+        if request.method not in READ_METHODS:
+            return
+        last_write = session.get(WRITE_TIMESTAMP_KEY)
+        if last_write and time.time() - last_write < self.sticky_seconds:
+            self._count('sticky_requests')
+            return
+        g.db_read_only = True
+
+    def _after_request(self, response):
+        if request.method not in READ_METHODS or g.get('db_wrote'):
+            if response.status_code < 400:
+                session[WRITE_TIMESTAMP_KEY] = time.time()
+        return response
+
+    def _engine_for(self, url):
+        engine = self.engines.get(url)
+        if engine is None:
+            with self._lock:
+                engine = self.engines.get(url)
+                if engine is None:
+                    # Same pool settings as the primary engine
+                    options = dict(current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+                    if url.startswith('postgres'):
+                        # A dead replica should fail fast, not hold up the health check
+                        options['connect_args'] = {'connect_timeout': self.connect_timeout,
+                                                   **options.get('connect_args', {})}
+                    engine = create_engine(url, **options)
+                    self.engines[url] = engine
+        return engine
+
+    def _check(self, url):
+        """Measure replica lag in seconds; None if the replica is unreachable"""
+        try:
+            with self._engine_for(url).connect() as conn:
+                # The last replayed transaction ages while the primary is idle,
+                # so a replica that has replayed everything it received is current
+                lag = conn.execute(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )).scalar()
+            return float(lag or 0)
+        except Exception as e:
+            logger.warning(f"Replica health check failed: {e}")
+            return None
+
+    def refresh(self):
+        """Check every replica and record its lag"""
+        with self.app.app_context():
+            for url in self.replica_urls:
+                lag = self._check(url)
+                self.health[url] = (time.monotonic(), lag)
+
+    def _refresh_loop(self):
+        while True:
+            self.refresh()
+            time.sleep(self.check_interval)
+
+    def _ensure_refresher(self):
+        # Started on first use rather than in init_app, so it survives forking servers
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(
+                    target=self._refresh_loop, name='replica-health', daemon=True
+                )
+                self._refresher.start()
+
+    def healthy_replicas(self):
+        """Replicas whose last check, taken recently, was within the lag limit"""
+        self._ensure_refresher()
+        now = time.monotonic()
+        healthy = []
+        for url in self.replica_urls:
+            checked_at, lag = self.health.get(url, (None, None))
+            # A suspended instance (serverless) may not have checked for a while
+            if checked_at is None or now - checked_at > self.check_interval * 3:
+                continue
+            if lag is not None and lag <= self.max_lag:
+                healthy.append(url)
+        return healthy
+
+    def replica_engine(self):
+        """A healthy replica engine, or None to use the primary"""
+        healthy = self.healthy_replicas()
+        if not healthy:
+            self._count('fallbacks')
+            return None
+        with self._lock:
+            self._next = (self._next + 1) % len(healthy)
+            url = healthy[self._next]
+        return self._engine_for(url)
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['replicas'] = [
+            {'index': index, 'lag_seconds': self.health.get(url, (None, None))[1]}
+            for index, url in enumerate(self.replica_urls)
+        ]
+        return stats
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+
+def use_primary():
+    """Force the rest of this request onto the primary"""
+    if has_request_context():
+        g.db_read_only = False
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends read-only SELECTs to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._replica_eligible(clause):
+            router = current_app.extensions.get('db_router')
+            if router is not None:
+                # One replica per request so reads within it are consistent
+                if 'db_replica' not in g:
+                    g.db_replica = router.replica_engine()
+                if g.db_replica is not None:
+                    router._count('replica_reads')
+                    return g.db_replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_eligible(self, clause):
+        if not has_request_context() or not g.get('db_read_only'):
+            return False
+        if self._flushing or self.info.get('has_writes'):
+            return False
+        return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def _mark_writes(session, flush_context):
+    # Sessions are scoped to the app context, so this lasts for the request
+    session.info['has_writes'] = True
+    if has_request_context():
+        g.db_wrote = True
+
+
+event.listen(RoutingSession, 'after_flush', _mark_writes)
+
+# Shared router, bound to the app by DatabaseManager.init_app
+replica_router = ReplicaRouter()
@@ -0,0 +1,162 @@
+"""
+LexAI Practice Partner - Export Store
+Server-side storage for analysis exports and their rendered reports
+
+Contract analyses used to be kept for export in the signed session
+cookie, which is sent with every request and overflows the 4 KB cookie
+limit. They are now stored here under their export id: in Redis when the
+shared cache has a client (so every instance can serve the download),
+otherwise as files under EXPORT_STORE_DIR. Entries are zlib-compressed
+JSON and expire after EXPORT_TTL seconds (default 24 hours).
+
+Rendered reports (HTML, and PDF when weasyprint is installed) are stored
+the same way, keyed by a hash of the analysis and format, so downloading
+an export again does not re-render the PDF.
+"""
+
+import os
+import json
+import time
+import uuid
+import zlib
+import base64
+import hashlib
+import logging
+import tempfile
+
+try:
+    from cache import cache as shared_cache
+except ImportError:
+    shared_cache = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TTL = int(os.environ.get('EXPORT_TTL', 86400))
+
+
+class ExportStore:
+    """Compressed export records and report artifacts with a TTL"""
+
+    def __init__(self, directory=None, ttl=None, prefix='lexai_export:', max_disk_entries=2000):
+        self.directory = directory or os.environ.get(
+            'EXPORT_STORE_DIR', os.path.join(tempfile.gettempdir(), 'lexai-exports')
+        )
+        self.ttl = ttl or EXPORT_TTL
+        self.prefix = prefix
+        self.max_disk_entries = max_disk_entries
+        self._writes = 0
+
+    def _redis(self):
+        return shared_cache.redis_client if shared_cache is not None else None
+
+    # ----- export records -----
+
+    def save(self, analysis, metadata):
+        """Store an analysis for export; returns its export id"""
+        export_id = uuid.uuid4().hex[:12]
+        analysis['export_id'] = export_id
+        digest = hashlib.sha256(
+            json.dumps([analysis, metadata], sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        record = {'analysis': analysis, 'metadata': metadata, 'digest': digest}
+        self._put(f"record:{export_id}", json.dumps(record, default=str).encode('utf-8'))
+        return export_id
+
+    def load(self, export_id, user_id=None):
+        """The stored record, or None if missing, expired or owned by another user"""
+        data = self._get(f"record:{export_id}")
+        if data is None:
+            return None
+        record = json.loads(data)
+        if user_id is not None and str(record['metadata'].get('user_id')) != str(user_id):
+            return None
+        return record
+
+    # ----- rendered artifacts -----
+
+    def get_artifact(self, record, fmt):
+        return self._get(f"artifact:{record['digest']}:{fmt}")
+
+    def put_artifact(self, record, fmt, content):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        self._put(f"artifact:{record['digest']}:{fmt}", content)
+
+    # ----- storage -----
+
+    def _put(self, key, data):
+        blob = zlib.compress(data, 6)
+        redis_client = self._redis()
+        if redis_client is not None:
+            try:
+                # The shared client decodes responses, so blobs travel as base64
+                redis_client.setex(self.prefix + key, self.ttl, base64.b64encode(blob).decode('ascii'))
+                return
+            except Exception as e:
+                logger.warning(f"Export store Redis write failed, using disk: {e}")
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile('wb', dir=self.directory, suffix='.tmp', delete=False) as f:
+                f.write(blob)
+            os.replace(f.name, self._path(key))
+        except OSError as e:
+            logger.warning(f"Export store write failed: {e}")
+            return
+
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.prune()
+
+    def _get(self, key):
+        redis_client = self._redis()
+        if redis_client is not None:
+            try:
+                blob = redis_client.get(self.prefix + key)
+                if blob is not None:
+                    return zlib.decompress(base64.b64decode(blob))
+            except Exception as e:
+                logger.warning(f"Export store Redis read failed: {e}")
+
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                self._remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.z')
+
+    def prune(self):
+        """Drop expired disk entries, then the oldest beyond max_disk_entries"""
+        try:
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.z')]
+        except OSError:
+            return
+        live = []
+        for path in paths:
+            try:
+                modified = os.path.getmtime(path)
+            except OSError:
+                continue
+            if modified + self.ttl < time.time():
+                self._remove(path)
+            else:
+                live.append((modified, path))
+        for _, path in sorted(live)[:max(0, len(live) - self.max_disk_entries)]:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Shared by the export routes in index.py
+export_store = ExportStore()
@@ -10,11 +10,16 @@ import logging
 import uuid
 import requests
 import re
+import io
 from datetime import datetime, timedelta, date
 from decimal import Decimal
-from flask import Flask, request, jsonify, render_template, session, redirect, make_response
+from flask import Flask, request, jsonify, render_template, session, redirect, make_response, Response, stream_with_context
 from functools import wraps
 from dotenv import load_dotenv
+from conditional import conditional_response, table_version, touch_on_change
+from assets import asset_manifest
+from templating import template_cache
+from export_store import export_store
 
 # Load environment variables
 load_dotenv()
@@ -26,7 +31,23 @@ logger = logging.getLogger(__name__)
 # Import database components
 try:
     from models import db, User, Client, Case, TimeEntry, Invoice, Expense, UserRole, TimeEntryStatus, InvoiceStatus, Task, CalendarEvent, CaseStatus, TaskStatus, TaskPriority, case_attorneys, Document, DocumentStatus
-    from database import DatabaseManager, audit_log
+    from database import DatabaseManager, audit_log, audit_writer
+    from db_routing import replica_router
+    from serializers import (
+        parse_fields, DocumentSerializer, TaskSerializer, CaseSerializer,
+        TimeEntrySerializer, CalendarEventSerializer
+    )
+    from analytics import (
+        register_rollup_listeners, get_period_totals, get_daily_revenue,
+        get_category_hours, get_practice_area_totals, get_top_engaged_clients,
+        cached_dashboard, register_dashboard_cache_invalidation
+    )
+    from audit_archive import query_audit_logs
+    import bulk_io
+    from invoice_numbers import next_invoice_number, firm_key
+    from query_stats import query_profiler
+    from cache import cache, register_cache_invalidation
+    from permissions import load_current_user, get_permissions
     DATABASE_AVAILABLE = True
     logger.info("Database models loaded successfully")
 except ImportError as e:
@@ -59,7 +80,20 @@ app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # 1 hour session timeout
 if DATABASE_AVAILABLE:
     try:
         db_manager = DatabaseManager(app)
+        register_rollup_listeners()
+        register_cache_invalidation()
+        register_dashboard_cache_invalidation()
+        # Attorney assignments feed the case list's ETag and attorney_count
+        touch_on_change(Case.attorneys)
         logger.info("Database initialized successfully")
+        
+        # Per-request query counts, Server-Timing header and N+1 logging
+        try:
+            from production_monitoring import performance_monitor
+        except Exception as e:
+            logger.warning(f"Performance monitor not available: {e}")
+            performance_monitor = None
+        query_profiler.init_app(app, monitor=performance_monitor)
     except Exception as e:
         logger.warning(f"Database initialization failed: {e}")
         logger.info("Falling back to mock data mode")
@@ -120,8 +154,8 @@ def add_performance_headers(response):
     response.headers['X-XSS-Protection'] = '1; mode=block'
     response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
     
-    # Add performance headers
-    if request.endpoint != 'static':
+    # Add performance headers; routes with their own caching policy keep it
+    if request.endpoint != 'static' and 'Cache-Control' not in response.headers:
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '0'
@@ -130,22 +164,12 @@ def add_performance_headers(response):
     
     return response
 
-def get_versioned_static_url(filename):
-    """Generate versioned URLs for static files to enable cache busting"""
-    # Use file modification time as version for cache busting
-    import os
-    try:
-        static_path = os.path.join(app.static_folder, filename)
-        if os.path.exists(static_path):
-            mtime = int(os.path.getmtime(static_path))
-            return f"/static/{filename}?v={mtime}"
-        else:
-            return f"/static/{filename}?v={str(uuid.uuid4())[:8]}"
-    except:
-        return f"/static/{filename}?v={str(uuid.uuid4())[:8]}"
+# Content-hashed static URLs and precompressed CSS/JS from the build-assets manifest
+asset_manifest.init_app(app)
+
+# Persistent Jinja bytecode (and bundled precompiled templates) plus first-render timing
+template_cache.init_app(app)
 
-# Make versioned URL function available in templates
-app.jinja_env.globals['versioned_static'] = get_versioned_static_url
 logger.info(f"STRIPE_AVAILABLE: {STRIPE_AVAILABLE}")
 
 # ===== DOCUMENT PROCESSING AND AI ANALYSIS HELPER FUNCTIONS =====
@@ -1077,6 +1101,18 @@ def role_required(*allowed_roles):
                     return redirect('/login')
             
             user_role = session.get('user_role')
+            if DATABASE_AVAILABLE:
+                # Cached per user and dropped when the user row changes, so
+                # role changes and deactivation apply without a query here
+                permissions = get_permissions()
+                if permissions:
+                    if not permissions['is_active']:
+                        return jsonify({
+                            'success': False,
+                            'error': 'Authentication required'
+                        }), 401
+                    user_role = permissions['role']
+            
             if user_role not in allowed_roles:
                 if request.is_json:
                     return jsonify({
@@ -1111,9 +1147,7 @@ def get_current_user():
         }
     
     try:
-        user_id = session.get('user_id')
-        user = User.query.get(user_id)
-        return user
+        return load_current_user()
     except:
         return None
 
@@ -1124,8 +1158,7 @@ def landing_page():
     """Landing page"""
     try:
         return render_template('landing.html',
-                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'),
-                             cache_buster=str(uuid.uuid4())[:8])
+                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'))
     except Exception as e:
         logger.error(f"Landing page error: {e}")
         return f"LexAI Practice Partner - Error loading page: {e}", 500
@@ -1135,8 +1168,7 @@ def landing_law_firms():
     """Law firm acquisition landing page"""
     try:
         return render_template('landing-law-firms.html',
-                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'),
-                             cache_buster=str(uuid.uuid4())[:8])
+                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'))
     except Exception as e:
         logger.error(f"Law firm landing page error: {e}")
         return f"LexAI Practice Partner - Error loading page: {e}", 500
@@ -1146,8 +1178,7 @@ def pricing_page():
     """Pricing page"""
     try:
         return render_template('pricing.html',
-                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'),
-                             cache_buster=str(uuid.uuid4())[:8])
+                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'))
     except Exception as e:
         logger.error(f"Pricing page error: {e}")
         return f"LexAI Practice Partner - Error loading page: {e}", 500
@@ -1157,8 +1188,7 @@ def case_studies_page():
     """Case studies page"""
     try:
         return render_template('case-studies.html',
-                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'),
-                             cache_buster=str(uuid.uuid4())[:8])
+                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'))
     except Exception as e:
         logger.error(f"Case studies page error: {e}")
         return f"LexAI Practice Partner - Error loading page: {e}", 500
@@ -1184,8 +1214,7 @@ def dashboard():
         return render_template('dashboard.html',
                              user_role=user_role,  # Default to attorney for full menu access
                              user_name=session.get('user_name', 'User'),
-                             stats=stats,
-                             cache_buster=str(uuid.uuid4())[:8])
+                             stats=stats)
     except Exception as e:
         logger.error(f"Dashboard error: {e}")
         return f"Dashboard error: {e}", 500
@@ -1380,8 +1409,7 @@ def admin_dashboard():
         return render_template('admin/dashboard.html',
                              user_role=session.get('user_role', 'admin'),
                              user_name=session.get('user_name', 'Admin'),
-                             page_title='Admin Dashboard',
-                             cache_buster=str(uuid.uuid4())[:8])
+                             page_title='Admin Dashboard')
     except Exception as e:
         logger.error(f"Admin dashboard page error: {e}")
         return f"Admin dashboard error: {e}", 500
@@ -1462,8 +1490,7 @@ def admin_users():
                              firm_users=firm_users,
                              user_role=session.get('user_role', 'admin'),
                              user_name=session.get('user_name', 'Admin'),
-                             page_title='User Management',
-                             cache_buster=str(uuid.uuid4())[:8])
+                             page_title='User Management')
     except Exception as e:
         logger.error(f"Admin users page error: {e}")
         return f"Admin users error: {e}", 500
@@ -1475,8 +1502,7 @@ def admin_settings():
         return render_template('admin/settings.html',
                              user_role=session.get('user_role', 'admin'),
                              user_name=session.get('user_name', 'Admin'),
-                             page_title='System Settings',
-                             cache_buster=str(uuid.uuid4())[:8])
+                             page_title='System Settings')
     except Exception as e:
         logger.error(f"Admin settings page error: {e}")
         return f"Admin settings error: {e}", 500
@@ -1488,8 +1514,7 @@ def admin_subscriptions():
         return render_template('admin/subscriptions.html',
                              user_role=session.get('user_role', 'admin'),
                              user_name=session.get('user_name', 'Admin'),
-                             page_title='Subscription Management',
-                             cache_buster=str(uuid.uuid4())[:8])
+                             page_title='Subscription Management')
     except Exception as e:
         logger.error(f"Admin subscriptions page error: {e}")
         return f"Admin subscriptions error: {e}", 500
@@ -1501,8 +1526,7 @@ def admin_audit_logs():
         return render_template('admin/audit-logs.html',
                              user_role=session.get('user_role', 'admin'),
                              user_name=session.get('user_name', 'Admin'),
-                             page_title='Audit Logs',
-                             cache_buster=str(uuid.uuid4())[:8])
+                             page_title='Audit Logs')
     except Exception as e:
         logger.error(f"Admin audit logs page error: {e}")
         return f"Admin audit logs error: {e}", 500
@@ -1535,8 +1559,7 @@ def login_page():
         # Redirect if already logged in
         if session.get('logged_in'):
             return redirect('/dashboard')
-        return render_template('auth_login_enhanced.html',
-                             cache_buster=str(uuid.uuid4())[:8])
+        return render_template('auth_login_enhanced.html')
     except Exception as e:
         logger.error(f"Login page error: {e}")
         return f"Login error: {e}", 500
@@ -1570,8 +1593,7 @@ def register_page():
         # Redirect if already logged in
         if session.get('logged_in'):
             return redirect('/dashboard')
-        return render_template('auth_register_standalone.html',
-                             cache_buster=str(uuid.uuid4())[:8])
+        return render_template('auth_register_standalone.html')
     except Exception as e:
         logger.error(f"Register page error: {e}")
         return f"Register error: {e}", 500
@@ -1626,8 +1648,7 @@ def platform_page():
         return render_template('platform_overview.html',
                              bagel_available=BAGEL_AI_AVAILABLE,
                              spanish_available=SPANISH_AVAILABLE,
-                             stripe_available=STRIPE_AVAILABLE,
-                             cache_buster=str(uuid.uuid4())[:8])
+                             stripe_available=STRIPE_AVAILABLE)
     except Exception as e:
         logger.error(f"Platform page error: {e}")
         return f"Platform error: {e}", 500
@@ -1669,58 +1690,21 @@ def get_analytics_overview():
             # Get real data from database
             end_date = datetime.now()
             start_date = end_date - timedelta(days=period_days)
+            prev_start = start_date - timedelta(days=period_days)
             
-            # Calculate revenue metrics
-            invoices = Invoice.query.filter(
-                Invoice.user_id == user_id,
-                Invoice.created_at >= start_date,
-                Invoice.status.in_([InvoiceStatus.PAID, InvoiceStatus.SENT])
-            ).all()
-            
-            total_revenue = sum(invoice.total_amount for invoice in invoices)
-            
-            # Calculate billable hours
-            time_entries = TimeEntry.query.filter(
-                TimeEntry.user_id == user_id,
-                TimeEntry.date >= start_date.date(),
-                TimeEntry.status == TimeEntryStatus.APPROVED
-            ).all()
-            
-            total_hours = sum(entry.duration for entry in time_entries) / 3600  # Convert to hours
-            
-            # Count active clients
-            active_clients = Client.query.filter(
-                Client.user_id == user_id,
-                Client.created_at >= start_date
-            ).count()
+            # Current and previous period totals in a single aggregate query
+            totals = cached_dashboard('overview', user_id, period_days,
+                                      lambda: get_period_totals(user_id, start_date, prev_start))
+            total_revenue = totals['revenue']
+            total_hours = totals['hours']
+            active_clients = totals['clients']
+            prev_revenue = totals['prev_revenue']
+            prev_hours = totals['prev_hours']
+            prev_clients = totals['prev_clients']
             
             # Calculate average hourly rate
             avg_rate = total_revenue / total_hours if total_hours > 0 else 350
             
-            # Previous period comparison
-            prev_start = start_date - timedelta(days=period_days)
-            prev_invoices = Invoice.query.filter(
-                Invoice.user_id == user_id,
-                Invoice.created_at >= prev_start,
-                Invoice.created_at < start_date,
-                Invoice.status.in_([InvoiceStatus.PAID, InvoiceStatus.SENT])
-            ).all()
-            
-            prev_revenue = sum(invoice.total_amount for invoice in prev_invoices)
-            prev_time_entries = TimeEntry.query.filter(
-                TimeEntry.user_id == user_id,
-                TimeEntry.date >= prev_start.date(),
-                TimeEntry.date < start_date.date(),
-                TimeEntry.status == TimeEntryStatus.APPROVED
-            ).all()
-            
-            prev_hours = sum(entry.duration for entry in prev_time_entries) / 3600
-            prev_clients = Client.query.filter(
-                Client.user_id == user_id,
-                Client.created_at >= prev_start,
-                Client.created_at < start_date
-            ).count()
-            
             # Calculate percentage changes
             revenue_change = ((total_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue > 0 else 0
             hours_change = ((total_hours - prev_hours) / prev_hours * 100) if prev_hours > 0 else 0
@@ -1779,17 +1763,9 @@ def get_revenue_trends():
             end_date = datetime.now()
             start_date = end_date - timedelta(days=period_days)
             
-            # Query invoices grouped by day
-            daily_revenue = {}
-            invoices = Invoice.query.filter(
-                Invoice.user_id == user_id,
-                Invoice.created_at >= start_date,
-                Invoice.status.in_([InvoiceStatus.PAID, InvoiceStatus.SENT])
-            ).all()
-            
-            for invoice in invoices:
-                day_key = invoice.created_at.strftime('%Y-%m-%d')
-                daily_revenue[day_key] = daily_revenue.get(day_key, 0) + float(invoice.total_amount)
+            # Revenue summed per day in the database
+            daily_revenue = cached_dashboard('daily-revenue', user_id, period_days,
+                                             lambda: get_daily_revenue(user_id, start_date))
         else:
             # Generate mock daily revenue data
             daily_revenue = _generate_mock_daily_revenue(period_days)
@@ -1818,6 +1794,12 @@ def get_revenue_trends():
             'error': 'Failed to load revenue trends'
         }), 500
 
+def _get_client_engagement_rows(user_id):
+    rows = get_top_engaged_clients(user_id, datetime.now(), days=30, limit=10)
+    for row in rows:
+        row['last_contact'] = _format_relative_date(row['last_contact'])
+    return rows
+
 @app.route('/api/analytics/client-engagement', methods=['GET'])
 @login_required
 def get_client_engagement():
@@ -1826,41 +1808,9 @@ def get_client_engagement():
         user_id = session.get('user_id')
         
         if DATABASE_AVAILABLE:
-            # Get clients with engagement data
-            clients = Client.query.filter(Client.user_id == user_id).all()
-            
-            engagement_data = []
-            for client in clients:
-                # Calculate engagement score based on recent activity
-                recent_cases = Case.query.filter(
-                    Case.client_id == client.id,
-                    Case.created_at >= datetime.now() - timedelta(days=30)
-                ).count()
-                
-                recent_invoices = Invoice.query.filter(
-                    Invoice.client_id == client.id,
-                    Invoice.created_at >= datetime.now() - timedelta(days=30)
-                ).all()
-                
-                recent_revenue = sum(inv.total_amount for inv in recent_invoices)
-                last_contact = max((inv.created_at for inv in recent_invoices), default=client.created_at)
-                days_since_contact = (datetime.now() - last_contact).days
-                
-                # Simple engagement score algorithm
-                score = 100
-                score -= min(days_since_contact * 2, 50)  # Penalize for no recent contact
-                score += min(recent_cases * 10, 30)  # Reward for active cases
-                score = max(20, min(100, score))  # Keep between 20-100
-                
-                engagement_data.append({
-                    'client_name': f"{client.first_name} {client.last_name}",
-                    'engagement_score': int(score),
-                    'last_contact': _format_relative_date(last_contact),
-                    'revenue': float(recent_revenue)
-                })
-            
-            # Sort by engagement score
-            engagement_data.sort(key=lambda x: x['engagement_score'], reverse=True)
+            # Scored, ranked and limited to the top 10 in a single query
+            engagement_data = cached_dashboard('client-engagement', user_id, 30,
+                                               lambda: _get_client_engagement_rows(user_id))
             
         else:
             # Mock client engagement data
@@ -1918,31 +1868,9 @@ def get_time_utilization():
             end_date = datetime.now()
             start_date = end_date - timedelta(days=period_days)
             
-            time_entries = TimeEntry.query.filter(
-                TimeEntry.user_id == user_id,
-                TimeEntry.date >= start_date.date()
-            ).all()
-            
-            # Categorize time entries
-            categories = {
-                'Billable Work': 0,
-                'Client Meetings': 0,
-                'Admin Tasks': 0,
-                'Business Development': 0
-            }
-            
-            for entry in time_entries:
-                duration_hours = entry.duration / 3600
-                description = entry.description.lower()
-                
-                if 'meeting' in description or 'call' in description:
-                    categories['Client Meetings'] += duration_hours
-                elif 'admin' in description or 'invoice' in description:
-                    categories['Admin Tasks'] += duration_hours
-                elif 'business' in description or 'marketing' in description:
-                    categories['Business Development'] += duration_hours
-                else:
-                    categories['Billable Work'] += duration_hours
+            # Hours per category, summed from the daily rollups
+            categories = dict(cached_dashboard('time-utilization', user_id, period_days,
+                                               lambda: get_category_hours(user_id, start_date)))
             
             # Convert to percentages
             total_time = sum(categories.values())
@@ -1981,40 +1909,20 @@ def get_practice_areas_performance():
         user_id = session.get('user_id')
         
         if DATABASE_AVAILABLE:
-            # Get cases grouped by practice area
-            cases = Case.query.filter(Case.user_id == user_id).all()
-            
-            areas = {}
-            for case in cases:
-                area = case.practice_area or 'General'
-                if area not in areas:
-                    areas[area] = {'revenue': 0, 'cases': 0}
-                
-                # Calculate revenue for this case
-                case_invoices = Invoice.query.filter(
-                    Invoice.case_id == case.id,
-                    Invoice.status.in_([InvoiceStatus.PAID, InvoiceStatus.SENT])
-                ).all()
-                
-                case_revenue = sum(inv.total_amount for inv in case_invoices)
-                areas[area]['revenue'] += case_revenue
-                areas[area]['cases'] += 1
+            # One grouped query, already ordered by revenue
+            areas = cached_dashboard('practice-areas', user_id, 'all',
+                                     lambda: get_practice_area_totals(user_id))
+            total_revenue = sum(revenue for _, revenue, _ in areas)
             
-            # Convert to list and calculate percentages
-            total_revenue = sum(area['revenue'] for area in areas.values())
-            practice_areas = []
-            
-            for area_name, data in areas.items():
-                percentage = (data['revenue'] / total_revenue * 100) if total_revenue > 0 else 0
-                practice_areas.append({
+            practice_areas = [
+                {
                     'name': area_name,
-                    'revenue': float(data['revenue']),
-                    'percentage': round(percentage, 1),
-                    'cases': data['cases']
-                })
-            
-            # Sort by revenue
-            practice_areas.sort(key=lambda x: x['revenue'], reverse=True)
+                    'revenue': revenue,
+                    'percentage': round(revenue / total_revenue * 100, 1) if total_revenue > 0 else 0,
+                    'cases': cases
+                }
+                for area_name, revenue, cases in areas
+            ]
             
         else:
             # Mock practice areas data
@@ -2053,18 +1961,15 @@ def get_analytics_insights():
             end_date = datetime.now()
             start_date = end_date - timedelta(days=period_days)
             
-            # Revenue insights
-            invoices = Invoice.query.filter(
-                Invoice.user_id == user_id,
-                Invoice.created_at >= start_date,
-                Invoice.status.in_([InvoiceStatus.PAID, InvoiceStatus.SENT])
-            ).all()
+            # Revenue insights (at most one row per day in the period)
+            revenue_by_date = cached_dashboard('daily-revenue', user_id, period_days,
+                                               lambda: get_daily_revenue(user_id, start_date))
             
-            if invoices:
+            if revenue_by_date:
                 daily_revenues = {}
-                for invoice in invoices:
-                    day = invoice.created_at.strftime('%A')
-                    daily_revenues[day] = daily_revenues.get(day, 0) + float(invoice.total_amount)
+                for day_key, amount in revenue_by_date.items():
+                    day = datetime.strptime(day_key, '%Y-%m-%d').strftime('%A')
+                    daily_revenues[day] = daily_revenues.get(day, 0) + amount
                 
                 best_day = max(daily_revenues.keys(), key=lambda k: daily_revenues[k])
                 best_revenue = daily_revenues[best_day]
@@ -2075,7 +1980,7 @@ def get_analytics_insights():
                 })
             
             # Client insights
-            total_revenue = sum(float(inv.total_amount) for inv in invoices)
+            total_revenue = sum(revenue_by_date.values())
             target_revenue = 50000  # Example target
             
             if total_revenue > target_revenue:
@@ -2209,24 +2114,14 @@ def api_contract_analysis():
             'ip_address': request.remote_addr
         })
         
-        # Generate unique export ID for this analysis
-        export_id = str(uuid.uuid4())[:8]
-        analysis_result['export_id'] = export_id
+        # Store the analysis server-side for export (assigns its export ID)
         analysis_result['export_available'] = True
-        
-        # Store analysis result for export (in production, use Redis or database)
-        # For now, store in session
-        if 'analysis_exports' not in session:
-            session['analysis_exports'] = {}
-        session['analysis_exports'][export_id] = {
-            'analysis': analysis_result,
-            'metadata': {
-                'filename': file_metadata.get('filename', 'contract') if 'file_metadata' in locals() and file_metadata else 'contract',
-                'analysis_type': analysis_type,
-                'timestamp': datetime.now().isoformat(),
-                'user_id': user_id
-            }
-        }
+        export_store.save(analysis_result, {
+            'filename': file_metadata.get('filename', 'contract') if 'file_metadata' in locals() and file_metadata else 'contract',
+            'analysis_type': analysis_type,
+            'timestamp': datetime.now().isoformat(),
+            'user_id': user_id
+        })
         
         return jsonify({
             'success': True,
@@ -2248,41 +2143,38 @@ def api_contract_analysis():
 def export_contract_analysis(export_id):
     """Export contract analysis as PDF report"""
     try:
-        # Retrieve analysis from session
-        if 'analysis_exports' not in session or export_id not in session['analysis_exports']:
+        export_data = export_store.load(export_id, session.get('user_id'))
+        if not export_data:
             return jsonify({
                 'success': False,
                 'error': 'Export not found or expired'
             }), 404
         
-        export_data = session['analysis_exports'][export_id]
-        analysis = export_data['analysis']
-        metadata = export_data['metadata']
-        
-        # Generate HTML report
-        html_report = _generate_analysis_report_html(analysis, metadata)
-        
-        # For now, return HTML. In production, convert to PDF using libraries like weasyprint
-        # Try to generate PDF if possible, otherwise return HTML
-        try:
-            # Try to import PDF generation library
-            from weasyprint import HTML, CSS
-            
-            # Generate PDF
-            pdf_buffer = HTML(string=html_report).write_pdf()
-            
-            response = make_response(pdf_buffer)
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = f'attachment; filename="contract_analysis_{export_id}.pdf"'
-            return response
+        # Rendered reports are stored by analysis hash, so repeat downloads skip rendering
+        pdf_buffer = export_store.get_artifact(export_data, 'pdf')
+        if pdf_buffer is None:
+            html_report = export_store.get_artifact(export_data, 'html')
+            if html_report is not None:
+                html_report = html_report.decode('utf-8')
+            else:
+                html_report = _generate_analysis_report_html(export_data['analysis'], export_data['metadata'])
+                export_store.put_artifact(export_data, 'html', html_report)
             
-        except ImportError:
-            # Fallback to HTML download
-            from flask import make_response
-            response = make_response(html_report)
-            response.headers['Content-Type'] = 'text/html'
-            response.headers['Content-Disposition'] = f'attachment; filename="contract_analysis_{export_id}.html"'
-            return response
+            # Convert to PDF when weasyprint is installed, otherwise return HTML
+            try:
+                from weasyprint import HTML
+                pdf_buffer = HTML(string=html_report).write_pdf()
+                export_store.put_artifact(export_data, 'pdf', pdf_buffer)
+            except ImportError:
+                response = make_response(html_report)
+                response.headers['Content-Type'] = 'text/html'
+                response.headers['Content-Disposition'] = f'attachment; filename="contract_analysis_{export_id}.html"'
+                return response
+        
+        response = make_response(pdf_buffer)
+        response.headers['Content-Type'] = 'application/pdf'
+        response.headers['Content-Disposition'] = f'attachment; filename="contract_analysis_{export_id}.pdf"'
+        return response
             
     except Exception as e:
         logger.error(f"Export error for {export_id}: {e}")
@@ -3999,8 +3891,7 @@ def client_portal_login_page():
         # Redirect if already logged in to client portal
         if session.get('client_portal_logged_in'):
             return redirect('/client-portal/dashboard')
-        return render_template('client-portal-login.html',
-                             cache_buster=str(uuid.uuid4())[:8])
+        return render_template('client-portal-login.html')
     except Exception as e:
         logger.error(f"Client portal login page error: {e}")
         return f"Client portal login error: {e}", 500
@@ -4010,8 +3901,7 @@ def client_portal_login_page():
 def client_portal_dashboard_page():
     """Client portal dashboard page"""
     try:
-        return render_template('client-portal-dashboard.html',
-                             cache_buster=str(uuid.uuid4())[:8])
+        return render_template('client-portal-dashboard.html')
     except Exception as e:
         logger.error(f"Client portal dashboard page error: {e}")
         return f"Client portal dashboard error: {e}", 500
@@ -4044,8 +3934,7 @@ def client_billing_page():
         if not session.get('client_portal_logged_in'):
             return redirect('/client-portal/login')
         
-        return render_template('client-billing.html',
-                             cache_buster=str(uuid.uuid4())[:8])
+        return render_template('client-billing.html')
     except Exception as e:
         logger.error(f"Client billing page error: {e}")
         return f"Client billing page error: {e}", 500
@@ -4058,8 +3947,7 @@ def client_messages_page():
         if not session.get('client_portal_logged_in'):
             return redirect('/client-portal/login?redirect=messages')
         
-        return render_template('client-messages.html',
-                             cache_buster=str(uuid.uuid4())[:8])
+        return render_template('client-messages.html')
     except Exception as e:
         logger.error(f"Client messages page error: {e}")
         return f"Client messages page error: {e}", 500
@@ -4072,8 +3960,7 @@ def client_documents_page():
         if not session.get('client_portal_logged_in'):
             return redirect('/client-portal/login?redirect=documents')
         
-        return render_template('client-documents.html',
-                             cache_buster=str(uuid.uuid4())[:8])
+        return render_template('client-documents.html')
     except Exception as e:
         logger.error(f"Client documents page error: {e}")
         return f"Client documents page error: {e}", 500
@@ -4084,8 +3971,7 @@ def client_documents_page():
 def admin_messages_page():
     """Admin messaging dashboard page"""
     try:
-        return render_template('admin-messages.html',
-                             cache_buster=str(uuid.uuid4())[:8])
+        return render_template('admin-messages.html')
     except Exception as e:
         logger.error(f"Admin messages page error: {e}")
         return f"Admin messages page error: {e}", 500
@@ -4142,11 +4028,50 @@ def api_database_status():
                 'invoicing': 'Database Integration Complete' if DATABASE_AVAILABLE else 'Mock Data Fallback',
                 'client_management': 'Database Integration Complete' if DATABASE_AVAILABLE else 'Mock Data Fallback',
                 'audit_logging': 'Available' if DATABASE_AVAILABLE else 'Not Available'
-            }
+            },
+            'audit_pipeline': audit_writer.get_stats() if DATABASE_AVAILABLE else None,
+            'read_replicas': replica_router.get_stats() if DATABASE_AVAILABLE else None,
+            'cache': cache.get_stats() if DATABASE_AVAILABLE else None
         },
         'installation_note': 'Install Flask-SQLAlchemy, psycopg2-binary packages to enable database integration' if not DATABASE_AVAILABLE else None
     })
 
+@app.route('/api/admin/performance/queries', methods=['GET'])
+@login_required
+@role_required('admin')
+def api_admin_query_performance():
+    """Routes ranked by database time, query count or N+1 suspects"""
+    monitor = query_profiler.monitor if DATABASE_AVAILABLE else None
+    if monitor is None:
+        return jsonify({
+            'success': False,
+            'error': 'Query profiling is not enabled'
+        }), 503
+    
+    sort_by = request.args.get('sort', 'db_time')
+    limit = min(int(request.args.get('limit', 20)), 100)
+    
+    return jsonify({
+        'success': True,
+        'sort': sort_by,
+        'thresholds': {
+            'n_plus_one': query_profiler.n_plus_one_threshold,
+            'query_count': query_profiler.log_query_count,
+            'db_time_ms': query_profiler.log_db_time_ms
+        },
+        'routes': monitor.get_route_rankings(sort_by=sort_by, limit=limit)
+    })
+
+@app.route('/api/admin/performance/templates', methods=['GET'])
+@login_required
+@role_required('admin')
+def api_admin_template_performance():
+    """Load and first-render times of the templates used by this instance"""
+    return jsonify({
+        'success': True,
+        **template_cache.get_stats()
+    })
+
 @app.route('/api/documents/analyze', methods=['POST'])
 @login_required
 @role_required('admin', 'partner', 'associate', 'paralegal')
@@ -5266,9 +5191,8 @@ def api_create_invoice():
         tax_amount = subtotal * tax_rate
         total_amount = subtotal + tax_amount
         
-        # Generate invoice number
-        invoice_count = Invoice.query.filter_by(created_by=user_id).count()
-        invoice_number = f"INV-{datetime.now().year}-{str(invoice_count + 1).zfill(3)}"
+        # Allocate the next number from the firm's sequence
+        invoice_number = next_invoice_number(firm_key(db.session.get(User, user_id)))
         
         # Set dates
         issue_date = datetime.now().date()
@@ -6130,12 +6054,10 @@ def api_current_user():
                 'error': 'Not authenticated'
             }), 401
         
-        user_id = session.get('user_id')
-        
         if not DATABASE_AVAILABLE:
             return _get_mock_current_user()
         
-        user = User.query.get(user_id)
+        user = get_current_user()
         if not user:
             session.clear()
             return jsonify({
@@ -6202,8 +6124,7 @@ def api_change_password():
                 'message': 'Password changed successfully (mock mode)'
             })
         
-        user_id = session.get('user_id')
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user or not user.check_password(current_password):
             return jsonify({
@@ -6245,8 +6166,7 @@ def forgot_password_page():
         # Redirect if already logged in
         if session.get('logged_in'):
             return redirect('/dashboard')
-        return render_template('auth_forgot_password.html',
-                             cache_buster=str(uuid.uuid4())[:8])
+        return render_template('auth_forgot_password.html')
     except Exception as e:
         logger.error(f"Forgot password page error: {e}")
         return f"Forgot password error: {e}", 500
@@ -6329,8 +6249,7 @@ def reset_password_page():
         
         if not token_data:
             return render_template('auth_reset_password.html',
-                                 error='Invalid or expired reset token',
-                                 cache_buster=str(uuid.uuid4())[:8])
+                                 error='Invalid or expired reset token')
         
         # Check if token has expired
         from datetime import datetime
@@ -6338,13 +6257,11 @@ def reset_password_page():
         if datetime.now(timezone.utc) > expires:
             session.pop(token_key, None)  # Clean up expired token
             return render_template('auth_reset_password.html',
-                                 error='Reset token has expired',
-                                 cache_buster=str(uuid.uuid4())[:8])
+                                 error='Reset token has expired')
         
         return render_template('auth_reset_password.html',
                              token=token,
-                             email=token_data['email'],
-                             cache_buster=str(uuid.uuid4())[:8])
+                             email=token_data['email'])
     except Exception as e:
         logger.error(f"Reset password page error: {e}")
         return f"Reset password error: {e}", 500
@@ -6487,7 +6404,7 @@ def setup_2fa():
         user_id = session.get('user_id')
         
         if DATABASE_AVAILABLE:
-            user = User.query.get(user_id)
+            user = get_current_user()
             if not user:
                 return jsonify({
                     'success': False,
@@ -6579,7 +6496,7 @@ def verify_2fa():
         user_id = session.get('user_id')
         
         if DATABASE_AVAILABLE:
-            user = User.query.get(user_id)
+            user = get_current_user()
             if not user or not user.two_factor_secret:
                 return jsonify({
                     'success': False,
@@ -6654,7 +6571,7 @@ def disable_2fa():
         user_id = session.get('user_id')
         
         if DATABASE_AVAILABLE:
-            user = User.query.get(user_id)
+            user = get_current_user()
             if not user:
                 return jsonify({
                     'success': False,
@@ -6795,8 +6712,27 @@ def _get_mock_current_user():
 
 # ===== CLIENT MANAGEMENT APIs =====
 
+def _clients_version():
+    if not DATABASE_AVAILABLE:
+        return None
+    user_id = session.get('user_id', '1')
+    owned = Client.query.filter_by(created_by=user_id)
+    cases = Case.query.filter(Case.client_id.in_(owned.with_entities(Client.id)))
+    return table_version(owned, cases)
+
+def _audit_clients_list():
+    audit_log('view', 'clients', None, session.get('user_id', '1'), {
+        'action': 'list_clients',
+        'filters': {
+            'search': request.args.get('search', '').strip(),
+            'status': request.args.get('status', ''),
+            'type': request.args.get('type', '')
+        }
+    })
+
 @app.route('/api/clients', methods=['GET'])
 @login_required
+@conditional_response(_clients_version, on_not_modified=_audit_clients_list)
 def api_get_clients():
     """Get all clients with optional search and filtering"""
     try:
@@ -6838,28 +6774,22 @@ def api_get_clients():
             page=page, per_page=per_page, error_out=False
         )
         
+        # Fetch case counts and recent cases for the whole page in two queries
+        client_ids = [client.id for client in clients.items]
+        case_counts, recent_cases_by_client = _get_client_case_summaries(client_ids)
+        
         # Format response
         clients_data = []
         for client in clients.items:
             client_data = client.to_dict()
-            
-            # Add case count
-            case_count = Case.query.filter_by(client_id=client.id).count()
-            client_data['case_count'] = case_count
-            
-            # Add recent activity
-            recent_cases = Case.query.filter_by(client_id=client.id).order_by(
-                Case.updated_at.desc()
-            ).limit(3).all()
-            client_data['recent_cases'] = [case.to_dict() for case in recent_cases]
-            
+            client_data['case_count'] = case_counts.get(client.id, 0)
+            client_data['recent_cases'] = [
+                case.to_dict() for case in recent_cases_by_client.get(client.id, [])
+            ]
             clients_data.append(client_data)
         
         # Create audit log
-        audit_log('view', 'clients', None, user_id, {
-            'action': 'list_clients',
-            'filters': {'search': search, 'status': status, 'type': client_type}
-        })
+        _audit_clients_list()
         
         return jsonify({
             'success': True,
@@ -6881,6 +6811,44 @@ def api_get_clients():
             'error': str(e)
         }), 500
 
+def _get_client_case_summaries(client_ids, recent_limit=3):
+    """Get case counts and the most recently updated cases for a page of clients.
+    
+    Uses one grouped COUNT and one ROW_NUMBER() window query regardless of how
+    many clients are on the page. The clients themselves are already in the
+    session identity map, so ``case.client`` in ``Case.to_dict()`` resolves
+    without another round trip.
+    """
+    if not client_ids:
+        return {}, {}
+    
+    case_counts = dict(
+        db.session.query(Case.client_id, db.func.count(Case.id))
+        .filter(Case.client_id.in_(client_ids))
+        .group_by(Case.client_id)
+        .all()
+    )
+    
+    ranked_cases = db.session.query(
+        Case.id.label('case_id'),
+        db.func.row_number().over(
+            partition_by=Case.client_id,
+            order_by=(Case.updated_at.desc(), Case.id)
+        ).label('recency_rank')
+    ).filter(Case.client_id.in_(client_ids)).subquery()
+    
+    recent_cases = Case.query.join(
+        ranked_cases, Case.id == ranked_cases.c.case_id
+    ).filter(
+        ranked_cases.c.recency_rank <= recent_limit
+    ).order_by(Case.client_id, ranked_cases.c.recency_rank).all()
+    
+    recent_cases_by_client = {}
+    for case in recent_cases:
+        recent_cases_by_client.setdefault(case.client_id, []).append(case)
+    
+    return case_counts, recent_cases_by_client
+
 @app.route('/api/clients', methods=['POST'])
 @login_required
 def api_create_client():
@@ -6977,15 +6945,18 @@ def api_get_client(client_id):
         
         # Get cases
         cases = Case.query.filter_by(client_id=client.id).order_by(Case.date_opened.desc()).all()
-        client_data['cases'] = [case.to_dict() for case in cases]
+        client_data['cases'] = CaseSerializer().dump_many(cases)
         
         # Get invoices
         invoices = Invoice.query.filter_by(client_id=client.id).order_by(Invoice.created_at.desc()).limit(10).all()
         client_data['recent_invoices'] = [invoice.to_dict() for invoice in invoices]
         
         # Get documents
-        documents = Document.query.filter_by(client_id=client.id).order_by(Document.created_at.desc()).limit(10).all()
-        client_data['recent_documents'] = [doc.to_dict() for doc in documents]
+        document_serializer = DocumentSerializer()
+        documents = document_serializer.apply(
+            Document.query.filter_by(client_id=client.id)
+        ).order_by(Document.created_at.desc()).limit(10).all()
+        client_data['recent_documents'] = document_serializer.dump_many(documents)
         
         # Calculate financial summary
         total_billed = sum(float(invoice.total_amount) for invoice in invoices)
@@ -7234,9 +7205,49 @@ def _delete_mock_client(client_id):
 
 # ===== CASE MANAGEMENT APIs =====
 
+def _cases_version():
+    if not DATABASE_AVAILABLE:
+        return None
+    user_id = session.get('user_id', '1')
+    if session.get('user_role', 'associate') in ['admin', 'partner']:
+        cases = Case.query
+    else:
+        cases = Case.query.filter(
+            db.or_(
+                Case.primary_attorney_id == user_id,
+                Case.attorneys.any(User.id == user_id)
+            )
+        )
+    clients = Client.query.filter(Client.id.in_(cases.with_entities(Case.client_id)))
+    case_ids = cases.with_entities(Case.id)
+    # The list also reports attorney names and task, document and time entry counts per case
+    attorneys = User.query.filter(db.or_(
+        User.id.in_(cases.with_entities(Case.primary_attorney_id)),
+        User.id.in_(db.session.query(case_attorneys.c.user_id).filter(case_attorneys.c.case_id.in_(case_ids)))
+    ))
+    related = [model.query.filter(model.case_id.in_(case_ids)) for model in (Task, Document, TimeEntry)]
+    return table_version(cases, clients, attorneys, *related)
+
+def _get_case_related_counts(case_ids):
+    """Get task, document and time entry counts for a page of cases.
+    
+    One grouped COUNT per relationship regardless of how many cases are on
+    the page; cases with no rows are missing from the returned dicts.
+    """
+    counts = {}
+    for name, model in (('task_count', Task), ('document_count', Document), ('time_entry_count', TimeEntry)):
+        counts[name] = dict(
+            db.session.query(model.case_id, db.func.count(model.id))
+            .filter(model.case_id.in_(case_ids))
+            .group_by(model.case_id)
+            .all()
+        ) if case_ids else {}
+    return counts
+
 @app.route('/api/cases', methods=['GET'])
 @login_required
 @role_required('admin', 'partner', 'associate', 'paralegal')
+@conditional_response(_cases_version)
 def api_get_cases():
     """Get all cases with optional search and filtering"""
     try:
@@ -7290,13 +7301,16 @@ def api_get_cases():
         total = query.count()
         
         # Apply pagination and ordering
-        cases = query.order_by(Case.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        serializer = CaseSerializer('list', parse_fields(request.args.get('fields')))
+        cases = serializer.apply(query).order_by(Case.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        
+        # Related row counts for the whole page, one query per relationship
+        related_counts = _get_case_related_counts([case.id for case in cases])
         
         # Convert to dictionaries with additional details
         cases_data = []
         for case in cases:
-            case_dict = case.to_dict()
-            case_dict.update({
+            case_dict = serializer.dump(case, extra={
                 'client_id': case.client_id,
                 'primary_attorney_name': case.primary_attorney.get_full_name() if case.primary_attorney else None,
                 'court_name': case.court_name,
@@ -7308,9 +7322,7 @@ def api_get_cases():
                 'flat_fee': float(case.flat_fee) if case.flat_fee else None,
                 'retainer_amount': float(case.retainer_amount) if case.retainer_amount else None,
                 'attorney_count': len(case.attorneys),
-                'task_count': case.tasks.count(),
-                'document_count': case.documents.count(),
-                'time_entry_count': case.time_entries.count()
+                **{name: by_case.get(case.id, 0) for name, by_case in related_counts.items()}
             })
             cases_data.append(case_dict)
         
@@ -7481,6 +7493,9 @@ def api_get_case(case_id):
                 }), 403
         
         # Get comprehensive case details
+        task_serializer = TaskSerializer()
+        document_serializer = DocumentSerializer()
+        time_entry_serializer = TimeEntrySerializer()
         case_data = case.to_dict()
         case_data.update({
             'client': case.client.to_dict() if case.client else None,
@@ -7495,9 +7510,15 @@ def api_get_case(case_id):
             'hourly_rate': float(case.hourly_rate) if case.hourly_rate else None,
             'flat_fee': float(case.flat_fee) if case.flat_fee else None,
             'retainer_amount': float(case.retainer_amount) if case.retainer_amount else None,
-            'tasks': [task.to_dict() for task in case.tasks.order_by(Task.created_at.desc()).limit(10)],
-            'documents': [doc.to_dict() for doc in case.documents.order_by(Document.created_at.desc()).limit(10)],
-            'time_entries': [entry.to_dict() for entry in case.time_entries.order_by(TimeEntry.created_at.desc()).limit(10)],
+            'tasks': task_serializer.dump_many(
+                task_serializer.apply(case.tasks.order_by(Task.created_at.desc()).limit(10))
+            ),
+            'documents': document_serializer.dump_many(
+                document_serializer.apply(case.documents.order_by(Document.created_at.desc()).limit(10))
+            ),
+            'time_entries': time_entry_serializer.dump_many(
+                time_entry_serializer.apply(case.time_entries.order_by(TimeEntry.created_at.desc()).limit(10))
+            ),
             'recent_activity': _get_case_recent_activity(case)
         })
         
@@ -7704,6 +7725,106 @@ def api_update_case_status(case_id):
             'error': 'Failed to update case status'
         }), 500
 
+# ===== BULK IMPORT/EXPORT API =====
+
+# Same roles as the single-record create endpoints
+BULK_IMPORT_ROLES = {
+    'clients': ('admin', 'partner', 'associate', 'paralegal'),
+    'cases': ('admin', 'partner', 'associate'),
+    'time_entries': ('admin', 'partner', 'associate', 'paralegal'),
+}
+
+@app.route('/api/bulk/<entity>/import', methods=['POST'])
+@login_required
+@role_required('admin', 'partner', 'associate', 'paralegal')
+def api_bulk_import(entity):
+    """Import clients, cases or time entries from a CSV or NDJSON upload"""
+    try:
+        if entity not in BULK_IMPORT_ROLES:
+            return jsonify({
+                'success': False,
+                'error': f'Unknown entity: {entity}'
+            }), 404
+        
+        if session.get('user_role') not in BULK_IMPORT_ROLES[entity]:
+            return jsonify({
+                'success': False,
+                'error': 'Insufficient permissions'
+            }), 403
+        
+        if not DATABASE_AVAILABLE:
+            return jsonify({
+                'success': False,
+                'error': 'Bulk import requires the database'
+            }), 503
+        
+        user_id = session.get('user_id', '1')
+        
+        # Multipart upload or the raw request body, read as a stream either way
+        upload = request.files.get('file')
+        if upload:
+            fmt = bulk_io.detect_format(request.args.get('format'), upload.content_type, upload.filename)
+            raw = upload.stream
+        else:
+            fmt = bulk_io.detect_format(request.args.get('format'), request.content_type)
+            raw = request.stream
+        stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        
+        summary = bulk_io.bulk_import(entity, stream, fmt, user_id)
+        
+        logger.info(f"Bulk import: {summary['inserted']} {entity} by {user_id}")
+        
+        return jsonify({
+            'success': True,
+            'message': f"Imported {summary['inserted']} of {summary['total']} rows",
+            'import': summary
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Bulk import error: {e}")
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': 'Failed to import records'
+        }), 500
+
+@app.route('/api/bulk/<entity>/export', methods=['GET'])
+@login_required
+def api_bulk_export(entity):
+    """Stream the user's clients, cases or time entries as CSV or NDJSON"""
+    try:
+        if entity not in BULK_IMPORT_ROLES:
+            return jsonify({
+                'success': False,
+                'error': f'Unknown entity: {entity}'
+            }), 404
+        
+        if not DATABASE_AVAILABLE:
+            return jsonify({
+                'success': False,
+                'error': 'Bulk export requires the database'
+            }), 503
+        
+        fmt = bulk_io.detect_format(request.args.get('format', 'csv'))
+        rows = bulk_io.iter_export(entity, fmt, session.get('user_id', '1'), session.get('user_role'))
+        
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        filename = f"{entity}_{datetime.now().strftime('%Y%m%d')}.{fmt}"
+        return Response(stream_with_context(rows), mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename={filename}'
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 # ===== DEADLINE MANAGEMENT API =====
 
 @app.route('/api/deadlines', methods=['GET'])
@@ -7727,7 +7848,7 @@ def api_get_deadlines():
         
         # Statute of limitations deadlines
         if not deadline_type or deadline_type == 'statute':
-            statute_cases = Case.query.filter(
+            statute_cases = CaseSerializer().apply(Case.query).filter(
                 Case.statute_of_limitations.isnot(None),
                 Case.statute_of_limitations >= current_date,
                 Case.statute_of_limitations <= end_date,
@@ -7756,7 +7877,7 @@ def api_get_deadlines():
         
         # Court dates from calendar events
         if not deadline_type or deadline_type == 'court':
-            court_events = CalendarEvent.query.filter(
+            court_events = CalendarEventSerializer('deadlines').apply(CalendarEvent.query).filter(
                 CalendarEvent.event_type.in_(['court', 'hearing', 'trial']),
                 CalendarEvent.start_datetime >= datetime.combine(current_date, datetime.min.time().replace(tzinfo=timezone.utc)),
                 CalendarEvent.start_datetime <= datetime.combine(end_date, datetime.max.time().replace(tzinfo=timezone.utc))
@@ -7787,7 +7908,7 @@ def api_get_deadlines():
         
         # Task deadlines
         if not deadline_type or deadline_type == 'task':
-            task_deadlines = Task.query.filter(
+            task_deadlines = TaskSerializer('deadlines', fields=['case_title', 'client_name', 'assignee_name']).apply(Task.query).filter(
                 Task.due_date.isnot(None),
                 Task.due_date >= current_date,
                 Task.due_date <= end_date,
@@ -8118,9 +8239,18 @@ def calendar_page():
         logger.error(f"Calendar page error: {e}")
         return f"Calendar error: {e}", 500
 
+def _calendar_events_version():
+    if not DATABASE_AVAILABLE:
+        return None
+    events = CalendarEvent.query.filter(CalendarEvent.created_by == session.get('user_id', '1'))
+    cases = Case.query.filter(Case.id.in_(events.with_entities(CalendarEvent.case_id)))
+    clients = Client.query.filter(Client.id.in_(events.with_entities(CalendarEvent.client_id)))
+    return table_version(events, cases, clients)
+
 @app.route('/api/calendar/events', methods=['GET'])
 @login_required
 @role_required('admin', 'partner', 'associate', 'paralegal')
+@conditional_response(_calendar_events_version)
 def api_get_calendar_events():
     """Get calendar events with filtering"""
     try:
@@ -8553,9 +8683,10 @@ def api_get_documents():
         client_id = request.args.get('client_id')
         document_type = request.args.get('document_type')
         status = request.args.get('status')
+        serializer = DocumentSerializer('list', parse_fields(request.args.get('fields')))
         
         # Build query
-        query = Document.query
+        query = serializer.apply(Document.query)
         
         # Apply filters
         if search:
@@ -8587,8 +8718,7 @@ def api_get_documents():
         # Convert to dict with additional info
         documents_data = []
         for doc in documents.items:
-            doc_dict = doc.to_dict()
-            doc_dict.update({
+            doc_dict = serializer.dump(doc, extra={
                 'case_title': doc.case.title if doc.case else None,
                 'case_number': doc.case.case_number if doc.case else None,
                 'client_name': doc.client.get_display_name() if doc.client else None,
@@ -8838,6 +8968,7 @@ def api_delete_document(document_id):
 
 @app.route('/api/documents/types', methods=['GET'])
 @login_required
+@conditional_response(lambda: 'document-types-v1', max_age=3600)
 def api_get_document_types():
     """Get available document types"""
     document_types = [
@@ -8877,7 +9008,8 @@ def api_get_client_documents(client_id):
             }), 404
         
         # Build query for client documents
-        query = Document.query.filter_by(client_id=client_id)
+        serializer = DocumentSerializer(fields=parse_fields(request.args.get('fields')))
+        query = serializer.apply(Document.query.filter_by(client_id=client_id))
         
         # Apply filters
         if document_type:
@@ -8893,7 +9025,7 @@ def api_get_client_documents(client_id):
         
         return jsonify({
             'success': True,
-            'documents': [doc.to_dict() for doc in paginated.items],
+            'documents': serializer.dump_many(paginated.items),
             'pagination': {
                 'page': page,
                 'pages': paginated.pages,
@@ -9372,7 +9504,8 @@ def api_search_documents():
         user_id = session.get('user_id', '1')
         
         # Build base query - only show user's documents
-        base_query = Document.query.join(Client).filter(Client.created_by == user_id)
+        serializer = DocumentSerializer()
+        base_query = serializer.apply(Document.query.join(Client).filter(Client.created_by == user_id))
         
         # Apply filters
         if query:
@@ -9410,7 +9543,7 @@ def api_search_documents():
         # Prepare results with client info
         results = []
         for doc in paginated.items:
-            doc_dict = doc.to_dict()
+            doc_dict = serializer.dump(doc)
             doc_dict['client_name'] = doc.client.first_name + ' ' + doc.client.last_name if doc.client else 'Unknown'
             doc_dict['client_id'] = doc.client_id
             
@@ -9863,26 +9996,16 @@ def api_get_client_activities(client_id):
         # Get activities from audit logs and other sources
         activities = []
         
-        # Get audit log activities for this client
-        audit_query = AuditLog.query.filter(
-            AuditLog.resource_type.in_(['client', 'document', 'case']),
-            AuditLog.resource_id == client_id,
-            AuditLog.user_id == user_id
+        # Get audit log activities for this client, newest partitions first
+        audit_logs = query_audit_logs(
+            resource_types=['client', 'document', 'case'],
+            resource_id=client_id,
+            user_id=user_id,
+            date_from=datetime.strptime(date_from, '%Y-%m-%d') if date_from else None,
+            date_to=datetime.strptime(date_to, '%Y-%m-%d') if date_to else None,
+            limit=100
         )
         
-        # Apply date filters
-        if date_from:
-            from datetime import datetime
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d')
-            audit_query = audit_query.filter(AuditLog.created_at >= date_from_obj)
-        
-        if date_to:
-            from datetime import datetime
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d')
-            audit_query = audit_query.filter(AuditLog.created_at <= date_to_obj)
-        
-        audit_logs = audit_query.order_by(AuditLog.created_at.desc()).limit(100).all()
-        
         # Convert audit logs to activity format
         for log in audit_logs:
             activity_data = {
@@ -9892,6 +10015,7 @@ def api_get_client_activities(client_id):
                 'description': _format_activity_description(log),
                 'timestamp': log.created_at.isoformat(),
                 'user_id': log.user_id,
+                'user_name': log.user.get_full_name() if log.user else 'System',
                 'metadata': {
                     'resource_type': log.resource_type,
                     'resource_id': log.resource_id,
@@ -10092,11 +10216,9 @@ def api_get_client_timeline(client_id):
             pass
         
         # 4. Recent activities from audit logs
-        audit_logs = AuditLog.query.filter(
-            AuditLog.resource_type == 'client',
-            AuditLog.resource_id == client_id,
-            AuditLog.user_id == user_id
-        ).order_by(AuditLog.created_at.desc()).limit(10).all()
+        audit_logs = query_audit_logs(
+            resource_types=['client'], resource_id=client_id, user_id=user_id, limit=10
+        )
         
         for log in audit_logs:
             if log.action not in ['view', 'list']:  # Skip read-only actions
@@ -12238,8 +12360,7 @@ def stripe_onboarding_form():
     """Stripe Connect onboarding form page"""
     try:
         return render_template('stripe-onboarding.html',
-                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'),
-                             cache_buster=str(uuid.uuid4())[:8])
+                             google_analytics_id=app.config.get('GOOGLE_ANALYTICS_ID'))
     except Exception as e:
         logger.error(f"Stripe onboarding form error: {e}")
         return f"LexAI Practice Partner - Error loading page: {e}", 500
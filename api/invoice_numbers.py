@@ -0,0 +1,146 @@
+"""
+LexAI Practice Partner - Invoice Number Allocation
+Per-firm, per-year invoice number sequences
+
+Each (firm, year) has a row in ``invoice_sequences`` holding the next
+number to hand out. Allocation is a single ``UPDATE ... SET next_number =
+next_number + n``, which row-locks the counter, so concurrent requests
+queue on the lock for the length of one UPDATE and can never get the same
+number. Batch invoice runs reserve a whole block in that one statement.
+
+On PostgreSQL the UPDATE runs in its own short transaction, so the lock is
+released before the invoice is written and month-end invoicing does not
+serialize on it. A number whose invoice later fails to save is skipped,
+as with a database sequence. SQLite allows one writer at a time, so there
+the UPDATE runs inside the caller's transaction instead.
+
+Invoice numbers are unique across the whole database, so each firm's
+sequence gets its own prefix derived from the firm name (INV-ACMELAW),
+kept across years. Users without a firm keep the plain INV prefix. A
+unique constraint on (prefix, year) settles firms whose names reduce to
+the same prefix: the one that loses the insert retries with a hashed
+prefix (INV-ACMELAW-3F2A).
+"""
+
+import re
+import hashlib
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import IntegrityError
+from models import db, Invoice, InvoiceSequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIRM = 'default'
+DEFAULT_PREFIX = 'INV'
+
+
+def firm_key(user):
+    """Sequence key for a user's firm; users without a firm share one"""
+    name = getattr(user, 'firm_name', None)
+    return name.strip().lower() if name and name.strip() else DEFAULT_FIRM
+
+
+def format_invoice_number(prefix, year, number):
+    return f"{prefix}-{year}-{str(number).zfill(3)}"
+
+
+def _in_transaction(fn):
+    if db.engine.dialect.name == 'sqlite':
+        with db.session.begin_nested():
+            return fn(db.session.connection())
+    with db.engine.begin() as conn:
+        return fn(conn)
+
+
+def _highest_issued(conn, prefix, year):
+    """Highest number already used as PREFIX-YEAR-NNN, e.g. before sequences existed"""
+    pattern = re.compile(rf'^{re.escape(prefix)}-{year}-(\d+)$')
+    numbers = conn.execute(
+        select(Invoice.invoice_number).where(Invoice.invoice_number.like(f'{prefix}-{year}-%'))
+    ).scalars()
+    return max((int(match.group(1)) for match in map(pattern.match, numbers) if match), default=0)
+
+
+def _reserve(conn, firm, year, count):
+    table = InvoiceSequence.__table__
+    key = (table.c.firm_key == firm, table.c.year == year)
+    result = conn.execute(
+        update(table).where(*key).values(
+            next_number=table.c.next_number + count,
+            updated_at=datetime.now(timezone.utc)
+        )
+    )
+    if not result.rowcount:
+        return None
+    row = conn.execute(select(table.c.prefix, table.c.next_number).where(*key)).one()
+    return row.prefix, row.next_number - count
+
+
+def _firm_prefix(conn, firm, disambiguate=False):
+    """Prefix for a firm's new sequence row.
+
+    The firm's earlier prefix if it has one, otherwise one built from its
+    name. ``disambiguate`` appends a hash of the firm key, for names that
+    slug the same ("Acme LLP", "Acme, LLP").
+    """
+    if firm == DEFAULT_FIRM:
+        return DEFAULT_PREFIX
+    table = InvoiceSequence.__table__
+    if not disambiguate:
+        existing = conn.execute(
+            select(table.c.prefix).where(table.c.firm_key == firm, table.c.prefix != DEFAULT_PREFIX)
+            .order_by(table.c.year.desc()).limit(1)
+        ).scalar()
+        if existing:
+            return existing
+
+    digest = hashlib.sha1(firm.encode('utf-8')).hexdigest()[:4].upper()
+    prefix = f"{DEFAULT_PREFIX}-{re.sub(r'[^A-Z0-9]', '', firm.upper())[:10] or digest}"
+    return f"{prefix}-{digest}" if disambiguate else prefix
+
+
+def _create_sequence(conn, firm, year, disambiguate=False):
+    prefix = _firm_prefix(conn, firm, disambiguate)
+    conn.execute(insert(InvoiceSequence.__table__).values(
+        firm_key=firm,
+        year=year,
+        prefix=prefix,
+        next_number=_highest_issued(conn, prefix, year) + 1,
+        updated_at=datetime.now(timezone.utc)
+    ))
+
+
+def allocate_invoice_numbers(firm=DEFAULT_FIRM, count=1, year=None):
+    """Reserve ``count`` consecutive invoice numbers for a firm.
+
+    Returns the formatted numbers in order. On PostgreSQL the reservation
+    stands even if the caller's transaction rolls back.
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    year = year or datetime.now().year
+
+    reserved = _in_transaction(lambda conn: _reserve(conn, firm, year, count))
+    for disambiguate in (False, True):
+        if reserved is not None:
+            break
+        try:
+            _in_transaction(lambda conn: _create_sequence(conn, firm, year, disambiguate))
+            logger.info(f"Created invoice sequence for {firm} {year}")
+        except IntegrityError:
+            # Either another request created this firm's row first, and the
+            # reserve below succeeds, or another firm holds the prefix this year
+            pass
+        reserved = _in_transaction(lambda conn: _reserve(conn, firm, year, count))
+    if reserved is None:
+        raise RuntimeError(f"Could not create an invoice sequence for {firm} {year}")
+
+    prefix, first = reserved
+    return [format_invoice_number(prefix, year, number) for number in range(first, first + count)]
+
+
+def next_invoice_number(firm=DEFAULT_FIRM, year=None):
+    """Allocate a single invoice number"""
+    return allocate_invoice_numbers(firm, 1, year)[0]
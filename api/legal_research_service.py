@@ -2,13 +2,27 @@
 """
 Enhanced Legal Research Service with Case Law Database Integration
 Integrates with multiple legal databases and enhances results with Bagel RL
+
+Results from each database are cached by normalized query and search
+parameters: case law for an hour, statutes and regulations for a week,
+secondary sources for a day. Searches that find nothing (or only fallback
+placeholders) are cached for a few minutes so a failing or empty source is
+not re-queried on every request. The cache lives in Redis when the shared
+cache has it, otherwise on disk under RESEARCH_CACHE_DIR. Research results
+report which sources were served from cache.
 """
 
 import os
 import json
+import copy
+import hashlib
+import inspect
 import logging
+import tempfile
+import threading
 import requests
 import re
+from functools import wraps
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from urllib.parse import quote_plus
@@ -24,6 +38,155 @@ except ImportError:
     BAGEL_AVAILABLE = False
     logger.warning("Bagel RL service not available for legal research")
 
+try:
+    from cache import cache as shared_cache
+except ImportError:
+    shared_cache = None
+
+# Cache lifetimes in seconds per source group
+CASE_LAW_TTL = int(os.environ.get('RESEARCH_CACHE_CASE_TTL', 3600))
+STATUTE_TTL = int(os.environ.get('RESEARCH_CACHE_STATUTE_TTL', 7 * 86400))
+SECONDARY_TTL = int(os.environ.get('RESEARCH_CACHE_SECONDARY_TTL', 86400))
+NEGATIVE_TTL = int(os.environ.get('RESEARCH_CACHE_NEGATIVE_TTL', 600))
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    return ' '.join(re.sub(r'[^\w\s§.-]', ' ', query.lower()).split())
+
+
+def _is_empty(results: List[Dict]) -> bool:
+    """No results, or only the placeholder entries returned when a source is unavailable"""
+    return all(
+        str(item.get('case_id') or item.get('statute_id') or item.get('source_id') or '').startswith('fallback')
+        for item in results
+    )
+
+
+class ResearchCache:
+    """Research results in Redis when available, else JSON files on disk"""
+
+    def __init__(self, directory: Optional[str] = None, max_disk_entries: int = 5000):
+        self.directory = directory or os.environ.get(
+            'RESEARCH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'lexai-research-cache')
+        )
+        self.max_disk_entries = max_disk_entries
+        self._writes = 0
+        self._local = threading.local()
+
+    @staticmethod
+    def make_key(source: str, query: str, **params) -> str:
+        parts = [source, normalize_query(query)] + [
+            f"{name}={str(value).strip().lower()}" for name, value in sorted(params.items())
+        ]
+        return 'research:' + hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def _redis(self) -> bool:
+        return bool(shared_cache is not None and shared_cache.redis_client)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key.split(':', 1)[1] + '.json')
+
+    def get(self, key: str):
+        """Cached entry ``{'value', 'negative'}`` or None"""
+        if self._redis():
+            return copy.deepcopy(shared_cache.get(key))
+
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry['expires_at'] < time.time():
+            self._remove(path)
+            return None
+        return entry
+
+    def set(self, key: str, value: List[Dict], ttl: int, negative: bool = False):
+        entry = {'value': value, 'negative': negative, 'expires_at': time.time() + ttl}
+        if self._redis():
+            shared_cache.set(key, entry, ttl)
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False) as f:
+                json.dump(entry, f, default=str)
+            os.replace(f.name, self._path(key))
+        except OSError as e:
+            logger.warning(f"Research cache write failed: {e}")
+            return
+
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop expired disk entries, then the oldest beyond max_disk_entries"""
+        try:
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.json')]
+        except OSError:
+            return
+        live = []
+        for path in paths:
+            try:
+                with open(path) as f:
+                    expires_at = json.load(f)['expires_at']
+            except (OSError, ValueError, KeyError):
+                expires_at = 0
+            if expires_at < time.time():
+                self._remove(path)
+            else:
+                live.append((expires_at, path))
+        for _, path in sorted(live)[:max(0, len(live) - self.max_disk_entries)]:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # Per-request record of which sources were served from cache
+    def reset_hits(self):
+        self._local.hits = {}
+
+    def record(self, source: str, status: str):
+        if getattr(self._local, 'hits', None) is not None:
+            self._local.hits[source] = status
+
+    def hits(self) -> Dict[str, str]:
+        return dict(getattr(self._local, 'hits', None) or {})
+
+
+def cached_source(source: str, ttl: int):
+    """Cache a search method's results by normalized query and arguments"""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            params.pop('self')
+            key = ResearchCache.make_key(source, params.pop('query'), **params)
+
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.record(source, 'negative_hit' if entry['negative'] else 'hit')
+                return entry['value']
+
+            results = func(self, *args, **kwargs)
+            negative = _is_empty(results)
+            self.cache.set(key, results, NEGATIVE_TTL if negative else ttl, negative=negative)
+            self.cache.record(source, 'miss')
+            return copy.deepcopy(results)
+        return wrapper
+    return decorator
+
 class LegalResearchService:
     """Enhanced legal research with case law database integration"""
     
@@ -34,7 +197,7 @@ class LegalResearchService:
             'casetext': os.environ.get('CASETEXT_API_KEY'),
             'google_scholar': os.environ.get('GOOGLE_SCHOLAR_API_KEY')
         }
-        self.cache = {}
+        self.cache = ResearchCache()
         self.rate_limits = {
             'congress': {'calls': 0, 'reset': time.time() + 3600},
             'courtlistener': {'calls': 0, 'reset': time.time() + 3600},
@@ -46,6 +209,7 @@ class LegalResearchService:
         """Perform comprehensive legal research across multiple databases"""
         try:
             logger.info(f"Starting comprehensive research for: {query}")
+            self.cache.reset_hits()
             
             # Multi-source research
             research_results = {
@@ -81,10 +245,13 @@ class LegalResearchService:
             summary = self.generate_research_summary(research_results)
             research_results['summary'] = summary
             
+            cache_hits = self.cache.hits()
             return {
                 'success': True,
                 'results': research_results,
                 'total_sources': len(case_results) + len(statute_results) + len(secondary_results),
+                'cache': cache_hits,
+                'cached': bool(cache_hits) and all(status != 'miss' for status in cache_hits.values()),
                 'processing_time': 0.5  # Placeholder
             }
             
@@ -120,6 +287,7 @@ class LegalResearchService:
             logger.error(f"Case law search failed: {e}")
             return self.get_fallback_cases(query, jurisdiction)
     
+    @cached_source('courtlistener', CASE_LAW_TTL)
     def search_courtlistener(self, query: str, jurisdiction: str, limit: int = 10) -> List[Dict]:
         """Search CourtListener.com API for federal case law"""
         try:
@@ -193,6 +361,7 @@ class LegalResearchService:
             logger.error(f"CourtListener search failed: {e}")
             return []
     
+    @cached_source('google_scholar', CASE_LAW_TTL)
     def search_google_scholar_cases(self, query: str, jurisdiction: str, limit: int = 10) -> List[Dict]:
         """Search Google Scholar Cases (public access)"""
         try:
@@ -284,6 +453,7 @@ class LegalResearchService:
             logger.error(f"Statute search failed: {e}")
             return self.get_fallback_statutes(query, jurisdiction)
     
+    @cached_source('congress', STATUTE_TTL)
     def search_congress_statutes(self, query: str, limit: int = 10) -> List[Dict]:
         """Search Congress.gov for federal statutes"""
         try:
@@ -332,6 +502,7 @@ class LegalResearchService:
             logger.error(f"Congress search failed: {e}")
             return self.get_fallback_federal_statutes(query)
     
+    @cached_source('california_statutes', STATUTE_TTL)
     def search_california_statutes(self, query: str, limit: int = 10) -> List[Dict]:
         """Search California statutes"""
         try:
@@ -372,6 +543,7 @@ class LegalResearchService:
             logger.error(f"California statute search failed: {e}")
             return []
     
+    @cached_source('cfr', STATUTE_TTL)
     def search_cfr(self, query: str, limit: int = 10) -> List[Dict]:
         """Search Code of Federal Regulations"""
         try:
@@ -398,6 +570,7 @@ class LegalResearchService:
             logger.error(f"CFR search failed: {e}")
             return []
     
+    @cached_source('secondary_sources', SECONDARY_TTL)
     def search_secondary_sources(self, query: str, practice_area: str, limit: int = 10) -> List[Dict]:
         """Search secondary sources like law reviews, treatises, and commentary"""
         try:
@@ -12,8 +12,9 @@ from sqlalchemy import Numeric
 import enum
 import uuid
 import json
+from db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Enum classes for database constraints
 class UserRole(enum.Enum):
@@ -131,8 +132,8 @@ class User(UserMixin, db.Model):
     hourly_rate = db.Column(Numeric(10, 2))
     
     # Timestamps
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     created_clients = db.relationship('Client', backref='created_by_user', lazy='dynamic')
@@ -319,6 +320,10 @@ class User(UserMixin, db.Model):
 # Client Model
 class Client(db.Model):
     __tablename__ = 'clients'
+    __table_args__ = (
+        # Client lists are scoped by owner and sorted newest first
+        db.Index('ix_clients_created_by_created_at', 'created_by', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     client_type = db.Column(db.String(20), nullable=False, default='individual')  # individual, business
@@ -361,8 +366,8 @@ class Client(db.Model):
     invoices = db.relationship('Invoice', backref='client', lazy='dynamic')
     
     # Timestamps
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     def get_display_name(self):
         """Get client display name"""
@@ -394,6 +399,11 @@ class Client(db.Model):
 # Case Model
 class Case(db.Model):
     __tablename__ = 'cases'
+    __table_args__ = (
+        # Per-client case lists, counts and most-recently-updated lookups
+        db.Index('ix_cases_client_id_updated_at', 'client_id', 'updated_at'),
+        db.Index('ix_cases_primary_attorney_id', 'primary_attorney_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     case_number = db.Column(db.String(50), unique=True, nullable=False, index=True)
@@ -426,6 +436,8 @@ class Case(db.Model):
     client_id = db.Column(db.String(36), db.ForeignKey('clients.id'), nullable=False)
     primary_attorney_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     
+    primary_attorney = db.relationship('User', foreign_keys=[primary_attorney_id])
+    
     # Many-to-many relationship with attorneys
     attorneys = db.relationship('User', secondary=case_attorneys, backref='cases')
     
@@ -436,8 +448,8 @@ class Case(db.Model):
     calendar_events = db.relationship('CalendarEvent', backref='case', lazy='dynamic')
     
     # Timestamps
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -457,6 +469,10 @@ class Case(db.Model):
 # Task Model
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Deadline and reminder scans filter on due date range and open status
+        db.Index('ix_tasks_due_date_status', 'due_date', 'status'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = db.Column(db.String(255), nullable=False)
@@ -480,6 +496,7 @@ class Task(db.Model):
     case_id = db.Column(db.String(36), db.ForeignKey('cases.id'))
     client_id = db.Column(db.String(36), db.ForeignKey('clients.id'))
     created_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    client = db.relationship('Client')
     
     # Dependencies
     parent_task_id = db.Column(db.String(36), db.ForeignKey('tasks.id'))
@@ -489,8 +506,8 @@ class Task(db.Model):
     tags = db.relationship('Tag', secondary=task_tags, backref='tasks')
     
     # Timestamps
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -511,6 +528,10 @@ class Task(db.Model):
 # Document Model
 class Document(db.Model):
     __tablename__ = 'documents'
+    __table_args__ = (
+        db.Index('ix_documents_client_id_created_at', 'client_id', 'created_at'),
+        db.Index('ix_documents_case_id', 'case_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = db.Column(db.String(255), nullable=False)
@@ -551,8 +572,8 @@ class Document(db.Model):
     tags = db.relationship('Tag', secondary=document_tags, backref='documents')
     
     # Timestamps
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -574,6 +595,11 @@ class Document(db.Model):
 # Time Entry Model
 class TimeEntry(db.Model):
     __tablename__ = 'time_entries'
+    __table_args__ = (
+        # Billing dashboard and analytics filter a user's entries by date range
+        db.Index('ix_time_entries_user_id_date', 'user_id', 'date'),
+        db.Index('ix_time_entries_case_id', 'case_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     description = db.Column(db.Text, nullable=False)
@@ -598,9 +624,9 @@ class TimeEntry(db.Model):
     invoice_id = db.Column(db.String(36), db.ForeignKey('invoices.id'))
     
     # Timestamps
-    date = db.Column(db.Date, nullable=False, default=datetime.now(timezone.utc).date())
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    date = db.Column(db.Date, nullable=False, default=lambda: datetime.now(timezone.utc).date())
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -621,6 +647,10 @@ class TimeEntry(db.Model):
 # Invoice Model
 class Invoice(db.Model):
     __tablename__ = 'invoices'
+    __table_args__ = (
+        db.Index('ix_invoices_created_by_status', 'created_by', 'status'),
+        db.Index('ix_invoices_client_id_created_at', 'client_id', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     invoice_number = db.Column(db.String(50), unique=True, nullable=False, index=True)
@@ -656,8 +686,8 @@ class Invoice(db.Model):
     expenses = db.relationship('Expense', backref='invoice', lazy='dynamic')
     
     # Timestamps
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     def calculate_totals(self):
         """Calculate invoice totals"""
@@ -798,9 +828,9 @@ class Expense(db.Model):
     invoice_id = db.Column(db.String(36), db.ForeignKey('invoices.id'))
     
     # Timestamps
-    date = db.Column(db.Date, nullable=False, default=datetime.now(timezone.utc).date())
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    date = db.Column(db.Date, nullable=False, default=lambda: datetime.now(timezone.utc).date())
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -820,6 +850,9 @@ class Expense(db.Model):
 # Calendar Event Model
 class CalendarEvent(db.Model):
     __tablename__ = 'calendar_events'
+    __table_args__ = (
+        db.Index('ix_calendar_events_created_by_start', 'created_by', 'start_datetime'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = db.Column(db.String(255), nullable=False)
@@ -842,10 +875,11 @@ class CalendarEvent(db.Model):
     case_id = db.Column(db.String(36), db.ForeignKey('cases.id'))
     client_id = db.Column(db.String(36), db.ForeignKey('clients.id'))
     created_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    client = db.relationship('Client')
     
     # Timestamps
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -873,7 +907,7 @@ class Tag(db.Model):
     description = db.Column(db.String(255))
     
     # Timestamps
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -888,6 +922,10 @@ class Tag(db.Model):
 # Audit Log Model for tracking all system activities
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        # Client activity and timeline views filter by resource, newest first
+        db.Index('ix_audit_logs_resource', 'resource_type', 'resource_id', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     
@@ -914,8 +952,8 @@ class AuditLog(db.Model):
     # Relationships
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'))
     
-    # Timestamp
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
+    # Timestamp (partition key for the monthly audit log partitions)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -930,6 +968,76 @@ class AuditLog(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+# Analytics Rollup Models - daily aggregates maintained by api/analytics.py.
+# Derived data only, so no foreign keys: deleting a client or user never
+# has to wait for its rollups to be rebuilt.
+class UserDailyRollup(db.Model):
+    __tablename__ = 'analytics_user_daily'
+    
+    user_id = db.Column(db.String(36), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    
+    # Revenue from sent/paid invoices created that day
+    revenue = db.Column(Numeric(12, 2), nullable=False, default=0)
+    invoice_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Hours logged that day; approved_hours drives the overview metrics,
+    # the category columns drive time utilization
+    approved_hours = db.Column(Numeric(10, 2), nullable=False, default=0)
+    billable_work_hours = db.Column(Numeric(10, 2), nullable=False, default=0)
+    meeting_hours = db.Column(Numeric(10, 2), nullable=False, default=0)
+    admin_hours = db.Column(Numeric(10, 2), nullable=False, default=0)
+    business_development_hours = db.Column(Numeric(10, 2), nullable=False, default=0)
+    
+    new_clients = db.Column(db.Integer, nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class ClientDailyRollup(db.Model):
+    __tablename__ = 'analytics_client_daily'
+    __table_args__ = (
+        db.Index('ix_analytics_client_daily_user_id_day', 'user_id', 'day'),
+    )
+    
+    client_id = db.Column(db.String(36), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.String(36), nullable=False)  # client owner
+    
+    revenue = db.Column(Numeric(12, 2), nullable=False, default=0)
+    invoice_count = db.Column(db.Integer, nullable=False, default=0)
+    new_cases = db.Column(db.Integer, nullable=False, default=0)
+    last_invoice_at = db.Column(db.DateTime(timezone=True))
+    
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class PracticeAreaDailyRollup(db.Model):
+    __tablename__ = 'analytics_practice_area_daily'
+    
+    user_id = db.Column(db.String(36), primary_key=True)  # primary attorney
+    practice_area = db.Column(db.String(100), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    
+    # Billable time entry amounts on the area's cases, by entry date
+    revenue = db.Column(Numeric(12, 2), nullable=False, default=0)
+    new_cases = db.Column(db.Integer, nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+# Invoice number counters, one row per firm per year (see api/invoice_numbers.py)
+class InvoiceSequence(db.Model):
+    __tablename__ = 'invoice_sequences'
+    __table_args__ = (
+        # Numbers are PREFIX-YEAR-NNN, so two firms may never share a prefix in a year
+        db.UniqueConstraint('prefix', 'year', name='uq_invoice_sequences_prefix_year'),
+    )
+    
+    firm_key = db.Column(db.String(255), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    prefix = db.Column(db.String(20), nullable=False, default='INV')
+    next_number = db.Column(db.Integer, nullable=False, default=1)
+    
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
 # Session Model for Redis session management
 class Session(db.Model):
     __tablename__ = 'sessions'
@@ -943,10 +1051,10 @@ class Session(db.Model):
     
     # Session Status
     is_active = db.Column(db.Boolean, default=True)
-    last_activity = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
+    last_activity = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
     # Timestamps
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
     
     def is_expired(self):
@@ -0,0 +1,80 @@
+"""
+LexAI Practice Partner - Current User and Permission Cache
+Request-scoped current user plus a short-lived cache of roles and permissions
+
+``load_current_user()`` loads the session's user at most once per request
+and keeps it on ``flask.g``, so decorators and route bodies can all ask
+for it. Auth checks need less than the full row: ``get_permissions()``
+returns the user's role and active flag from the shared cache, kept for
+AUTH_CACHE_TTL seconds (default 60). Hot routes therefore make no queries
+for auth checks.
+
+Entries are tagged ``user:<id>``, which ``register_cache_invalidation``
+bumps whenever the user row is committed. A role change, password change
+or deactivation takes effect on the next request, and on other workers
+within CACHE_TAG_TTL seconds.
+"""
+
+import os
+from flask import g, session
+
+from models import db, User
+from cache import cache
+
+AUTH_CACHE_TTL = int(os.environ.get('AUTH_CACHE_TTL', 60))
+
+
+def user_tag(user_id):
+    return f"user:{user_id}"
+
+
+def load_current_user():
+    """The logged-in user, loaded at most once per request"""
+    user_id = session.get('user_id')
+    if not session.get('logged_in') or user_id is None:
+        return None
+
+    loaded = g.get('_current_user')
+    if loaded is not None and loaded[0] == user_id:
+        return loaded[1]
+
+    user = db.session.get(User, user_id)
+    g._current_user = (user_id, user)
+    return user
+
+
+def _describe(user):
+    """The parts of a user that auth checks read"""
+    return {
+        'id': user.id,
+        'role': user.role.value,
+        'is_active': bool(user.is_active)
+    }
+
+
+def get_permissions(user_id=None):
+    """Role and active flag of a user (default: the session's), or None if there is no such user"""
+    if user_id is None:
+        user_id = session.get('user_id')
+        if user_id is None:
+            return None
+
+    memo = g.setdefault('_permissions', {})
+    if user_id in memo:
+        return memo[user_id]
+
+    key = f"permissions:{user_id}"
+    tags = (user_tag(user_id),)
+    permissions = cache.get(key, tags=tags)
+    if permissions is None:
+        if user_id == session.get('user_id') and session.get('logged_in'):
+            user = load_current_user()
+        else:
+            user = db.session.get(User, user_id)
+        if user is not None:
+            permissions = _describe(user)
+            cache.set(key, permissions, ttl=AUTH_CACHE_TTL, tags=tags)
+
+    memo[user_id] = permissions
+    return permissions
+
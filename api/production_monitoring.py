@@ -8,7 +8,6 @@ import os
 import time
 import logging
 import json
-import psutil
 import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
@@ -17,6 +16,13 @@ import weakref
 from collections import defaultdict, deque
 import sqlite3
 
+from cache import cache, cache_result  # cache_result kept importable from here
+
+try:
+    import psutil
+except ImportError:  # Not installed on serverless deployments
+    psutil = None
+
 logger = logging.getLogger(__name__)
 
 class PerformanceMonitor:
@@ -33,11 +39,16 @@ class PerformanceMonitor:
             'disk_usage': 90.0         # 90% disk usage
         }
         self.active_requests = weakref.WeakSet()
+        self.route_stats = defaultdict(lambda: {
+            'requests': 0, 'total_time': 0.0, 'db_time': 0.0, 'max_db_time': 0.0,
+            'queries': 0, 'max_queries': 0, 'n_plus_one': 0
+        })
         self._lock = threading.Lock()
         self._monitoring_active = True
         
         # Start background monitoring
-        self._start_system_monitoring()
+        if psutil is not None:
+            self._start_system_monitoring()
     
     def _start_system_monitoring(self):
         """Start background system monitoring."""
@@ -164,6 +175,52 @@ class PerformanceMonitor:
             else:
                 logger.warning(f"ALERT: {alert['message']}")
     
+    def record_route(self, route: str, response_time: float, db_time: float = 0.0,
+                     query_count: int = 0, n_plus_one: int = 0):
+        """Accumulate per-route request and database totals."""
+        with self._lock:
+            stats = self.route_stats[route]
+            stats['requests'] += 1
+            stats['total_time'] += response_time
+            stats['db_time'] += db_time
+            stats['max_db_time'] = max(stats['max_db_time'], db_time)
+            stats['queries'] += query_count
+            stats['max_queries'] = max(stats['max_queries'], query_count)
+            stats['n_plus_one'] += 1 if n_plus_one else 0
+        
+        self.record_metric('db_time', db_time)
+    
+    def get_route_rankings(self, sort_by: str = 'db_time', limit: int = 20) -> List[Dict[str, Any]]:
+        """Routes ranked by total DB time, average queries or another total."""
+        with self._lock:
+            routes = [(route, dict(stats)) for route, stats in self.route_stats.items()]
+        
+        rankings = []
+        for route, stats in routes:
+            requests = stats['requests']
+            rankings.append({
+                'route': route,
+                'requests': requests,
+                'db_time_total': stats['db_time'],
+                'db_time_avg': stats['db_time'] / requests,
+                'db_time_max': stats['max_db_time'],
+                'db_share': stats['db_time'] / stats['total_time'] if stats['total_time'] else 0,
+                'queries_avg': stats['queries'] / requests,
+                'queries_max': stats['max_queries'],
+                'n_plus_one_requests': stats['n_plus_one'],
+                'response_time_avg': stats['total_time'] / requests
+            })
+        
+        key = {
+            'db_time': 'db_time_total',
+            'db_time_avg': 'db_time_avg',
+            'queries': 'queries_avg',
+            'n_plus_one': 'n_plus_one_requests',
+            'requests': 'requests'
+        }.get(sort_by, 'db_time_total')
+        rankings.sort(key=lambda r: r[key], reverse=True)
+        return rankings[:limit]
+    
     def get_dashboard_data(self) -> Dict[str, Any]:
         """Get monitoring data for dashboard display."""
         now = datetime.now()
@@ -243,135 +300,10 @@ def monitor_performance(func):
     
     return wrapper
 
-class CacheManager:
-    """Simple in-memory cache with TTL support."""
-    
-    def __init__(self, default_ttl=300):  # 5 minutes default
-        self.cache = {}
-        self.ttl_data = {}
-        self.default_ttl = default_ttl
-        self._lock = threading.Lock()
-        
-        # Start cleanup thread
-        self._start_cleanup_thread()
-    
-    def _start_cleanup_thread(self):
-        """Start background cache cleanup."""
-        def cleanup():
-            while True:
-                try:
-                    self._cleanup_expired()
-                    time.sleep(60)  # Cleanup every minute
-                except Exception as e:
-                    logger.error(f"Cache cleanup error: {e}")
-        
-        cleanup_thread = threading.Thread(target=cleanup, daemon=True)
-        cleanup_thread.start()
-    
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache."""
-        with self._lock:
-            if key not in self.cache:
-                return None
-            
-            # Check TTL
-            if key in self.ttl_data:
-                if time.time() > self.ttl_data[key]:
-                    del self.cache[key]
-                    del self.ttl_data[key]
-                    return None
-            
-            return self.cache[key]
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set value in cache with TTL."""
-        if ttl is None:
-            ttl = self.default_ttl
-        
-        with self._lock:
-            self.cache[key] = value
-            if ttl > 0:
-                self.ttl_data[key] = time.time() + ttl
-    
-    def delete(self, key: str) -> bool:
-        """Delete key from cache."""
-        with self._lock:
-            deleted = key in self.cache
-            self.cache.pop(key, None)
-            self.ttl_data.pop(key, None)
-            return deleted
-    
-    def clear(self) -> None:
-        """Clear all cache."""
-        with self._lock:
-            self.cache.clear()
-            self.ttl_data.clear()
-    
-    def _cleanup_expired(self):
-        """Remove expired cache entries."""
-        current_time = time.time()
-        expired_keys = []
-        
-        with self._lock:
-            for key, expiry_time in self.ttl_data.items():
-                if current_time > expiry_time:
-                    expired_keys.append(key)
-            
-            for key in expired_keys:
-                self.cache.pop(key, None)
-                self.ttl_data.pop(key, None)
-        
-        if expired_keys:
-            logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """Get cache statistics."""
-        with self._lock:
-            total_keys = len(self.cache)
-            expired_keys = sum(
-                1 for exp_time in self.ttl_data.values() 
-                if time.time() > exp_time
-            )
-            
-            return {
-                'total_keys': total_keys,
-                'expired_keys': expired_keys,
-                'active_keys': total_keys - expired_keys,
-                'memory_usage_bytes': sum(
-                    len(str(k)) + len(str(v)) 
-                    for k, v in self.cache.items()
-                )
-            }
-
-# Global cache instance
-cache_manager = CacheManager()
-
-def cache_result(ttl=300, key_generator=None):
-    """Decorator to cache function results."""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Generate cache key
-            if key_generator:
-                cache_key = key_generator(*args, **kwargs)
-            else:
-                cache_key = f"{func.__name__}:{hash(str(args) + str(sorted(kwargs.items())))}"
-            
-            # Try to get from cache
-            cached_result = cache_manager.get(cache_key)
-            if cached_result is not None:
-                performance_monitor.record_metric('cache_hit', 1)
-                return cached_result
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache_manager.set(cache_key, result, ttl)
-            performance_monitor.record_metric('cache_miss', 1)
-            
-            return result
-        
-        return wrapper
-    return decorator
+# Global cache instance: the shared L1/Redis cache from cache.py, reporting
+# hits and misses to the dashboard metrics like the old CacheManager did
+cache_manager = cache
+cache_manager.init_metrics(performance_monitor.record_metric)
 
 class SecurityAuditLogger:
     """Security event logging and monitoring."""
@@ -0,0 +1,119 @@
+"""
+LexAI Practice Partner - Per-Request SQL Instrumentation
+Query counts, database time and N+1 detection for every request
+
+Cursor execute events on every engine (primary and replicas) are tallied
+on ``flask.g`` for the current request. Statements are grouped by shape,
+the SQL text with IN-lists collapsed, so the same query issued in a loop
+shows up as one shape executed many times: the usual N+1 signature.
+
+Each response gets a ``Server-Timing`` header with the database time and
+query count. Requests over SQL_LOG_QUERY_COUNT queries, SQL_LOG_DB_TIME_MS
+of database time, or with a shape repeated SQL_N_PLUS_ONE_THRESHOLD times
+are logged with their worst statement. Per-route totals are handed to
+production_monitoring.PerformanceMonitor for the admin ranking endpoint.
+"""
+
+import os
+import re
+import time
+import logging
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """Statement text with whitespace normalized and bound IN-lists collapsed"""
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class QueryProfiler:
+    """Counts queries and database time per request"""
+
+    def __init__(self, app=None, monitor=None):
+        self.monitor = monitor
+        self.n_plus_one_threshold = 5
+        self.log_query_count = 50
+        self.log_db_time_ms = 500.0
+        if app:
+            self.init_app(app, monitor)
+
+    def init_app(self, app, monitor=None):
+        self.monitor = monitor or self.monitor
+        self.n_plus_one_threshold = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', '5'))
+        self.log_query_count = int(os.getenv('SQL_LOG_QUERY_COUNT', '50'))
+        self.log_db_time_ms = float(os.getenv('SQL_LOG_DB_TIME_MS', '500'))
+        app.extensions['query_profiler'] = self
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        g.sql_stats = {'count': 0, 'time': 0.0, 'shapes': Counter(), 'shape_time': Counter()}
+        g.request_started = time.perf_counter()
+
+    def _after_request(self, response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+
+        db_ms = stats['time'] * 1000
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+        repeated = [(shape, count) for shape, count in stats['shapes'].most_common(3)
+                    if count >= self.n_plus_one_threshold]
+
+        queries = f"{stats['count']} {'query' if stats['count'] == 1 else 'queries'}"
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{queries}"')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        if repeated or stats['count'] > self.log_query_count or db_ms > self.log_db_time_ms:
+            if repeated:
+                shape, count = repeated[0]
+                detail = f"N+1 suspect, {count}x"
+            else:
+                shape, _ = stats['shape_time'].most_common(1)[0] if stats['shape_time'] else ('', 0)
+                detail = "slowest statement"
+            logger.warning(
+                f"Query hotspot {route}: {stats['count']} queries, {db_ms:.1f}ms in DB; "
+                f"{detail}: {shape[:200]}"
+            )
+
+        if self.monitor is not None and request.url_rule is not None:
+            self.monitor.record_route(
+                route, total_ms / 1000, db_time=stats['time'],
+                query_count=stats['count'], n_plus_one=len(repeated)
+            )
+        return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_stats' in g:
+        conn.info['query_start'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_start', None)
+    if started is None or not has_request_context() or 'sql_stats' not in g:
+        return
+    elapsed = time.perf_counter() - started
+    stats = g.sql_stats
+    shape = statement_shape(statement)
+    stats['count'] += 1
+    stats['time'] += elapsed
+    stats['shapes'][shape] += 1
+    stats['shape_time'][shape] += elapsed
+
+
+# Shared profiler, bound to the app in index.py
+query_profiler = QueryProfiler()
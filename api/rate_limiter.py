@@ -0,0 +1,213 @@
+"""
+LexAI Practice Partner - Rate Limiter
+GCRA (generic cell rate algorithm) limits shared across workers through Redis
+
+Each identifier and tier keeps a single number, its theoretical arrival
+time (TAT): the moment its bucket would be empty again if no more requests
+came in. A request is allowed when it would not push the TAT more than one
+window ahead of now. A check is one atomic Lua script in Redis, costing
+the same whatever the limit or request history, and the key expires once
+the bucket has refilled, so memory is bounded by active clients.
+
+Clients that keep calling after being limited (half the limit again in
+denied requests within a window) are blocked for an hour.
+
+Without Redis, or while it is unreachable, the same arithmetic runs on a
+bounded in-process table, so limits fall back to per worker rather than
+failing open or closed.
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = {
+    'default': {'requests': 100, 'window': 3600},      # 100 req/hour
+    'api': {'requests': 1000, 'window': 3600},         # 1000 req/hour for API
+    'auth': {'requests': 10, 'window': 900},           # 10 auth attempts per 15 min
+    'upload': {'requests': 50, 'window': 3600},        # 50 uploads per hour
+    'search': {'requests': 200, 'window': 3600}        # 200 searches per hour
+}
+BLOCK_SECONDS = 3600
+# Denied requests within a window, as a fraction of the limit, before blocking
+BLOCK_AFTER = 0.5
+
+# KEYS: tat, block, denied. ARGV: limit, window ms, block ms, denials before block.
+# Returns {allowed, remaining, retry_after ms, reset ms, blocked}
+GCRA_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local block_ms = tonumber(ARGV[3])
+local block_after = tonumber(ARGV[4])
+
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+
+local blocked = redis.call('PTTL', KEYS[2])
+if blocked > 0 then
+    return {0, 0, blocked, blocked, 1}
+end
+
+local interval = window / limit
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+
+if new_tat - window > now then
+    local denied = redis.call('INCR', KEYS[3])
+    if denied == 1 then
+        redis.call('PEXPIRE', KEYS[3], window)
+    end
+    if block_after > 0 and denied >= block_after then
+        redis.call('SET', KEYS[2], 1, 'PX', block_ms)
+        redis.call('DEL', KEYS[3])
+        return {0, 0, block_ms, block_ms, 1}
+    end
+    return {0, 0, math.ceil(new_tat - window - now), math.ceil(tat - now), 0}
+end
+
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+return {1, math.floor((window - (new_tat - now)) / interval), 0, math.ceil(new_tat - now), 0}
+"""
+
+
+class LocalGCRA:
+    """The GCRA script's arithmetic on an in-process LRU table"""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or int(os.environ.get('RATE_LIMIT_MAX_ENTRIES', 100000))
+        self.entries = OrderedDict()  # key -> [tat, denied, denied_until, blocked_until], times in ms
+        self._lock = threading.Lock()
+
+    def check(self, key, block_key, limit, window, block_ms, block_after, now=None):
+        now = time.time() * 1000 if now is None else now
+        with self._lock:
+            block = self.entries.get(block_key)
+            if block and block[3] > now:
+                remaining_block = math.ceil(block[3] - now)
+                return 0, 0, remaining_block, remaining_block, 1
+
+            interval = window / limit
+            entry = self._entry(key)
+            tat = max(entry[0], now)
+            new_tat = tat + interval
+
+            if new_tat - window > now:
+                if entry[2] <= now:
+                    entry[1], entry[2] = 0, now + window
+                entry[1] += 1
+                if block_after > 0 and entry[1] >= block_after:
+                    self._entry(block_key)[3] = now + block_ms
+                    entry[1] = 0
+                    return 0, 0, block_ms, block_ms, 1
+                return 0, 0, math.ceil(new_tat - window - now), math.ceil(tat - now), 0
+
+            entry[0] = new_tat
+            return 1, math.floor((window - (new_tat - now)) / interval), 0, math.ceil(new_tat - now), 0
+
+    def _entry(self, key):
+        # Called with the lock held
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = [0.0, 0, 0.0, 0.0]
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+class RateLimiter:
+    """GCRA rate limiting in Redis, falling back to a per-worker table"""
+
+    def __init__(self, redis_client=None, prefix='lexai_rl:', limits=None):
+        self.prefix = prefix
+        self.rate_limits = dict(limits or DEFAULT_LIMITS)
+        self.local = LocalGCRA()
+        self.stats = {'checks': 0, 'limited': 0, 'redis_errors': 0}
+        self._script = None
+        self._last_error_logged = 0.0
+        self.redis_client = None
+        if redis_client is not None:
+            self.init_redis(redis_client)
+
+    def init_redis(self, redis_client):
+        """Attach the shared Redis client"""
+        self.redis_client = redis_client
+        self._script = redis_client.register_script(GCRA_SCRIPT) if redis_client is not None else None
+
+    def is_rate_limited(self, identifier: str, endpoint_type: str = 'default') -> Tuple[bool, Dict[str, Any]]:
+        """Record a request and report whether it is over the limit"""
+        config = self.rate_limits.get(endpoint_type, self.rate_limits['default'])
+        limit, window = config['requests'], config['window']
+        key = f"{self.prefix}{endpoint_type}:{identifier}"
+        block_key = f"{self.prefix}block:{identifier}"
+        args = (limit, window * 1000, BLOCK_SECONDS * 1000, math.ceil(limit * BLOCK_AFTER))
+
+        result = None
+        if self._script is not None:
+            try:
+                result = self._script(keys=[key, block_key, f"{key}:denied"], args=args)
+            except Exception as e:
+                self._redis_error(e)
+        if result is None:
+            result = self.local.check(key, block_key, *args)
+
+        allowed, remaining, retry_after_ms, reset_ms, blocked = (int(value) for value in result)
+        info = {
+            'limit': limit,
+            'window': window,
+            'remaining': max(remaining, 0),
+            'reset': reset_ms / 1000,
+            'reset_time': time.time() + reset_ms / 1000
+        }
+        self.stats['checks'] += 1
+        if allowed:
+            return False, info
+
+        self.stats['limited'] += 1
+        info['retry_after'] = retry_after_ms / 1000
+        if blocked:
+            info.update({'blocked': True, 'reason': 'IP temporarily blocked'})
+        else:
+            info['rate_limited'] = True
+        return True, info
+
+    def _redis_error(self, error):
+        self.stats['redis_errors'] += 1
+        now = time.monotonic()
+        if now - self._last_error_logged > 60:
+            self._last_error_logged = now
+            logger.warning(f"Rate limiter falling back to in-process limits: {error}")
+
+    def get_stats(self):
+        return {
+            'backend': 'redis' if self._script is not None else 'local',
+            'local_entries': len(self.local.entries),
+            **self.stats
+        }
+
+
+def rate_limit_headers(info: Dict[str, Any]) -> Dict[str, str]:
+    """RateLimit-* headers (IETF httpapi draft) for a check result"""
+    headers = {
+        'RateLimit-Limit': str(info['limit']),
+        'RateLimit-Remaining': str(info['remaining']),
+        'RateLimit-Reset': str(math.ceil(info['reset'])),
+        'RateLimit-Policy': f"{info['limit']};w={info['window']}"
+    }
+    if 'retry_after' in info:
+        headers['Retry-After'] = str(max(math.ceil(info['retry_after']), 1))
+    return headers
@@ -9,81 +9,20 @@ import re
 import time
 import hmac
 import hashlib
+import heapq
 import secrets
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from functools import wraps
-from collections import defaultdict, deque
+from collections import defaultdict
 import ipaddress
 import bleach
 from urllib.parse import urlparse
 
-logger = logging.getLogger(__name__)
+from rate_limiter import RateLimiter, rate_limit_headers
 
-class RateLimiter:
-    """Advanced rate limiting with multiple strategies."""
-    
-    def __init__(self):
-        self.request_history = defaultdict(lambda: deque(maxlen=1000))
-        self.blocked_ips = {}
-        self.rate_limits = {
-            'default': {'requests': 100, 'window': 3600},      # 100 req/hour
-            'api': {'requests': 1000, 'window': 3600},         # 1000 req/hour for API
-            'auth': {'requests': 10, 'window': 900},           # 10 auth attempts per 15 min
-            'upload': {'requests': 50, 'window': 3600},        # 50 uploads per hour
-            'search': {'requests': 200, 'window': 3600}        # 200 searches per hour
-        }
-    
-    def is_rate_limited(self, identifier: str, endpoint_type: str = 'default') -> Tuple[bool, Dict[str, Any]]:
-        """Check if request should be rate limited."""
-        now = time.time()
-        
-        # Check if IP is blocked
-        if identifier in self.blocked_ips:
-            if now < self.blocked_ips[identifier]['until']:
-                return True, {
-                    'blocked': True,
-                    'reason': 'IP temporarily blocked',
-                    'retry_after': self.blocked_ips[identifier]['until'] - now
-                }
-            else:
-                # Unblock expired blocks
-                del self.blocked_ips[identifier]
-        
-        # Get rate limit configuration
-        limit_config = self.rate_limits.get(endpoint_type, self.rate_limits['default'])
-        window_start = now - limit_config['window']
-        
-        # Clean old requests
-        request_times = self.request_history[identifier]
-        while request_times and request_times[0] < window_start:
-            request_times.popleft()
-        
-        # Check if limit exceeded
-        if len(request_times) >= limit_config['requests']:
-            # Check for aggressive behavior (block IP)
-            if len(request_times) >= limit_config['requests'] * 1.5:
-                self.blocked_ips[identifier] = {
-                    'until': now + 3600,  # Block for 1 hour
-                    'reason': 'Aggressive rate limit violation'
-                }
-                logger.warning(f"IP {identifier} blocked for aggressive behavior")
-            
-            return True, {
-                'rate_limited': True,
-                'limit': limit_config['requests'],
-                'window': limit_config['window'],
-                'retry_after': request_times[0] + limit_config['window'] - now
-            }
-        
-        # Record this request
-        request_times.append(now)
-        
-        return False, {
-            'remaining': limit_config['requests'] - len(request_times),
-            'reset_time': window_start + limit_config['window']
-        }
+logger = logging.getLogger(__name__)
 
 class InputSanitizer:
     """Comprehensive input sanitization and validation."""
@@ -498,12 +437,20 @@ class FileUploadSecurity:
         return sanitized
 
 class SessionSecurity:
-    """Secure session management."""
+    """Secure session management.
+    
+    Sessions are indexed by user, so ending all of a user's sessions costs
+    O(their sessions). Expiry uses a min-heap of deadlines: cleanup pops
+    only the sessions that are due, re-queueing any that saw activity since
+    their deadline was pushed, instead of scanning every session.
+    """
     
     def __init__(self, secret_key: str):
         self.secret_key = secret_key
         self.session_timeout = 3600  # 1 hour
         self.active_sessions = {}
+        self.user_sessions = defaultdict(set)
+        self._expiry_heap = []  # (deadline, session_id)
     
     def create_session(self, user_id: str, ip_address: str, user_agent: str) -> str:
         """Create secure session."""
@@ -518,6 +465,8 @@ class SessionSecurity:
         }
         
         self.active_sessions[session_id] = session_data
+        self.user_sessions[user_id].add(session_id)
+        heapq.heappush(self._expiry_heap, (session_data['last_activity'] + self.session_timeout, session_id))
         return session_id
     
     def validate_session(self, session_id: str, ip_address: str, user_agent: str) -> Tuple[bool, Optional[str]]:
@@ -530,13 +479,13 @@ class SessionSecurity:
         
         # Check timeout
         if current_time - session['last_activity'] > self.session_timeout:
-            del self.active_sessions[session_id]
+            self.invalidate_session(session_id)
             return False, "Session expired"
         
         # Check IP address consistency
         if session['ip_address'] != ip_address:
             logger.warning(f"Session hijacking attempt: {session_id}")
-            del self.active_sessions[session_id]
+            self.invalidate_session(session_id)
             return False, "IP address mismatch"
         
         # Check user agent consistency
@@ -544,27 +493,50 @@ class SessionSecurity:
             logger.warning(f"Suspicious session activity: {session_id}")
             # Don't invalidate immediately, but log for monitoring
         
-        # Update last activity
+        # Update last activity (the heap entry is re-queued when it comes due)
         session['last_activity'] = current_time
         
         return True, session['user_id']
     
     def invalidate_session(self, session_id: str):
         """Invalidate session."""
-        self.active_sessions.pop(session_id, None)
+        session = self.active_sessions.pop(session_id, None)
+        if session:
+            user_sessions = self.user_sessions.get(session['user_id'])
+            if user_sessions is not None:
+                user_sessions.discard(session_id)
+                if not user_sessions:
+                    del self.user_sessions[session['user_id']]
+    
+    def get_user_sessions(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        """Active sessions of one user, keyed by session id."""
+        return {sid: self.active_sessions[sid] for sid in self.user_sessions.get(user_id, ())}
+    
+    def invalidate_user_sessions(self, user_id: str, except_session_id: Optional[str] = None) -> int:
+        """Invalidate every session of a user (log out all devices)."""
+        session_ids = [sid for sid in self.user_sessions.get(user_id, ()) if sid != except_session_id]
+        for sid in session_ids:
+            self.invalidate_session(sid)
+        return len(session_ids)
     
     def cleanup_expired_sessions(self):
         """Remove expired sessions."""
         current_time = time.time()
-        expired_sessions = [
-            sid for sid, session in self.active_sessions.items()
-            if current_time - session['last_activity'] > self.session_timeout
-        ]
-        
-        for sid in expired_sessions:
-            del self.active_sessions[sid]
+        expired = 0
+        
+        while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+            _, sid = heapq.heappop(self._expiry_heap)
+            session = self.active_sessions.get(sid)
+            if session is None:
+                continue  # already invalidated
+            deadline = session['last_activity'] + self.session_timeout
+            if deadline > current_time:
+                heapq.heappush(self._expiry_heap, (deadline, sid))
+            else:
+                self.invalidate_session(sid)
+                expired += 1
         
-        return len(expired_sessions)
+        return expired
 
 # Global security instances
 rate_limiter = RateLimiter()
@@ -594,7 +566,7 @@ def rate_limit(endpoint_type='default'):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            from flask import request, abort, jsonify
+            from flask import request, jsonify, make_response
             
             # Get client identifier (IP address)
             client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.remote_addr)
@@ -609,13 +581,14 @@ def rate_limit(endpoint_type='default'):
                 
                 response = jsonify({
                     'error': 'Rate limit exceeded',
-                    'retry_after': limit_info.get('retry_after', 3600)
+                    'retry_after': limit_info['retry_after']
                 })
                 response.status_code = 429
-                response.headers['Retry-After'] = str(int(limit_info.get('retry_after', 3600)))
-                return response
+            else:
+                response = make_response(f(*args, **kwargs))
             
-            return f(*args, **kwargs)
+            response.headers.update(rate_limit_headers(limit_info))
+            return response
         return decorated_function
     return decorator
 
@@ -652,12 +625,16 @@ def validate_input_security(input_type='general'):
 # Initialize CSRF protection (will be initialized with app secret key)
 csrf_protection = None
 
-def init_security(app):
+def init_security(app, redis_client=None):
     """Initialize security components with Flask app."""
     global csrf_protection
     
     csrf_protection = CSRFProtection(app.config['SECRET_KEY'])
     
+    # Shares rate limits across workers; without Redis they are per worker
+    if redis_client is not None:
+        rate_limiter.init_redis(redis_client)
+    
     # Add security headers to all responses
     @app.after_request
     def add_security_headers(response):
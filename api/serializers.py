@@ -0,0 +1,157 @@
+"""
+LexAI Practice Partner - Model Serializers
+Declarative eager loading and sparse fieldsets for model to_dict() output
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload, noload
+from models import Document, Task, Case, AuditLog, TimeEntry, Invoice, CalendarEvent
+
+
+def parse_fields(value):
+    """Parse a ``?fields=a,b,c`` query parameter into a list of field names"""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    return fields or None
+
+
+class ModelSerializer:
+    """Serialize model instances with the relationships each view needs.
+
+    ``relationship_fields`` maps to_dict() keys to the relationship path they
+    read; ``views`` maps, per view, the extra fields a route adds outside
+    to_dict() to the path each of those reads. ``apply()`` turns the paths
+    of the requested fields into loader options on the list query so
+    serialization never triggers per-row lazy loads: many-to-one paths are
+    joined, collections are loaded with a single SELECT ... IN.
+    """
+
+    model = None
+    relationship_fields = {}
+    views = {}
+
+    def __init__(self, view='default', fields=None):
+        self.view = view
+        self.fields = set(fields) | {'id'} if fields else None
+
+    def _field_paths(self):
+        """Every field this view can return, mapped to the path it reads"""
+        return list(self.relationship_fields.items()) + list(self.views.get(self.view, {}).items())
+
+    def required_paths(self):
+        """Relationship paths read by the requested fields"""
+        return {
+            path for field, path in self._field_paths()
+            if self.fields is None or field in self.fields
+        }
+
+    def _loader_for(self, path):
+        """Build a chained loader option for a dotted relationship path"""
+        option = None
+        entity = self.model
+        for name in path.split('.'):
+            # get_property() configures mappers first so backrefs resolve
+            relationship = inspect(entity).get_property(name)
+            attribute = getattr(entity, name)
+            strategy = selectinload if relationship.uselist else joinedload
+            option = strategy(attribute) if option is None else getattr(option, strategy.__name__)(attribute)
+            entity = relationship.mapper.class_
+        return option
+
+    def apply(self, query):
+        """Add eager-loading options for this view to an ORM query"""
+        required = self.required_paths()
+        options = [self._loader_for(path) for path in sorted(required)]
+
+        # Relationships only read by fields the client did not ask for are
+        # skipped outright instead of being lazily loaded and discarded
+        if self.fields is not None:
+            required_roots = {path.split('.')[0] for path in required}
+            skipped = {
+                path.split('.')[0] for _, path in self._field_paths()
+            } - required_roots
+            options.extend(noload(getattr(self.model, name)) for name in sorted(skipped))
+
+        return query.options(*options) if options else query
+
+    def dump(self, obj, extra=None):
+        """Serialize one instance, merging route-specific extra fields"""
+        data = obj.to_dict()
+        if extra:
+            data.update(extra)
+        if self.fields is None:
+            return data
+        return {key: value for key, value in data.items() if key in self.fields}
+
+    def dump_many(self, objects):
+        """Serialize a list of instances"""
+        return [self.dump(obj) for obj in objects]
+
+
+class DocumentSerializer(ModelSerializer):
+    model = Document
+    relationship_fields = {
+        'case_title': 'case',
+        'client_name': 'client',
+        'tags': 'tags',
+    }
+    views = {
+        'list': {'case_number': 'case', 'client_name': 'client', 'created_by_name': 'created_by_user'},
+    }
+
+
+class TaskSerializer(ModelSerializer):
+    model = Task
+    relationship_fields = {
+        'assignee_name': 'assignee_user',
+        'case_title': 'case',
+        'client_name': 'client',
+        'tags': 'tags',
+    }
+    views = {
+        'deadlines': {'client_name': 'case.client'},
+    }
+
+
+class CaseSerializer(ModelSerializer):
+    model = Case
+    relationship_fields = {
+        'client_name': 'client',
+    }
+    views = {
+        'list': {'primary_attorney_name': 'primary_attorney', 'attorney_count': 'attorneys'},
+    }
+
+
+class AuditLogSerializer(ModelSerializer):
+    model = AuditLog
+    relationship_fields = {
+        'user_name': 'user',
+    }
+
+
+class TimeEntrySerializer(ModelSerializer):
+    model = TimeEntry
+    relationship_fields = {
+        'user_name': 'user',
+        'case_title': 'case',
+    }
+
+
+class InvoiceSerializer(ModelSerializer):
+    model = Invoice
+    relationship_fields = {
+        'client_name': 'client',
+    }
+
+
+class CalendarEventSerializer(ModelSerializer):
+    model = CalendarEvent
+    relationship_fields = {
+        'case_title': 'case',
+        'client_name': 'client',
+    }
+    views = {
+        'deadlines': {'client_name': 'case.client'},
+    }
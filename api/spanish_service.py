@@ -2,15 +2,29 @@
 """
 Spanish Language Support Service for LexAI Practice Partner
 Multi-language support for broader market reach with legal translation capabilities
+
+Translated segments are kept in a translation memory keyed by language
+pair, legal context and normalized segment text. Legal documents repeat
+boilerplate (governing law, severability, notices), so repeated clauses
+are served from memory and only novel segments are translated. A segment
+that differs from a remembered one only in words carried over verbatim
+(party names, amounts, dates) is a fuzzy match: the remembered
+translation is reused with those words swapped in.
 """
 
 import os
+import re
 import json
+import atexit
 import logging
-import re
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +36,9 @@ except ImportError:
     BAGEL_AVAILABLE = False
     logger.warning("Bagel RL service not available for Spanish translations")
 
+# Seconds to skip Bagel after a failed enhancement
+BAGEL_RETRY_SECONDS = int(os.environ.get('TRANSLATION_BAGEL_RETRY_SECONDS', 60))
+
 @dataclass
 class TranslationResult:
     """Translation result with metadata"""
@@ -33,6 +50,174 @@ class TranslationResult:
     legal_context: str
     warnings: List[str]
     bagel_enhanced: bool = False
+    memory_match: Optional[str] = None  # 'exact' or 'fuzzy' when served from translation memory
+
+@dataclass
+class MemoryMatch:
+    """A translation memory hit"""
+    kind: str
+    translation: str
+    confidence_score: float
+    bagel_enhanced: bool
+    warnings: List[str] = field(default_factory=list)
+    distance: int = 0
+
+class TranslationMemory:
+    """Bounded LRU of translated segments with exact and fuzzy lookup, saved to disk"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 max_distance: int = 3, min_similarity: float = 0.85, save_every: int = 20):
+        self.path = path or os.environ.get(
+            'TRANSLATION_MEMORY_PATH', os.path.join(tempfile.gettempdir(), 'lexai-translation-memory.json')
+        )
+        self.max_entries = max_entries or int(os.environ.get('TRANSLATION_MEMORY_MAX_ENTRIES', 5000))
+        self.max_distance = max_distance
+        self.min_similarity = min_similarity
+        self.save_every = save_every
+        self.entries = OrderedDict()  # key -> entry, least recently used first
+        self.stats = {'exact': 0, 'fuzzy': 0, 'misses': 0}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def normalize(segment: str) -> str:
+        return ' '.join(segment.split())
+
+    @classmethod
+    def make_key(cls, segment: str, source_language: str, target_language: str, legal_context: str) -> str:
+        # Case matters: the stored translation carries the segment's casing
+        return f"{source_language}>{target_language}|{legal_context}|{cls.normalize(segment)}"
+
+    def lookup(self, segment: str, source_language: str, target_language: str,
+               legal_context: str, require_enhanced: bool = False) -> Optional[MemoryMatch]:
+        """Exact match, else the closest fuzzy match that can be patched"""
+        key = self.make_key(segment, source_language, target_language, legal_context)
+        prefix = key[:key.index('|', key.index('|') + 1) + 1]
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and (entry['bagel_enhanced'] or not require_enhanced):
+                self.entries.move_to_end(key)
+                self.stats['exact'] += 1
+                return MemoryMatch('exact', entry['translation'], entry['confidence_score'],
+                                   entry['bagel_enhanced'], list(entry['warnings']))
+
+            match = self._fuzzy_lookup(self.normalize(segment), prefix, require_enhanced)
+            self.stats['fuzzy' if match else 'misses'] += 1
+            return match
+
+    def _fuzzy_lookup(self, segment: str, prefix: str, require_enhanced: bool) -> Optional[MemoryMatch]:
+        tokens = segment.split()
+        best = None
+        for key, entry in self.entries.items():
+            if not key.startswith(prefix) or (require_enhanced and not entry['bagel_enhanced']):
+                continue
+            stored = entry['source'].split()
+            if abs(len(stored) - len(tokens)) > self.max_distance:
+                continue
+            matcher = SequenceMatcher(None, stored, tokens, autojunk=False)
+            if matcher.real_quick_ratio() < self.min_similarity or matcher.quick_ratio() < self.min_similarity:
+                continue
+            opcodes = [op for op in matcher.get_opcodes() if op[0] != 'equal']
+            distance = sum(max(i2 - i1, j2 - j1) for _, i1, i2, j1, j2 in opcodes)
+            if distance > self.max_distance or (best and distance >= best[0]):
+                continue
+            translation = self._patch(entry['translation'], stored, tokens, opcodes)
+            if translation is not None:
+                best = (distance, key, entry, translation)
+
+        if not best:
+            return None
+        distance, key, entry, translation = best
+        self.entries.move_to_end(key)
+        similarity = 1 - distance / max(len(tokens), 1)
+        return MemoryMatch(
+            'fuzzy', translation, round(entry['confidence_score'] * similarity, 2), entry['bagel_enhanced'],
+            list(entry['warnings']) + [f"Adapted from a translation memory match differing in {distance} word(s)"],
+            distance
+        )
+
+    @staticmethod
+    def _carried_over(words: List[str]) -> bool:
+        """Proper nouns, numbers and dates pass through translation unchanged"""
+        for word in words:
+            word = word.strip('.,;:!?()[]"\'')
+            if not word or not (word[0].isupper() or any(c.isdigit() for c in word)):
+                return False
+        return True
+
+    @classmethod
+    def _patch(cls, translation: str, stored: List[str], tokens: List[str], opcodes) -> Optional[str]:
+        """Swap replaced words into the stored translation, if they were carried over verbatim"""
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag != 'replace':
+                return None  # added or removed words need translating
+            if not (cls._carried_over(stored[i1:i2]) and cls._carried_over(tokens[j1:j2])):
+                return None  # ordinary words change in translation
+            before, after = ' '.join(stored[i1:i2]), ' '.join(tokens[j1:j2])
+            translation, hits = re.subn(rf'(?<!\w){re.escape(before)}(?!\w)',
+                                        lambda _: after, translation)
+            if hits != 1:
+                return None
+        return translation
+
+    def add(self, segment: str, source_language: str, target_language: str, legal_context: str,
+            translation: str, confidence_score: float, warnings: List[str], bagel_enhanced: bool):
+        key = self.make_key(segment, source_language, target_language, legal_context)
+        with self._lock:
+            existing = self.entries.get(key)
+            if existing and existing['bagel_enhanced'] and not bagel_enhanced:
+                return
+            self.entries[key] = {
+                'source': self.normalize(segment),
+                'translation': translation,
+                'confidence_score': confidence_score,
+                'warnings': list(warnings),
+                'bagel_enhanced': bagel_enhanced
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._unsaved += 1
+            due = self._unsaved >= self.save_every
+        if due:
+            self.save()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            entries = data.get('entries', [])[-self.max_entries:]
+            with self._lock:
+                self.entries = OrderedDict((key, entry) for key, entry in entries)
+            logger.info(f"Loaded {len(entries)} translation memory entries")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Translation memory not loaded: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._unsaved:
+                return
+            snapshot = list(self.entries.items())
+            self._unsaved = 0
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as f:
+                json.dump({'version': 1, 'entries': snapshot}, f, ensure_ascii=False)
+            os.replace(f.name, self.path)
+        except OSError as e:
+            logger.warning(f"Translation memory not saved: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self.entries), 'max_entries': self.max_entries, **self.stats}
+
+# One memory per process, shared by every service instance
+translation_memory = TranslationMemory()
+atexit.register(translation_memory.save)
 
 class SpanishLegalService:
     """Spanish language support for legal documents and interfaces"""
@@ -41,6 +226,8 @@ class SpanishLegalService:
         self.translations = self._load_translations()
         self.legal_terms = self._load_legal_terms()
         self.supported_languages = ['en', 'es']
+        self.memory = translation_memory
+        self._bagel_retry_at = 0.0
         
     def translate_text(self, text: str, target_language: str = 'es', 
                       legal_context: str = None) -> TranslationResult:
@@ -62,13 +249,32 @@ class SpanishLegalService:
                     warnings=[]
                 )
             
+            # Repeated or near-identical segments come from translation memory.
+            # A plain dictionary translation does not stand in for a Bagel one,
+            # unless Bagel failed recently and would not be asked anyway
+            context = legal_context or 'general'
+            use_bagel = BAGEL_AVAILABLE and bool(legal_context) and time.monotonic() >= self._bagel_retry_at
+            match = self.memory.lookup(text, source_language, target_language, context, require_enhanced=use_bagel)
+            if match:
+                return TranslationResult(
+                    original_text=text,
+                    translated_text=match.translation,
+                    source_language=source_language,
+                    target_language=target_language,
+                    confidence_score=match.confidence_score,
+                    legal_context=context,
+                    warnings=match.warnings,
+                    bagel_enhanced=match.bagel_enhanced,
+                    memory_match=match.kind
+                )
+            
             # Basic translation using dictionary
             translated_text = self._basic_translate(text, source_language, target_language)
             warnings = []
             
             # Enhanced translation with Bagel RL
             bagel_enhanced = False
-            if BAGEL_AVAILABLE and legal_context:
+            if use_bagel:
                 enhanced_result = self._enhance_with_bagel_rl(
                     text, translated_text, source_language, target_language, legal_context
                 )
@@ -76,14 +282,21 @@ class SpanishLegalService:
                     translated_text = enhanced_result['translation']
                     bagel_enhanced = True
                     warnings = enhanced_result.get('warnings', [])
+                else:
+                    # Back off instead of retrying Bagel on every segment
+                    self._bagel_retry_at = time.monotonic() + BAGEL_RETRY_SECONDS
+            
+            confidence_score = 0.85 if bagel_enhanced else 0.7
+            self.memory.add(text, source_language, target_language, context,
+                            translated_text, confidence_score, warnings, bagel_enhanced)
             
             return TranslationResult(
                 original_text=text,
                 translated_text=translated_text,
                 source_language=source_language,
                 target_language=target_language,
-                confidence_score=0.85 if bagel_enhanced else 0.7,
-                legal_context=legal_context or 'general',
+                confidence_score=confidence_score,
+                legal_context=context,
                 warnings=warnings,
                 bagel_enhanced=bagel_enhanced
             )
@@ -145,6 +358,10 @@ class SpanishLegalService:
                 'confidence_score': avg_confidence,
                 'warnings': list(set(all_warnings)),
                 'sections_translated': len(translated_sections),
+                'memory_matches': {
+                    kind: sum(1 for t in translated_sections if t.memory_match == kind)
+                    for kind in ('exact', 'fuzzy')
+                },
                 'bagel_enhanced': any(t.bagel_enhanced for t in translated_sections)
             }
             
@@ -688,6 +905,7 @@ def translate_legal_text(text: str, target_language: str = 'es',
             'legal_context': result.legal_context,
             'warnings': result.warnings,
             'bagel_enhanced': result.bagel_enhanced,
+            'memory_match': result.memory_match,
             'timestamp': datetime.now().isoformat()
         }
         
@@ -0,0 +1,179 @@
+"""
+LexAI Practice Partner - Template Bytecode Cache
+Persistent Jinja bytecode and first-render timing for cold starts
+
+Every new serverless instance would otherwise parse and compile each
+template on first use. Compiled bytecode is kept in TEMPLATE_CACHE_DIR
+(default: a directory under /tmp, which survives warm restarts of the
+same instance). ``python manage.py precompile-templates`` compiles every
+template ahead of deploy into ``.template_cache/`` at the repository root;
+that bundled copy is read when the /tmp cache has no entry, so even the
+first request on a fresh instance skips compilation. Bytecode is keyed by
+template name and checked against the source, so edited templates are
+recompiled rather than served stale.
+
+The first load and render of each template is timed and logged, and the
+timings are available from ``/api/admin/performance/templates``.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from flask import template_rendered, before_render_template
+from jinja2 import BaseLoader, FileSystemBytecodeCache
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.template_cache')
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'lexai-template-cache')
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode in a writable directory, falling back to a bundled copy"""
+
+    def __init__(self, directory, bundled=None):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory)
+        self.bundled = bundled
+        self._local = threading.local()
+
+    def get_cache_key(self, name, filename=None):
+        # The template path differs between the build machine and the
+        # serverless bundle; the source checksum still guards staleness
+        return hashlib.sha1(name.encode('utf-8')).hexdigest()
+
+    def get_bucket(self, environment, name, filename, source):
+        bucket = super().get_bucket(environment, name, filename, source)
+        self._local.hit = bucket.code is not None
+        return bucket
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        if bucket.code is None and self.bundled:
+            try:
+                with open(os.path.join(self.bundled, self.pattern % bucket.key), 'rb') as f:
+                    bucket.load_bytecode(f)
+            except OSError:
+                pass
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as e:
+            logger.debug(f"Template bytecode not cached: {e}")
+
+    def last_was_hit(self):
+        return getattr(self._local, 'hit', False)
+
+
+class TimedLoader(BaseLoader):
+    """Wraps the app's loader to time each template's load and compile"""
+
+    def __init__(self, loader, timings):
+        self.loader = loader
+        self.timings = timings
+
+    def get_source(self, environment, template):
+        return self.loader.get_source(environment, template)
+
+    def list_templates(self):
+        return self.loader.list_templates()
+
+    def load(self, environment, name, globals=None):
+        started = time.perf_counter()
+        template = self.loader.load(environment, name, globals)
+        bcc = environment.bytecode_cache
+        self.timings.record_load(
+            name, (time.perf_counter() - started) * 1000,
+            'bytecode' if isinstance(bcc, TemplateBytecodeCache) and bcc.last_was_hit() else 'compiled'
+        )
+        return template
+
+
+class TemplateTimings:
+    """Load and first-render times per template"""
+
+    def __init__(self):
+        self.templates = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record_load(self, name, load_ms, source):
+        with self._lock:
+            self.templates.setdefault(name, {}).update({'load_ms': round(load_ms, 2), 'source': source})
+
+    def before_render(self, sender, template, context, **extra):
+        if 'first_render_ms' not in self.templates.get(template.name, {}):
+            self._local.started = (template.name, time.perf_counter())
+
+    def rendered(self, sender, template, context, **extra):
+        started = getattr(self._local, 'started', None)
+        if not started or started[0] != template.name:
+            return
+        self._local.started = None
+        render_ms = (time.perf_counter() - started[1]) * 1000
+        with self._lock:
+            entry = self.templates.setdefault(template.name, {})
+            if 'first_render_ms' in entry:
+                return
+            entry['first_render_ms'] = round(render_ms, 2)
+        logger.info(
+            f"First render of {template.name}: {entry.get('load_ms', 0):.1f}ms load "
+            f"({entry.get('source', 'cached')}), {render_ms:.1f}ms render"
+        )
+
+    def get_stats(self):
+        with self._lock:
+            return {name: dict(entry) for name, entry in sorted(self.templates.items())}
+
+
+class TemplateCache:
+    """Installs the bytecode cache and timing hooks on a Flask app"""
+
+    def __init__(self, app=None):
+        self.bytecode_cache = None
+        self.timings = TemplateTimings()
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        env = app.jinja_env
+        if os.getenv('TEMPLATE_BYTECODE_CACHE', '1') != '0':
+            directory = os.getenv('TEMPLATE_CACHE_DIR', DEFAULT_CACHE_DIR)
+            try:
+                self.bytecode_cache = TemplateBytecodeCache(directory, bundled=BUNDLED_CACHE_DIR)
+            except OSError as e:
+                logger.warning(f"Template bytecode cache disabled: {e}")
+                self.bytecode_cache = TemplateBytecodeCache(BUNDLED_CACHE_DIR) if os.path.isdir(BUNDLED_CACHE_DIR) else None
+            env.bytecode_cache = self.bytecode_cache
+
+        env.loader = TimedLoader(env.loader, self.timings)
+        before_render_template.connect(self.timings.before_render, app, weak=False)
+        template_rendered.connect(self.timings.rendered, app, weak=False)
+
+    def get_stats(self):
+        return {
+            'bytecode_cache': self.bytecode_cache.directory if self.bytecode_cache else None,
+            'bundled': os.path.isdir(BUNDLED_CACHE_DIR),
+            'templates': self.timings.get_stats()
+        }
+
+
+def precompile_templates(env, output_dir=BUNDLED_CACHE_DIR):
+    """Compile every .html template into ``output_dir``; returns (compiled, failed)"""
+    env = env.overlay(bytecode_cache=TemplateBytecodeCache(output_dir), cache_size=0)
+    compiled, failed = [], []
+    for name in env.list_templates(extensions=['html']):
+        try:
+            env.get_template(name)
+            compiled.append(name)
+        except Exception as e:
+            failed.append((name, str(e)))
+    return compiled, failed
+
+
+# Bound to the app in index.py
+template_cache = TemplateCache()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Cold Start Benchmark for LexAI Practice Partner
+Times DatabaseManager initialization in fresh interpreters, comparing the
+old eager startup (connect, create_all, seed) with serverless mode.
+
+Usage:
+    python benchmark_cold_start.py [--runs 5]
+
+Uses DATABASE_URL when set, otherwise a throwaway SQLite file. Schema is
+created once up front so the eager runs measure the steady-state cost of
+create_all() and the seeding checks, not first-time table creation.
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api')
+
+# Runs inside a fresh interpreter so import and connection costs are real
+PROBE = """
+import json, time
+start = time.perf_counter()
+from flask import Flask
+from database import DatabaseManager
+imported = time.perf_counter()
+app = Flask(__name__)
+manager = DatabaseManager(app)
+initialized = time.perf_counter()
+with app.app_context():
+    from models import db, User
+    User.query.first()
+first_query = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'init_ms': (initialized - imported) * 1000,
+    'first_query_ms': (first_query - initialized) * 1000,
+    'pool': manager.pool_mode
+}))
+"""
+
+MODES = {
+    'eager (before)': {'DB_SERVERLESS': '0', 'DB_AUTO_CREATE': '1'},
+    'serverless (after)': {'DB_SERVERLESS': '1', 'DB_AUTO_CREATE': '0'},
+}
+
+def run_probe(env):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=API_DIR, env=env,
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        # Keep the whole traceback: the last line alone rarely says which import failed
+        raise RuntimeError(f"probe failed:\n{result.stderr.strip() or result.stdout.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark database cold start')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    base_env = os.environ.copy()
+    if not base_env.get('DATABASE_URL'):
+        db_path = os.path.join(tempfile.mkdtemp(), 'lexai_cold_start.db')
+        base_env['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    print("⚡ LexAI Cold Start Benchmark")
+    print("=" * 60)
+
+    # Create the schema once so both modes start from the same database
+    run_probe({**base_env, **MODES['eager (before)']})
+
+    results = {}
+    for label, overrides in MODES.items():
+        samples = [run_probe({**base_env, **overrides}) for _ in range(args.runs)]
+        results[label] = {
+            key: statistics.median(sample[key] for sample in samples)
+            for key in ('import_ms', 'init_ms', 'first_query_ms')
+        }
+        results[label]['pool'] = samples[0]['pool']
+
+    print(f"\n  {'mode':22} {'import':>10} {'init':>10} {'1st query':>10}  pool")
+    print("-" * 60)
+    for label, timing in results.items():
+        print(f"  {label:22} {timing['import_ms']:8.1f}ms {timing['init_ms']:8.1f}ms "
+              f"{timing['first_query_ms']:8.1f}ms  {timing['pool']}")
+
+    before = results['eager (before)']
+    after = results['serverless (after)']
+    saved = (before['init_ms'] + before['first_query_ms']) - (after['init_ms'] + after['first_query_ms'])
+    print(f"\n🏁 Serverless mode saves {saved:.1f}ms per cold start (median of {args.runs} runs)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Query Plan Benchmark for LexAI Practice Partner
+Seeds a large synthetic firm and compares EXPLAIN plans and timings
+for the hot route predicates with and without the composite indexes.
+
+Usage:
+    python benchmark_query_plans.py [--users 20] [--clients-per-user 150] [--repeat 5]
+
+Set BENCHMARK_DATABASE_URL to run against PostgreSQL; defaults to a
+throwaway SQLite file. Never point this at a production database.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone, date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+from flask import Flask
+from sqlalchemy import insert, text
+from models import (
+    db, User, Client, Case, Document, TimeEntry, Invoice, CalendarEvent, Task, AuditLog,
+    UserRole, CaseStatus, TaskStatus, TaskPriority, DocumentStatus, TimeEntryStatus, InvoiceStatus
+)
+
+# Indexes added by migration 3c9d1e7a4b21 (see __table_args__ in api/models.py)
+COMPOSITE_INDEXES = {
+    'ix_clients_created_by_created_at',
+    'ix_cases_client_id_updated_at',
+    'ix_cases_primary_attorney_id',
+    'ix_tasks_due_date_status',
+    'ix_documents_client_id_created_at',
+    'ix_documents_case_id',
+    'ix_time_entries_user_id_date',
+    'ix_time_entries_case_id',
+    'ix_invoices_created_by_status',
+    'ix_invoices_client_id_created_at',
+    'ix_calendar_events_created_by_start',
+    'ix_audit_logs_resource',
+}
+
+def create_benchmark_app():
+    """Create a Flask app bound to the benchmark database"""
+    database_url = os.environ.get('BENCHMARK_DATABASE_URL')
+    if not database_url:
+        db_path = os.path.join(tempfile.mkdtemp(), 'lexai_benchmark.db')
+        database_url = f'sqlite:///{db_path}'
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+def _new_id():
+    return str(uuid.uuid4())
+
+def seed_synthetic_firm(num_users, clients_per_user):
+    """Bulk insert a synthetic firm and return the user ids"""
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    today = now.date()
+
+    users, clients, cases, documents, time_entries = [], [], [], [], []
+    invoices, events, tasks, audit_logs = [], [], [], []
+
+    for u in range(num_users):
+        user_id = _new_id()
+        users.append({
+            'id': user_id, 'email': f'attorney{u}@benchmark.test', 'password_hash': 'x',
+            'first_name': 'Bench', 'last_name': f'Attorney{u}', 'role': UserRole.ATTORNEY,
+            'created_at': now, 'updated_at': now
+        })
+
+        for c in range(clients_per_user):
+            client_id = _new_id()
+            created = now - timedelta(days=rng.randint(0, 730))
+            clients.append({
+                'id': client_id, 'client_type': 'individual', 'first_name': 'Client',
+                'last_name': f'{u}-{c}', 'status': 'active', 'created_by': user_id,
+                'created_at': created, 'updated_at': created
+            })
+
+            for k in range(3):
+                case_id = _new_id()
+                updated = created + timedelta(days=rng.randint(0, 365))
+                cases.append({
+                    'id': case_id, 'case_number': f'B-{u}-{c}-{k}', 'title': f'Matter {k}',
+                    'practice_area': rng.choice(['litigation', 'corporate', 'family', 'ip']),
+                    'status': CaseStatus.ACTIVE, 'date_opened': created.date(),
+                    'client_id': client_id, 'primary_attorney_id': user_id,
+                    'created_at': created, 'updated_at': updated
+                })
+                documents.append({
+                    'id': _new_id(), 'title': f'Doc {k}', 'filename': f'{case_id}.pdf',
+                    'original_filename': 'doc.pdf', 'storage_path': f'/bench/{case_id}.pdf',
+                    'document_type': 'contract', 'status': DocumentStatus.DRAFT,
+                    'case_id': case_id, 'client_id': client_id, 'created_by': user_id,
+                    'created_at': updated, 'updated_at': updated
+                })
+                tasks.append({
+                    'id': _new_id(), 'title': f'Task {k}', 'status': rng.choice(list(TaskStatus)),
+                    'priority': TaskPriority.MEDIUM, 'due_date': today + timedelta(days=rng.randint(-60, 120)),
+                    'assignee_id': user_id, 'created_by': user_id, 'case_id': case_id,
+                    'created_at': now, 'updated_at': now
+                })
+                for _ in range(4):
+                    entry_date = today - timedelta(days=rng.randint(0, 365))
+                    hours = Decimal(rng.choice(['0.50', '1.00', '2.25', '3.00']))
+                    time_entries.append({
+                        'id': _new_id(), 'description': 'Research', 'hours': hours,
+                        'start_time': now, 'hourly_rate': Decimal('350.00'),
+                        'amount': hours * Decimal('350.00'), 'billable': True,
+                        'status': rng.choice(list(TimeEntryStatus)), 'user_id': user_id,
+                        'case_id': case_id, 'date': entry_date, 'created_at': now, 'updated_at': now
+                    })
+
+            issue = created.date()
+            invoices.append({
+                'id': _new_id(), 'invoice_number': f'INV-B-{u}-{c}', 'subject': 'Services',
+                'subtotal': Decimal('1000.00'), 'total_amount': Decimal('1000.00'),
+                'status': rng.choice(list(InvoiceStatus)), 'issue_date': issue,
+                'due_date': issue + timedelta(days=30), 'client_id': client_id,
+                'created_by': user_id, 'created_at': created, 'updated_at': created
+            })
+            start = now + timedelta(days=rng.randint(-90, 90), hours=rng.randint(8, 17))
+            events.append({
+                'id': _new_id(), 'title': 'Meeting', 'event_type': rng.choice(['meeting', 'court']),
+                'start_datetime': start, 'end_datetime': start + timedelta(hours=1),
+                'client_id': client_id, 'created_by': user_id, 'created_at': now, 'updated_at': now
+            })
+            for _ in range(5):
+                audit_logs.append({
+                    'id': _new_id(), 'action': rng.choice(['view', 'update', 'create']),
+                    'resource_type': 'client', 'resource_id': client_id, 'user_id': user_id,
+                    'success': True, 'created_at': now - timedelta(minutes=rng.randint(0, 100000))
+                })
+
+    for model, rows in [(User, users), (Client, clients), (Case, cases), (Document, documents),
+                        (Task, tasks), (Invoice, invoices), (TimeEntry, time_entries),
+                        (CalendarEvent, events), (AuditLog, audit_logs)]:
+        for start in range(0, len(rows), 5000):
+            db.session.execute(insert(model), rows[start:start + 5000])
+    db.session.commit()
+
+    print(f"🌱 Seeded {len(users)} users, {len(clients)} clients, {len(cases)} cases, "
+          f"{len(time_entries)} time entries, {len(audit_logs)} audit logs")
+    return [row['id'] for row in users]
+
+def build_benchmark_queries(user_id, client_id):
+    """Queries mirroring the predicates used by the API routes"""
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    return [
+        ('clients list (api_get_clients)',
+         Client.query.filter_by(created_by=user_id).order_by(Client.created_at.desc()).limit(20)),
+        ('client cases (api_get_client)',
+         Case.query.filter_by(client_id=client_id).order_by(Case.updated_at.desc())),
+        ('client documents',
+         Document.query.filter_by(client_id=client_id).order_by(Document.created_at.desc()).limit(10)),
+        ('time entries this month (billing dashboard)',
+         TimeEntry.query.filter(TimeEntry.user_id == user_id, TimeEntry.date >= today.replace(day=1))),
+        ('outstanding invoices (billing dashboard)',
+         Invoice.query.filter_by(created_by=user_id).filter(
+             Invoice.status.in_([InvoiceStatus.SENT, InvoiceStatus.OVERDUE]))),
+        ('calendar availability (api_get_availability)',
+         CalendarEvent.query.filter(
+             CalendarEvent.created_by == user_id,
+             CalendarEvent.start_datetime >= now,
+             CalendarEvent.start_datetime <= now + timedelta(days=1))),
+        ('task deadlines (api_get_deadlines)',
+         Task.query.filter(
+             Task.due_date >= today, Task.due_date <= today + timedelta(days=30),
+             Task.status != TaskStatus.DONE)),
+        ('client timeline (api_get_client_timeline)',
+         AuditLog.query.filter(
+             AuditLog.resource_type == 'client', AuditLog.resource_id == client_id,
+             AuditLog.user_id == user_id).order_by(AuditLog.created_at.desc()).limit(10)),
+    ]
+
+def explain(query):
+    """Return the database's query plan for an ORM query"""
+    dialect = db.engine.dialect.name
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    prefix = 'EXPLAIN QUERY PLAN' if dialect == 'sqlite' else 'EXPLAIN'
+    rows = db.session.execute(text(f'{prefix} {compiled}')).fetchall()
+    if dialect == 'sqlite':
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+def time_query(query, repeat):
+    """Median wall time in milliseconds over ``repeat`` runs"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query.all()
+        samples.append((time.perf_counter() - start) * 1000)
+        db.session.expire_all()
+    return statistics.median(samples)
+
+def set_composite_indexes(enabled):
+    """Drop or (re)create the composite indexes"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in COMPOSITE_INDEXES:
+                if enabled:
+                    index.create(db.engine, checkfirst=True)
+                else:
+                    index.drop(db.engine, checkfirst=True)
+
+def run_phase(label, queries, repeat):
+    print(f"\n📊 {label}")
+    print("-" * 60)
+    timings = {}
+    for name, query in queries:
+        timings[name] = time_query(query, repeat)
+        print(f"  {name:45} {timings[name]:8.2f} ms")
+        for line in explain(query):
+            print(f"      {line}")
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark query plans with and without composite indexes')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--clients-per-user', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print("⚡ LexAI Query Plan Benchmark")
+    print("=" * 60)
+
+    app = create_benchmark_app()
+    with app.app_context():
+        db.create_all()
+        user_ids = seed_synthetic_firm(args.users, args.clients_per_user)
+        user_id = user_ids[len(user_ids) // 2]
+        client_id = Client.query.filter_by(created_by=user_id).first().id
+        queries = build_benchmark_queries(user_id, client_id)
+
+        set_composite_indexes(False)
+        db.session.execute(text('ANALYZE'))
+        before = run_phase('BEFORE (no composite indexes)', queries, args.repeat)
+
+        set_composite_indexes(True)
+        db.session.execute(text('ANALYZE'))
+        after = run_phase('AFTER (composite indexes)', queries, args.repeat)
+
+        print(f"\n🏁 Summary")
+        print("-" * 60)
+        for name in before:
+            speedup = before[name] / after[name] if after[name] > 0 else float('inf')
+            print(f"  {name:45} {before[name]:8.2f} → {after[name]:8.2f} ms  ({speedup:.1f}x)")
+
+        db.drop_all()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Benchmark for LexAI Practice Partner
+Times RateLimiter checks as the request history and the number of distinct
+clients grow, to show the GCRA limiter's cost per check stays flat.
+
+Usage:
+    python benchmark_rate_limiter.py [--checks 20000] [--clients 1 1000 100000]
+
+Runs against the in-process fallback. Set BENCHMARK_REDIS_URL to also
+time the Redis Lua script (keys are written under a throwaway prefix and
+expire on their own; never point this at a production Redis).
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+from rate_limiter import RateLimiter
+
+# Large enough that the benchmark itself is never limited
+LIMITS = {'default': {'requests': 10_000_000, 'window': 3600}}
+
+
+def time_checks(limiter, clients, checks):
+    """Median and p99 microseconds per check, spreading checks over ``clients`` identifiers"""
+    samples = []
+    for i in range(checks):
+        identifier = f"10.{(i % clients) >> 16 & 255}.{(i % clients) >> 8 & 255}.{i % clients & 255}"
+        started = time.perf_counter()
+        limiter.is_rate_limited(identifier)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def bytes_per_client(clients):
+    """Memory held by the in-process table per tracked client"""
+    limiter = RateLimiter(limits=LIMITS)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(clients):
+        limiter.is_rate_limited(f"client-{i}")
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / clients
+
+
+def run(backend, make_limiter, client_counts, checks):
+    print(f"\n{backend}")
+    print(f"  {'clients':>8}  {'history/client':>14}  {'median µs':>9}  {'p99 µs':>7}")
+    for clients in client_counts:
+        limiter = make_limiter()
+        # Warm every client up with prior requests, then time a fresh batch
+        time_checks(limiter, clients, max(checks, clients))
+        history = max(checks, clients) // clients
+        median, p99 = time_checks(limiter, clients, checks)
+        print(f"  {clients:>8}  {history:>14}  {median:>9.1f}  {p99:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rate limiter checks')
+    parser.add_argument('--checks', type=int, default=20000, help='Timed checks per row')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 1000, 100000],
+                        help='Distinct client counts to spread the checks over')
+    args = parser.parse_args()
+
+    run('in-process', lambda: RateLimiter(limits=LIMITS), args.clients, args.checks)
+    print(f"\n  memory: {bytes_per_client(10000):.0f} bytes per tracked client")
+
+    redis_url = os.environ.get('BENCHMARK_REDIS_URL')
+    if redis_url:
+        import redis
+        client = redis.from_url(redis_url)
+        client.ping()
+        prefix = f"lexai_rl_bench:{uuid.uuid4().hex[:8]}:"
+        run('redis (Lua script)', lambda: RateLimiter(client, prefix=prefix, limits=LIMITS),
+            args.clients, min(args.checks, 5000))
+
+
+if __name__ == '__main__':
+    main()
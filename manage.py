@@ -20,6 +20,18 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# API maintenance commands live in api/cli.py and must run from api/ so
+# they import the api models instead of the root-level ones
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api')
+
+def run_api_command(*args):
+    """Run an api/cli.py command and exit with its status on failure"""
+    import subprocess
+    
+    result = subprocess.run([sys.executable, 'cli.py', *args], cwd=API_DIR)
+    if result.returncode != 0:
+        sys.exit(result.returncode)
+
 def create_app():
     """Create Flask app for database operations"""
     app = Flask(__name__)
@@ -349,6 +361,68 @@ def setup_production():
         click.echo(f"❌ Production setup failed: {e}")
         sys.exit(1)
 
+@cli.command()
+@click.option('--seed/--no-seed', default=True, help='Create the admin user and default tags')
+def setup_api_db(seed):
+    """Create the API schema and initial data (not done at app startup)"""
+    run_api_command('setup-db', '--seed' if seed else '--no-seed')
+
+@cli.command()
+@click.option('--days', type=int, help='Only rebuild the last N days')
+def backfill_analytics(days):
+    """Rebuild the analytics dashboard rollup tables"""
+    args = ['backfill-analytics']
+    if days:
+        args += ['--days', str(days)]
+    run_api_command(*args)
+
+@cli.command()
+@click.option('--retain-months', type=int, help='Months of audit logs to keep in the database')
+def audit_maintenance(retain_months):
+    """Partition, rotate and archive audit logs"""
+    args = ['audit-maintenance']
+    if retain_months:
+        args += ['--retain-months', str(retain_months)]
+    run_api_command(*args)
+
+@cli.command()
+@click.argument('entity', type=click.Choice(['clients', 'cases', 'time_entries']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-email', required=True, help='User the records are created for')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Input format (default: from the file extension)')
+@click.option('--chunk-size', type=int, help='Rows per committed chunk')
+def bulk_import(entity, path, user_email, fmt, chunk_size):
+    """Import clients, cases or time entries from CSV/NDJSON"""
+    # api/cli.py runs from api/, so pass an absolute path
+    args = ['bulk-import', entity, os.path.abspath(path), '--user-email', user_email]
+    if fmt:
+        args += ['--format', fmt]
+    if chunk_size:
+        args += ['--chunk-size', str(chunk_size)]
+    run_api_command(*args)
+
+@cli.command()
+@click.argument('entity', type=click.Choice(['clients', 'cases', 'time_entries']))
+@click.argument('path', type=click.Path(dir_okay=False))
+@click.option('--user-email', required=True, help='User whose records are exported')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Output format (default: from the file extension)')
+def bulk_export(entity, path, user_email, fmt):
+    """Export clients, cases or time entries to CSV/NDJSON"""
+    args = ['bulk-export', entity, os.path.abspath(path), '--user-email', user_email]
+    if fmt:
+        args += ['--format', fmt]
+    run_api_command(*args)
+
+@cli.command()
+def build_assets():
+    """Hash static files and write precompressed CSS/JS"""
+    run_api_command('build-assets')
+
+@cli.command()
+def precompile_templates():
+    """Compile Jinja templates to bytecode for faster cold starts"""
+    run_api_command('precompile-templates')
+
 @cli.command()
 @with_appcontext
 def status():
@@ -0,0 +1,43 @@
+"""Add composite indexes for tenant filters and hot query predicates
+
+Revision ID: 3c9d1e7a4b21
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d1e7a4b21'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) - kept in sync with __table_args__ in api/models.py
+INDEXES = [
+    ('ix_clients_created_by_created_at', 'clients', ['created_by', 'created_at']),
+    ('ix_cases_client_id_updated_at', 'cases', ['client_id', 'updated_at']),
+    ('ix_cases_primary_attorney_id', 'cases', ['primary_attorney_id']),
+    ('ix_tasks_due_date_status', 'tasks', ['due_date', 'status']),
+    ('ix_documents_client_id_created_at', 'documents', ['client_id', 'created_at']),
+    ('ix_documents_case_id', 'documents', ['case_id']),
+    ('ix_time_entries_user_id_date', 'time_entries', ['user_id', 'date']),
+    ('ix_time_entries_case_id', 'time_entries', ['case_id']),
+    ('ix_invoices_created_by_status', 'invoices', ['created_by', 'status']),
+    ('ix_invoices_client_id_created_at', 'invoices', ['client_id', 'created_at']),
+    ('ix_calendar_events_created_by_start', 'calendar_events', ['created_by', 'start_datetime']),
+    ('ix_audit_logs_resource', 'audit_logs', ['resource_type', 'resource_id', 'created_at']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
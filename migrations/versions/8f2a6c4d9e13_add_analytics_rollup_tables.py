@@ -0,0 +1,65 @@
+"""Add daily analytics rollup tables
+
+Revision ID: 8f2a6c4d9e13
+Revises: 3c9d1e7a4b21
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2a6c4d9e13'
+down_revision = '3c9d1e7a4b21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'analytics_user_daily',
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('revenue', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('invoice_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('approved_hours', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('billable_work_hours', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('meeting_hours', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('admin_hours', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('business_development_hours', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('new_clients', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.create_table(
+        'analytics_client_daily',
+        sa.Column('client_id', sa.String(length=36), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('revenue', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('invoice_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('new_cases', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_invoice_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('client_id', 'day')
+    )
+    op.create_index('ix_analytics_client_daily_user_id_day', 'analytics_client_daily', ['user_id', 'day'])
+    op.create_table(
+        'analytics_practice_area_daily',
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('practice_area', sa.String(length=100), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('revenue', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('new_cases', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'practice_area', 'day')
+    )
+    # Populate with: python manage.py backfill-analytics
+
+
+def downgrade():
+    op.drop_table('analytics_practice_area_daily')
+    op.drop_index('ix_analytics_client_daily_user_id_day', table_name='analytics_client_daily')
+    op.drop_table('analytics_client_daily')
+    op.drop_table('analytics_user_daily')
@@ -0,0 +1,72 @@
+"""Partition audit_logs by month on PostgreSQL
+
+Revision ID: b7e4f1a9c2d5
+Revises: 8f2a6c4d9e13
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from datetime import date, datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4f1a9c2d5'
+down_revision = '8f2a6c4d9e13'
+branch_labels = None
+depends_on = None
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # SQLite rotates old months into audit_logs_YYYYMM tables instead
+        # (see api/audit_archive.py); nothing to change here
+        return
+
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned')
+    op.execute('ALTER INDEX ix_audit_logs_resource RENAME TO ix_audit_logs_unpartitioned_resource')
+    op.execute('UPDATE audit_logs_unpartitioned SET created_at = now() WHERE created_at IS NULL')
+
+    # The partition key has to be part of the primary key
+    op.execute(
+        'CREATE TABLE audit_logs (LIKE audit_logs_unpartitioned INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (created_at)'
+    )
+    op.execute('ALTER TABLE audit_logs ALTER COLUMN created_at SET NOT NULL')
+    op.execute('ALTER TABLE audit_logs ADD PRIMARY KEY (id, created_at)')
+    op.execute('ALTER TABLE audit_logs ADD FOREIGN KEY (user_id) REFERENCES users (id)')
+    op.create_index('ix_audit_logs_resource', 'audit_logs', ['resource_type', 'resource_id', 'created_at'])
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+
+    oldest = bind.execute(sa.text('SELECT min(created_at) FROM audit_logs_unpartitioned')).scalar()
+    month = date((oldest or datetime.now()).year, (oldest or datetime.now()).month, 1)
+    last = _add_months(date.today().replace(day=1), 3)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE audit_logs_y{month.year}m{month.month:02d} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute('INSERT INTO audit_logs SELECT * FROM audit_logs_unpartitioned')
+    op.execute('DROP TABLE audit_logs_unpartitioned')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE TABLE audit_logs_unpartitioned (LIKE audit_logs INCLUDING DEFAULTS)')
+    op.execute('INSERT INTO audit_logs_unpartitioned SELECT * FROM audit_logs')
+    op.execute('DROP TABLE audit_logs CASCADE')
+    op.execute('ALTER TABLE audit_logs_unpartitioned RENAME TO audit_logs')
+    op.execute('ALTER TABLE audit_logs ADD PRIMARY KEY (id)')
+    op.execute('ALTER TABLE audit_logs ADD FOREIGN KEY (user_id) REFERENCES users (id)')
+    op.create_index('ix_audit_logs_resource', 'audit_logs', ['resource_type', 'resource_id', 'created_at'])
@@ -0,0 +1,34 @@
+"""Add per-firm invoice number sequences
+
+Revision ID: d3a8b5e2f604
+Revises: b7e4f1a9c2d5
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8b5e2f604'
+down_revision = 'b7e4f1a9c2d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows are created on first use, seeded past the highest number
+    # already issued for that prefix and year
+    op.create_table(
+        'invoice_sequences',
+        sa.Column('firm_key', sa.String(length=255), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('prefix', sa.String(length=20), nullable=False, server_default='INV'),
+        sa.Column('next_number', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('firm_key', 'year')
+    )
+
+
+def downgrade():
+    op.drop_table('invoice_sequences')
@@ -0,0 +1,28 @@
+"""Make invoice sequence prefixes unique per year
+
+Revision ID: e6f2c9a1d735
+Revises: d3a8b5e2f604
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f2c9a1d735'
+down_revision = 'd3a8b5e2f604'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Firms whose names slug to the same prefix lose the insert and retry
+    # with a hashed one (api/invoice_numbers.py)
+    with op.batch_alter_table('invoice_sequences') as batch_op:
+        batch_op.create_unique_constraint('uq_invoice_sequences_prefix_year', ['prefix', 'year'])
+
+
+def downgrade():
+    with op.batch_alter_table('invoice_sequences') as batch_op:
+        batch_op.drop_constraint('uq_invoice_sequences_prefix_year', type_='unique')
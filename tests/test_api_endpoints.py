@@ -98,6 +98,51 @@ class TestClientManagementEndpoints:
         data = response.get_json()
         assert data['success'] is True
 
+    def test_bulk_import_reports_row_errors(self, client, authenticated_user):
+        """Test CSV bulk import inserts valid rows and reports invalid ones by line."""
+        csv_data = (
+            'client_type,first_name,last_name,company_name\n'
+            'individual,Ana,Lopez,\n'
+            'business,,,\n'
+            'business,,,Acme LLC\n'
+        )
+        response = client.post('/api/bulk/clients/import?format=csv',
+                             data=csv_data, content_type='text/csv',
+                             headers={'Authorization': 'Bearer test-token'})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['import']['inserted'] == 2
+        assert data['import']['errors'] == [
+            {'line': 3, 'error': 'Company name is required for business clients'}
+        ]
+
+    def test_bulk_export_streams_ndjson(self, client, authenticated_user, sample_client):
+        """Test bulk export streams one JSON object per line."""
+        response = client.get('/api/bulk/clients/export?format=ndjson',
+                            headers={'Authorization': 'Bearer test-token'})
+        assert response.status_code == 200
+        assert response.is_streamed
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert sample_client.id in [row['id'] for row in rows]
+
+    @pytest.mark.api
+    def test_get_clients_conditional_request(self, client, authenticated_user, sample_client):
+        """Test client list answers a matching If-None-Match with 304."""
+        response = client.get('/api/clients', headers={'Authorization': 'Bearer test-token'})
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert 'private' in response.headers['Cache-Control']
+
+        with patch('api.index.audit_log') as audit:
+            response = client.get('/api/clients', headers={
+                'Authorization': 'Bearer test-token',
+                'If-None-Match': etag
+            })
+        assert response.status_code == 304
+        assert response.data == b''
+        # The skipped view still records the access
+        assert audit.call_args[0][:2] == ('view', 'clients')
+
 class TestDocumentEndpoints:
     """Test document management and analysis endpoints."""
     
@@ -234,6 +279,24 @@ class TestContractAnalysisEndpoints:
         assert data['success'] is True
         assert 'clauses' in data
 
+    @pytest.mark.api
+    def test_analysis_exports_stored_server_side(self, tmp_path):
+        """Test analysis exports are kept out of the session and reports are reused."""
+        from api.export_store import ExportStore
+
+        store = ExportStore(directory=str(tmp_path))
+        analysis = {'summary': 'Indemnity clause is one-sided. ' * 500, 'risks': []}
+        export_id = store.save(analysis, {'user_id': 'user-1', 'filename': 'contract'})
+
+        assert analysis['export_id'] == export_id
+        assert store.load(export_id, 'user-2') is None
+        record = store.load(export_id, 'user-1')
+        assert record['analysis'] == analysis
+
+        assert store.get_artifact(record, 'pdf') is None
+        store.put_artifact(record, 'pdf', b'%PDF-1.7 report')
+        assert store.get_artifact(store.load(export_id, 'user-1'), 'pdf') == b'%PDF-1.7 report'
+
 class TestSpanishTranslationEndpoints:
     """Test Spanish translation API endpoints."""
     
@@ -210,7 +210,72 @@ class TestConcurrencyPerformance:
         # Performance assertions
         assert len(results) == num_users
         assert total_errors / max(total_requests, 1) < 0.05  # Less than 5% error rate
-    
+
+    def test_concurrent_invoice_number_allocation(self, app):
+        """Test concurrent invoice number allocation never hands out duplicates."""
+        from api.invoice_numbers import allocate_invoice_numbers
+
+        def allocate_batch(_):
+            with app.app_context():
+                numbers = allocate_invoice_numbers('concurrency-test', count=5)
+                from api.database_models import db
+                db.session.commit()
+                return numbers
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            batches = list(executor.map(allocate_batch, range(40)))
+
+        numbers = [number for batch in batches for number in batch]
+        assert len(numbers) == 200
+        assert len(set(numbers)) == 200
+
+    def test_invoice_numbers_distinct_across_firms(self, app):
+        """Test two firms invoicing in the same year never share a number."""
+        from api.invoice_numbers import allocate_invoice_numbers
+
+        with app.app_context():
+            first = allocate_invoice_numbers('acme law', count=3, year=2030)
+            second = allocate_invoice_numbers('acme, law', count=3, year=2030)
+            third = allocate_invoice_numbers('baker & co', count=3, year=2030)
+
+        assert first[0].startswith('INV-ACMELAW-2030-')
+        # The second firm lost the prefix to the unique constraint and got a hashed one
+        assert second[0].startswith('INV-ACMELAW-') and not second[0].startswith('INV-ACMELAW-2030-')
+        assert third[0].startswith('INV-BAKERCO-2030-')
+        assert len(set(first + second + third)) == 9
+
+    def test_request_mode_audit_flush_completes(self, client, app, monkeypatch):
+        """Test request-mode audit flushing at teardown does not deadlock."""
+        from api.database import AuditLogWriter
+
+        monkeypatch.setenv('AUDIT_LOG_MODE', 'request')
+        writer = AuditLogWriter()
+        writer.init_app(app)
+        writer.write({'action': 'view', 'resource_type': 'client', 'success': True})
+
+        request_thread = threading.Thread(target=client.get, args=('/api/status',), daemon=True)
+        request_thread.start()
+        request_thread.join(timeout=10)
+
+        assert not request_thread.is_alive(), "Request hung flushing the audit log"
+        assert writer.get_stats()['written'] == 1
+
+    def test_durable_audit_entry_with_pending_write(self, app, sample_client):
+        """Test a durable audit entry written mid-transaction commits with the caller's session."""
+        from api.database import audit_log
+        from api.database_models import db, AuditLog, Client
+
+        with app.app_context():
+            record = db.session.get(Client, sample_client.id)
+            record.notes = 'pending change'
+            db.session.flush()
+
+            audit_log('delete', 'client', record.id, None, {'notes': 'before'})
+
+            assert AuditLog.query.filter_by(resource_id=record.id, action='delete').count() == 1
+            db.session.expire_all()
+            assert db.session.get(Client, sample_client.id).notes == 'pending change'
+
     def test_memory_usage_under_load(self, client, authenticated_user):
         """Test memory usage under load."""
         process = psutil.Process(os.getpid())
@@ -381,6 +446,232 @@ class TestResourceUtilizationPerformance:
             connection_increase = final_connections - initial_connections
             assert connection_increase <= 5, f"Too many connections created: {connection_increase}"
 
+@pytest.mark.performance
+class TestQueryEfficiency:
+    """Test that list endpoints issue a bounded number of SQL queries."""
+    
+    def _count_client_list_queries(self, client, app, user_id, path='/api/clients?per_page=50'):
+        """Issue a list GET (default /api/clients) and return the number of SQL statements executed."""
+        from sqlalchemy import event
+        from api.database_models import db
+        
+        statements = []
+        
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        with client.session_transaction() as sess:
+            sess['logged_in'] = True
+            sess['user_id'] = user_id
+        
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', count_statement)
+            try:
+                response = client.get(path)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count_statement)
+        
+        assert response.status_code == 200
+        return len(statements), response.get_json()
+    
+    def _seed_clients(self, app, user_id, num_clients, cases_per_client):
+        """Create clients that each have several cases."""
+        from datetime import date
+        from api.database_models import db, Client, Case
+        
+        with app.app_context():
+            for i in range(num_clients):
+                client_record = Client(
+                    first_name='Query',
+                    last_name=f'Client{i}',
+                    created_by=user_id
+                )
+                db.session.add(client_record)
+                db.session.flush()
+                
+                for j in range(cases_per_client):
+                    db.session.add(Case(
+                        case_number=f'QC-{client_record.id[:8]}-{j}',
+                        title=f'Case {j}',
+                        practice_area='general',
+                        date_opened=date.today(),
+                        client_id=client_record.id,
+                        primary_attorney_id=user_id
+                    ))
+            db.session.commit()
+    
+    def test_client_list_query_count_is_constant(self, client, app, authenticated_user):
+        """Client listing must not issue per-client case queries (N+1 regression)."""
+        user_id = authenticated_user.id
+        
+        self._seed_clients(app, user_id, num_clients=2, cases_per_client=5)
+        small_page_queries, _ = self._count_client_list_queries(client, app, user_id)
+        
+        self._seed_clients(app, user_id, num_clients=20, cases_per_client=5)
+        large_page_queries, data = self._count_client_list_queries(client, app, user_id)
+        
+        # Pagination count + page + grouped case counts + windowed recent cases + audit insert
+        assert large_page_queries <= 6, f"Client list issued {large_page_queries} queries"
+        assert large_page_queries == small_page_queries
+        
+        for client_data in data['clients']:
+            assert client_data['case_count'] == 5
+            assert len(client_data['recent_cases']) == 3
+
+    def test_case_list_query_count_is_constant(self, client, app, authenticated_user):
+        """Case listing must not issue per-case attorney or count queries (N+1 regression)."""
+        user_id = authenticated_user.id
+        path = '/api/cases?per_page=100'
+        # Warm the permission cache so both measured requests skip it
+        self._count_client_list_queries(client, app, user_id, path)
+        
+        self._seed_clients(app, user_id, num_clients=1, cases_per_client=3)
+        small_page_queries, _ = self._count_client_list_queries(client, app, user_id, path)
+        
+        self._seed_clients(app, user_id, num_clients=10, cases_per_client=5)
+        large_page_queries, data = self._count_client_list_queries(client, app, user_id, path)
+        
+        assert large_page_queries == small_page_queries, f"Case list issued {large_page_queries} queries"
+        assert len(data['cases']) == 53
+        for case_data in data['cases']:
+            assert case_data['task_count'] == 0
+            assert case_data['primary_attorney_name']
+
+    def test_case_list_sparse_fields_skip_attorney_loads(self, client, app, authenticated_user):
+        """A ?fields= list without attorney fields does not load attorneys."""
+        user_id = authenticated_user.id
+        self._seed_clients(app, user_id, num_clients=2, cases_per_client=3)
+        # Warm the permission cache so both measured requests skip it
+        self._count_client_list_queries(client, app, user_id, '/api/cases?per_page=5')
+        full_queries, _ = self._count_client_list_queries(client, app, user_id, '/api/cases')
+        sparse_queries, data = self._count_client_list_queries(client, app, user_id, '/api/cases?fields=title')
+
+        # The attorneys collection was the only SELECT ... IN on the full list
+        assert sparse_queries == full_queries - 1
+        assert all(set(case_data) == {'id', 'title'} for case_data in data['cases'])
+
+    def test_server_timing_reports_database_time(self, client, app, authenticated_user):
+        """Responses carry a Server-Timing db entry with the request's query count."""
+        with client.session_transaction() as sess:
+            sess['logged_in'] = True
+            sess['user_id'] = authenticated_user.id
+
+        response = client.get('/api/clients')
+
+        timings = response.headers.getlist('Server-Timing')
+        db_timing = next(t for t in timings if t.startswith('db;'))
+        assert 'dur=' in db_timing
+        assert 'quer' in db_timing
+
+    def test_analytics_overview_served_from_dashboard_cache(self, client, app, authenticated_user):
+        """A repeated dashboard load skips the rollup query."""
+        with client.session_transaction() as sess:
+            sess['logged_in'] = True
+            sess['user_id'] = authenticated_user.id
+
+        def query_count(response):
+            db_timing = next(t for t in response.headers.getlist('Server-Timing') if t.startswith('db;'))
+            return int(db_timing.split('desc="')[1].split()[0])
+
+        first = client.get('/api/analytics/overview?period=30')
+        second = client.get('/api/analytics/overview?period=30')
+
+        assert second.get_json() == first.get_json()
+        assert query_count(second) < query_count(first)
+
+    def test_permissions_cached_until_user_changes(self, app, authenticated_user):
+        """Auth checks reuse cached permissions and see role changes."""
+        from flask import session
+        from sqlalchemy import event
+        from api.database_models import db, User, UserRole
+        from api.permissions import get_permissions
+
+        statements = []
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        def role_in_new_request():
+            with app.test_request_context():
+                session['logged_in'] = True
+                session['user_id'] = authenticated_user.id
+                return get_permissions()['role']
+
+        with app.app_context():
+            first_role = role_in_new_request()
+            event.listen(db.engine, 'before_cursor_execute', count_statement)
+            try:
+                assert role_in_new_request() == first_role
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count_statement)
+            assert statements == []
+
+            user = db.session.get(User, authenticated_user.id)
+            user.role = UserRole.PARALEGAL
+            db.session.commit()
+            assert role_in_new_request() == 'paralegal'
+
+
+@pytest.mark.performance
+class TestAnalyticsRollups:
+    """Test that incrementally maintained rollups match a full rebuild."""
+
+    def _rollup_rows(self):
+        from api.database_models import db, UserDailyRollup, ClientDailyRollup, PracticeAreaDailyRollup
+
+        return [
+            sorted((row.user_id, row.day, row.revenue, row.approved_hours, row.new_clients)
+                   for row in UserDailyRollup.query.all()),
+            sorted((row.client_id, row.day, row.revenue, row.new_cases)
+                   for row in ClientDailyRollup.query.all()),
+            sorted((row.user_id, row.practice_area, row.day, row.revenue, row.new_cases)
+                   for row in PracticeAreaDailyRollup.query.all()),
+        ]
+
+    def test_incremental_rollups_match_backfill(self, app, authenticated_user):
+        """Commits that add, re-key and delete rows keep rollups equal to a backfill."""
+        from datetime import date, datetime, timedelta
+        from decimal import Decimal
+        from api.database_models import (
+            db, Client, Case, Invoice, TimeEntry, InvoiceStatus, TimeEntryStatus
+        )
+        from api.analytics import backfill_rollups
+
+        user_id = authenticated_user.id
+
+        with app.app_context():
+            client_record = Client(first_name='Rollup', last_name='Client', created_by=user_id)
+            db.session.add(client_record)
+            db.session.flush()
+            case = Case(case_number='RU-1', title='Rollup', practice_area='litigation',
+                        date_opened=date.today(), client_id=client_record.id,
+                        primary_attorney_id=user_id)
+            db.session.add(case)
+            db.session.flush()
+
+            for days_ago in range(0, 20, 4):
+                when = datetime.now() - timedelta(days=days_ago)
+                db.session.add(Invoice(
+                    invoice_number=f'RU-{days_ago}', subject='Services', subtotal=Decimal('500'),
+                    total_amount=Decimal('500'), status=InvoiceStatus.PAID, issue_date=when.date(),
+                    due_date=when.date(), client_id=client_record.id, created_by=user_id, created_at=when
+                ))
+                db.session.add(TimeEntry(
+                    description='Client call', start_time=when, hours=Decimal('1.5'),
+                    hourly_rate=Decimal('300'), amount=Decimal('450'), billable=True,
+                    status=TimeEntryStatus.APPROVED, user_id=user_id, case_id=case.id, date=when.date()
+                ))
+            db.session.commit()
+
+            case.practice_area = 'corporate'
+            db.session.commit()
+            db.session.delete(Invoice.query.filter_by(invoice_number='RU-0').first())
+            db.session.commit()
+
+            incremental = self._rollup_rows()
+            backfill_rollups()
+            assert incremental == self._rollup_rows()
+
 @pytest.mark.performance
 class TestCachePerformance:
     """Test caching mechanisms and performance."""
@@ -444,6 +735,156 @@ class TestCachePerformance:
             
             assert max_response_time <= avg_response_time * 2.0, f"Inconsistent response times for {endpoint}"
 
+    def test_lru_cache_stays_within_budget(self):
+        """Test the in-memory cache evicts least recently used entries to stay bounded."""
+        from api.cache import LRUCache
+
+        cache = LRUCache(default_ttl=60, max_entries=100, max_bytes=64 * 1024)
+
+        for i in range(1000):
+            cache.set(f'result:{i}', {'analysis': 'x' * 500, 'index': i})
+            if i % 10 == 0:
+                cache.get('result:0')  # keep one hot entry
+
+        stats = cache.get_stats()
+        assert stats['total_keys'] <= 100
+        assert stats['memory_usage_bytes'] <= 64 * 1024
+        assert stats['evictions'] > 0
+        assert cache.get('result:0') is not None
+        assert cache.get('result:999') is not None
+
+        # A single value larger than the whole budget is never stored
+        cache.set('huge', 'x' * (128 * 1024))
+        assert cache.get('huge') is None
+        assert cache.get_stats()['rejected'] == 1
+
+    def test_tiered_cache_reports_hit_and_miss_metrics(self):
+        """Test cache lookups feed the cache_hit/cache_miss dashboard metrics."""
+        from api.cache import TieredCache
+
+        record_metric = Mock()
+        cache = TieredCache()
+        cache.init_metrics(record_metric)
+
+        cache.get('report:1')
+        cache.set('report:1', {'total': 3})
+        cache.get('report:1')
+
+        assert [c.args for c in record_metric.call_args_list] == [('cache_miss', 1), ('cache_hit', 1)]
+
+    def test_static_assets_served_precompressed(self, tmp_path):
+        """Test static URLs are content-hashed and gzip clients get the prebuilt variant."""
+        from flask import Flask
+        from api.assets import AssetManifest, build_assets
+
+        (tmp_path / 'app.css').write_text('body { margin: 0; }\n' * 200)
+        build_assets(str(tmp_path))
+
+        app = Flask(__name__, static_folder=str(tmp_path), static_url_path='/static')
+        manifest = AssetManifest(app)
+        url = manifest.url('app.css')
+        assert url == manifest.url('app.css')
+        assert url.startswith('/static/app.css?v=')
+
+        response = app.test_client().get('/static/app.css', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        response.close()
+
+    def test_precompiled_templates_skip_compilation(self, tmp_path, monkeypatch):
+        """Test a fresh app loads templates from precompiled bytecode."""
+        from flask import Flask
+        from api import templating
+
+        templates = tmp_path / 'templates'
+        templates.mkdir()
+        (templates / 'page.html').write_text('{% for i in range(3) %}<p>{{ i }}</p>{% endfor %}')
+        bundled = tmp_path / 'bundled'
+
+        compiled, failed = templating.precompile_templates(
+            Flask(__name__, template_folder=str(templates)).jinja_env, str(bundled)
+        )
+        assert compiled == ['page.html'] and not failed
+
+        monkeypatch.setattr(templating, 'BUNDLED_CACHE_DIR', str(bundled))
+        monkeypatch.setenv('TEMPLATE_CACHE_DIR', str(tmp_path / 'runtime'))
+        app = Flask(__name__, template_folder=str(templates))
+        cache = templating.TemplateCache(app)
+        app.jinja_env.get_template('page.html')
+
+        assert cache.get_stats()['templates']['page.html']['source'] == 'bytecode'
+
+    def test_legal_research_results_cached_by_normalized_query(self, tmp_path, monkeypatch):
+        """Test repeated research is served from the research cache."""
+        from api import legal_research_service
+        from api.legal_research_service import LegalResearchService, ResearchCache
+
+        upstream = Mock(return_value=Mock(status_code=200, json=Mock(return_value={'results': [
+            {'id': 1, 'caseName': 'Acme Corp. v. Widget Inc.', 'dateFiled': '2020-01-15', 'score': 12}
+        ]})))
+        bagel = Mock(return_value={'success': True, 'response': 'Analysis', 'confidence_score': 0.9})
+        monkeypatch.setattr(legal_research_service.requests, 'get', upstream)
+        monkeypatch.setattr(legal_research_service, 'query_bagel_legal_ai', bagel, raising=False)
+        monkeypatch.setattr(legal_research_service, 'BAGEL_AVAILABLE', True)
+        monkeypatch.setattr(legal_research_service, 'shared_cache', None)
+
+        service = LegalResearchService()
+        service.api_keys.update(courtlistener='test-key', congress=None)
+        service.cache = ResearchCache(directory=str(tmp_path))
+
+        first = service.comprehensive_legal_research('Breach of  Contract', 'contracts', 'california')
+        assert upstream.call_count == 1
+        assert first['cached'] is False
+        assert set(first['cache'].values()) == {'miss'}
+
+        upstream.reset_mock()
+        second = service.comprehensive_legal_research('breach of contract', 'contracts', 'california')
+        assert upstream.call_count == 0
+        assert second['cached'] is True
+        assert second['cache']['secondary_sources'] == 'hit'
+        assert second['total_sources'] == first['total_sources']
+
+    def test_translation_memory_serves_repeated_clauses(self, tmp_path, monkeypatch):
+        """Test repeated and near-identical clauses skip translation."""
+        from api import spanish_service
+        from api.spanish_service import SpanishLegalService, TranslationMemory
+
+        monkeypatch.setattr(spanish_service, 'BAGEL_AVAILABLE', False)
+        service = SpanishLegalService()
+        service.memory = TranslationMemory(path=str(tmp_path / 'tm.json'))
+        clause = 'El contrato se rige por las leyes de California y el tribunal decidirá cualquier disputa.'
+
+        assert service.translate_text(clause, 'en', 'contract').memory_match is None
+        assert service.translate_text(clause.replace(' ', '  '), 'en', 'contract').memory_match == 'exact'
+        assert service.translate_text(clause.upper(), 'en', 'contract').memory_match != 'exact'
+
+        adapted = service.translate_text(clause.replace('California', 'Texas'), 'en', 'contract')
+        assert adapted.memory_match == 'fuzzy'
+        assert 'Texas' in adapted.translated_text and 'California' not in adapted.translated_text
+
+        # Ordinary words are translated afresh rather than pasted in
+        reworded = service.translate_text(clause.replace('contrato', 'acuerdo'), 'en', 'contract')
+        assert reworded.memory_match is None
+
+        service.memory.save()
+        assert len(TranslationMemory(path=str(tmp_path / 'tm.json')).entries) == 3
+
+    def test_translation_memory_used_while_bagel_is_failing(self, tmp_path, monkeypatch):
+        """Test a failing Bagel service is not retried per segment and memory still serves hits."""
+        from api import spanish_service
+        from api.spanish_service import SpanishLegalService, TranslationMemory
+
+        monkeypatch.setattr(spanish_service, 'BAGEL_AVAILABLE', True)
+        service = SpanishLegalService()
+        service.memory = TranslationMemory(path=str(tmp_path / 'tm.json'))
+        enhance = Mock(return_value={'success': False, 'error': 'connection reset'})
+        monkeypatch.setattr(service, '_enhance_with_bagel_rl', enhance)
+        clause = 'El contrato se rige por las leyes de California y el tribunal decidirá cualquier disputa.'
+
+        assert service.translate_text(clause, 'en', 'contract').bagel_enhanced is False
+        assert service.translate_text(clause, 'en', 'contract').memory_match == 'exact'
+        assert enhance.call_count == 1
+
 @pytest.mark.performance
 class TestLoadPerformance:
     """Test performance under various load conditions."""
@@ -322,6 +322,49 @@ class TestNetworkSecurity:
         # In development/testing, this might not be enforced
         pass  # Placeholder for rate limiting validation
 
+    def test_rate_limiter_enforces_full_api_limit(self):
+        """Test the API tier trips at its configured limit and reports headers."""
+        from api.rate_limiter import RateLimiter, rate_limit_headers
+
+        limiter = RateLimiter()
+        results = [limiter.is_rate_limited('203.0.113.7', 'api') for _ in range(1001)]
+
+        assert not any(limited for limited, _ in results[:1000])
+        limited, info = results[1000]
+        assert limited and info['rate_limited']
+
+        headers = rate_limit_headers(info)
+        assert headers['RateLimit-Limit'] == '1000'
+        assert headers['RateLimit-Remaining'] == '0'
+        assert int(headers['Retry-After']) >= 1
+
+        # Limits are per tier and per client
+        assert not limiter.is_rate_limited('203.0.113.7', 'search')[0]
+        assert not limiter.is_rate_limited('203.0.113.8', 'api')[0]
+
+    def test_logout_all_devices_and_session_expiry(self):
+        """Test per-user session invalidation and heap-based expiry."""
+        pytest.importorskip('bleach')
+        from api.security_hardening import SessionSecurity
+
+        sessions = SessionSecurity('test-secret')
+        sessions.session_timeout = 0.05
+        current = sessions.create_session('user-1', '10.0.0.1', 'browser')
+        sessions.create_session('user-1', '10.0.0.2', 'phone')
+        other_user = sessions.create_session('user-2', '10.0.0.3', 'browser')
+
+        assert sessions.invalidate_user_sessions('user-1', except_session_id=current) == 1
+        assert list(sessions.get_user_sessions('user-1')) == [current]
+
+        # Activity pushes a session's deadline back; idle sessions expire
+        time.sleep(0.03)
+        assert sessions.validate_session(current, '10.0.0.1', 'browser')[0]
+        time.sleep(0.03)
+        assert sessions.cleanup_expired_sessions() == 1
+        assert current in sessions.active_sessions
+        assert other_user not in sessions.active_sessions
+        assert not sessions.get_user_sessions('user-2')
+
 @pytest.mark.security  
 class TestCryptographicSecurity:
     """Test cryptographic implementations."""